@@ -0,0 +1,275 @@
+"""항공권 가격 트래커 - 최저가 갱신 알림 outbox 디스패처
+
+scanrecord.record_scan_result는 최저가 갱신 시 alert_outbox에 행을 적재만 한다 (weekly_lowest 갱신과 같은 트랜잭션).
+AlertDispatcher가 outbox를 주기적으로 읽어 구간별 다이제스트 1건으로 묶어 전송하고 sent_at을 기록한다.
+
+- 구간의 가장 오래된 미전송 알림이 ALERT_COALESCE_SECONDS초 지났거나 구간 스캔이 끝나면 전송
+- 같은 주(출발/귀국일)에 여러 번 갱신되면 최초 이전가 → 마지막 현재가 1줄로 합침
+- 전송 실패 시 attempts/last_error 기록, ALERT_MAX_ATTEMPTS회까지 다음 주기에 재시도
+- 트래커 프로세스가 죽어도 outbox에 남은 알림은 `python alerts.py`로 전송 가능
+"""
+
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from itertools import groupby
+
+import pytz
+
+from config import (
+    ALL_ROUTES, DISCORD_CHANNEL_ID,
+    ALERT_COALESCE_SECONDS, ALERT_POLL_SECONDS, ALERT_MAX_ATTEMPTS,
+)
+from db import init_db, get_db
+from discord_client import DiscordClient, load_discord_bot_token
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+DESTINATION_LABELS = {r["destination"]: r["label"] for r in ALL_ROUTES}
+WEEKDAYS_KR = ["월", "화", "수", "목", "금", "토", "일"]
+
+
+def _md(date_str: str) -> str:
+    d = datetime.strptime(date_str, "%Y-%m-%d")
+    return f"{d.month:02d}/{d.day:02d}({WEEKDAYS_KR[d.weekday()]})"
+
+
+def _overall_line(overall_min: int | None, overall_min_date: str | None) -> str | None:
+    if overall_min is None:
+        return None
+    if overall_min_date:
+        return f"📊 구간 전체 최저가: {overall_min:,}원 ({_md(overall_min_date)} 출발)"
+    return f"📊 구간 전체 최저가: {overall_min:,}원"
+
+
+def format_price_alert(destination: str, depart_date: str, return_date: str,
+                       old_price, new_price: int, airline: str, flight_info: str,
+                       overall_min: int | None = None,
+                       overall_min_date: str | None = None,
+                       reason: str | None = None) -> str:
+    """최저가 갱신 알림 메시지를 생성한다 (주 1개). reason: 유의성 근거 (pricestats)."""
+    label = DESTINATION_LABELS.get(destination, destination)
+
+    lines = [f"🚨 최저가 갱신! 인천 → {label}"]
+    lines.append(f"📅 {_md(depart_date)} → {_md(return_date)}")
+
+    if old_price is not None:
+        diff_pct = (new_price - old_price) / old_price * 100
+        lines.append(f"이전: {old_price:,}원 → 현재: {new_price:,}원 ({diff_pct:+.1f}%)")
+    else:
+        lines.append(f"현재: {new_price:,}원")
+    if reason:
+        lines.append(f"📉 {reason}")
+
+    lines.append(f"항공사: {airline}")
+
+    # flight_info에서 가는 편/오는 편 파싱
+    if " / " in flight_info:
+        out_leg, ret_leg = flight_info.split(" / ", 1)
+        lines.append(f"↗ 가는편: {out_leg.strip()}")
+        lines.append(f"↙ 오는편: {ret_leg.strip()}")
+    else:
+        lines.append(flight_info)
+
+    overall = _overall_line(overall_min, overall_min_date)
+    if overall:
+        lines.append(overall)
+
+    return "\n".join(lines)
+
+
+def collapse_alerts(rows) -> list[dict]:
+    """같은 주의 연속 갱신을 1건으로 합친다 (최초 이전가, 마지막 현재가/항공편/근거). 출발일순."""
+    weeks: dict[tuple[str, str], dict] = {}
+    for row in rows:
+        key = (row["depart_date"], row["return_date"])
+        if key not in weeks:
+            weeks[key] = dict(row)
+        else:
+            weeks[key].update(
+                new_price=row["new_price"], airline=row["airline"], flight_info=row["flight_info"],
+                reason=row["reason"],
+            )
+    return [weeks[k] for k in sorted(weeks)]
+
+
+def format_route_digest(destination: str, rows,
+                        overall_min: int | None = None,
+                        overall_min_date: str | None = None) -> str:
+    """구간 1개의 미전송 알림을 메시지 1건으로 만든다. 주가 1개면 기존 단건 형식."""
+    weeks = collapse_alerts(rows)
+    if len(weeks) == 1:
+        w = weeks[0]
+        return format_price_alert(
+            destination, w["depart_date"], w["return_date"],
+            w["old_price"], w["new_price"], w["airline"], w["flight_info"],
+            overall_min=overall_min, overall_min_date=overall_min_date, reason=w.get("reason"),
+        )
+
+    label = DESTINATION_LABELS.get(destination, destination)
+    lines = [f"🚨 최저가 갱신 {len(weeks)}건! 인천 → {label}"]
+    for w in weeks:
+        diff_pct = (w["new_price"] - w["old_price"]) / w["old_price"] * 100
+        lines.append(
+            f"📅 {_md(w['depart_date'])} → {_md(w['return_date'])} | "
+            f"{w['old_price']:,}원 → {w['new_price']:,}원 ({diff_pct:+.1f}%) | {w['airline']}"
+        )
+        if w.get("reason"):
+            lines.append(f"   📉 {w['reason']}")
+    overall = _overall_line(overall_min, overall_min_date)
+    if overall:
+        lines.append(overall)
+    return "\n".join(lines)
+
+
+class AlertDispatcher:
+    """alert_outbox → Discord 전송 백그라운드 태스크.
+
+    사용:
+        dispatcher = AlertDispatcher(discord)
+        dispatcher.start()
+        ...
+        dispatcher.route_done(route_id)   # 해당 구간은 대기 시간 없이 다음 주기에 전송
+        ...
+        await dispatcher.close()          # 남은 알림 모두 전송 시도 후 종료
+    """
+
+    def __init__(self, discord: DiscordClient,
+                 coalesce_seconds: float = ALERT_COALESCE_SECONDS,
+                 poll_seconds: float = ALERT_POLL_SECONDS,
+                 max_attempts: int = ALERT_MAX_ATTEMPTS):
+        self.discord = discord
+        self.coalesce_seconds = coalesce_seconds
+        self.poll_seconds = poll_seconds
+        self.max_attempts = max_attempts
+        self.sent = 0
+        self.send_seconds = 0.0   # Discord 전송 대기 시간 합계 (실행 계측용)
+        self._ready: set[int] = set()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._task: asyncio.Task | None = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    def route_done(self, route_id: int):
+        """구간 스캔 완료 — 대기 중인 알림을 바로 묶어 보내도록 표시한다."""
+        self._ready.add(route_id)
+        self._wake.set()
+
+    async def _loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            if self._closing:
+                return
+            try:
+                await self.dispatch()
+            except Exception as e:
+                logger.error(f"알림 디스패치 오류: {e}")
+
+    async def dispatch(self, force: bool = False) -> int:
+        """전송 시점이 된 구간의 알림을 다이제스트로 보낸다. 전송한 메시지 수를 반환.
+
+        force=True면 대기 시간과 관계없이 미전송 알림을 모두 보낸다.
+        """
+        ready, self._ready = self._ready, set()
+        cutoff = (datetime.now(KST) - timedelta(seconds=self.coalesce_seconds)).isoformat()
+        sent = 0
+
+        db = await get_db()
+        try:
+            cursor = await db.execute(
+                "SELECT o.*, r.destination FROM alert_outbox o "
+                "JOIN routes r ON o.route_id = r.id "
+                "WHERE o.sent_at IS NULL AND o.attempts < ? "
+                "ORDER BY o.route_id, o.id",
+                (self.max_attempts,),
+            )
+            pending = await cursor.fetchall()
+
+            for route_id, group in groupby(pending, key=lambda r: r["route_id"]):
+                rows = list(group)
+                if not (force or route_id in ready or rows[0]["created_at"] <= cutoff):
+                    continue
+
+                overall_row = await db.execute(
+                    "SELECT MIN(min_price) as p, depart_date FROM weekly_lowest WHERE route_id=?",
+                    (route_id,)
+                )
+                overall = await overall_row.fetchone()
+                message = format_route_digest(
+                    rows[0]["destination"], rows,
+                    overall_min=overall["p"] if overall else None,
+                    overall_min_date=overall["depart_date"] if overall else None,
+                )
+
+                ids = [r["id"] for r in rows]
+                marks = ",".join("?" * len(ids))
+                start = time.perf_counter()
+                try:
+                    ok = await self.discord.send(message)
+                    error = None if ok else "Discord 전송 실패"
+                except Exception as e:
+                    ok, error = False, str(e)
+                finally:
+                    self.send_seconds += time.perf_counter() - start
+
+                if ok:
+                    await db.execute(
+                        f"UPDATE alert_outbox SET sent_at=? WHERE id IN ({marks})",
+                        (datetime.now(KST).isoformat(), *ids),
+                    )
+                    sent += 1
+                    logger.info(f"최저가 알림 전송: route_id={route_id} ({len(rows)}건 → 1메시지)")
+                else:
+                    await db.execute(
+                        f"UPDATE alert_outbox SET attempts=attempts+1, last_error=? WHERE id IN ({marks})",
+                        (error, *ids),
+                    )
+                    self._ready.add(route_id)
+                    logger.warning(f"최저가 알림 전송 실패, 다음 주기에 재시도: route_id={route_id} ({error})")
+                await db.commit()
+        finally:
+            await db.close()
+
+        self.sent += sent
+        return sent
+
+    async def close(self):
+        """백그라운드 루프를 멈추고 남은 알림을 모두 전송 시도한다."""
+        # 전송 도중 취소하면 sent_at 기록 전에 끊겨 중복 전송될 수 있으므로 현재 주기가 끝나길 기다린다
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        try:
+            await self.dispatch(force=True)
+        except Exception as e:
+            logger.error(f"알림 디스패치 오류 (미전송분은 outbox에 보존): {e}")
+
+
+async def main():
+    """outbox에 남은 미전송 알림을 한 번에 전송한다 (트래커 비정상 종료 후 복구용)."""
+    await init_db()
+    async with DiscordClient(load_discord_bot_token(), DISCORD_CHANNEL_ID) as discord:
+        sent = await AlertDispatcher(discord).dispatch(force=True)
+    logger.info(f"미전송 알림 {sent}개 메시지 전송")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    argparse.ArgumentParser(description="미전송 최저가 알림 전송 (alert_outbox)").parse_args()
+    asyncio.run(main())
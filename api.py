@@ -0,0 +1,317 @@
+"""항공권 가격 트래커 - 로컬 조회 API (SQLite 앞단 HTTP 서비스)
+
+flight_tracker.db를 읽기 전용으로 열어 대시보드 / 스크립트가 export 샤드 없이 바로 조회하게 한다.
+
+    GET /api/routes                                   # 구간 목록 (매니페스트와 같은 요약)
+    GET /api/routes/{ORIGIN-DEST}/weeks               # 구간 weeks (routes 샤드와 같은 모양)
+    GET /api/routes/{ORIGIN-DEST}/history             # 전체 최저가 히스토리 (최신순, 페이지)
+        ?depart_date=YYYY-MM-DD                       #   해당 출발일 주간 히스토리
+        &since=...&until=...                          #   snapshot_at 범위 (since 이상, until 미만)
+        &limit=N&cursor=...                           #   페이지 크기 / 이전 응답의 next_cursor
+
+캐싱:
+- 응답 본문을 (경로 + 쿼리) 키로 메모리 LRU에 보관 (API_CACHE_ENTRIES개)
+- 요청마다 `PRAGMA data_version`만 확인 — 다른 커넥션(tracker / briefing)이 커밋하면 값이 바뀌고,
+  그때 캐시 전체를 비운다 (쓰기 버전). 쓰기가 없으면 DB를 읽지 않고 캐시에서 응답
+- ETag는 본문 해시 (W/"...") → If-None-Match가 맞으면 304, 쓰기 후에도 내용이 같으면 304 유지
+- Accept-Encoding: gzip이면 gzip 본문 (항목당 한 번만 압축해 함께 캐시)
+
+    python api.py                      # API_HOST:API_PORT
+    python api.py --port 9000
+"""
+
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime
+
+import aiosqlite
+import pytz
+from aiohttp import web
+
+from config import (
+    ALL_ROUTES, DB_PATH, API_HOST, API_PORT, API_CACHE_ENTRIES,
+    API_HISTORY_PAGE, API_HISTORY_PAGE_MAX,
+)
+from export import WEEKS_SQL, week_entry
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+GZIP_MIN_BYTES = 1024   # 이보다 작은 본문은 압축하지 않음
+
+ROUTES_SQL = """
+    SELECT r.id AS route_id, r.origin, r.destination,
+           COUNT(w.depart_date) AS week_count,
+           MIN(w.min_price) AS min_price,
+           MAX(w.updated_at) AS updated_at
+    FROM routes r
+    JOIN weekly_lowest w ON w.route_id = r.id
+    GROUP BY r.id
+    ORDER BY r.id
+"""
+
+# 최신순 keyset 페이지 — (snapshot_at, id) 커서, 인덱스 순서 그대로 역방향 스캔
+OVERALL_PAGE_SQL = """
+    SELECT id, snapshot_at, overall_min_price AS price, airline, depart_date
+    FROM price_history
+    WHERE route_id = ? AND snapshot_at >= ? AND snapshot_at < ? AND (snapshot_at, id) < (?, ?)
+    ORDER BY snapshot_at DESC, id DESC
+    LIMIT ?
+"""
+
+WEEKLY_PAGE_SQL = """
+    SELECT id, snapshot_at, min_price AS price, airline
+    FROM weekly_price_history
+    WHERE route_id = ? AND depart_date = ?
+      AND snapshot_at >= ? AND snapshot_at < ? AND (snapshot_at, id) < (?, ?)
+    ORDER BY snapshot_at DESC, id DESC
+    LIMIT ?
+"""
+
+# 범위 / 커서 미지정 시 경계값 (snapshot_at은 ISO 문자열이므로 문자열 비교)
+MIN_TS = ""
+MAX_TS = "\uffff"
+MAX_ID = 2 ** 63 - 1
+
+
+class ApiError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class CachedResponse:
+    __slots__ = ("status", "body", "etag", "gzipped")
+
+    def __init__(self, status: int, body: bytes):
+        self.status = status
+        self.body = body
+        self.etag = f'W/"{hashlib.sha256(body).hexdigest()[:16]}"'
+        self.gzipped: bytes | None = None
+
+    def gzip_body(self) -> bytes:
+        if self.gzipped is None:
+            self.gzipped = gzip.compress(self.body, 6, mtime=0)
+        return self.gzipped
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _timestamp_param(query, name: str) -> str | None:
+    """since / until 검증 — ISO 날짜 또는 일시. snapshot_at과 문자열로 비교한다."""
+    value = query.get(name)
+    if value is None:
+        return None
+    try:
+        datetime.fromisoformat(value)
+    except ValueError:
+        raise ApiError(400, f"{name}: ISO 날짜/일시가 아님 ({value})")
+    return value
+
+
+def _limit_param(query) -> int:
+    try:
+        limit = int(query.get("limit", API_HISTORY_PAGE))
+    except ValueError:
+        raise ApiError(400, "limit: 정수가 아님")
+    if limit < 1:
+        raise ApiError(400, "limit: 1 이상이어야 함")
+    return min(limit, API_HISTORY_PAGE_MAX)
+
+
+def _cursor_param(query) -> tuple[str, int]:
+    value = query.get("cursor")
+    if value is None:
+        return MAX_TS, MAX_ID
+    snapshot_at, _, row_id = value.rpartition("~")
+    try:
+        return snapshot_at, int(row_id)
+    except ValueError:
+        raise ApiError(400, f"cursor: 잘못된 값 ({value})")
+
+
+class ReadApi:
+    """읽기 전용 커넥션 1개 + 쓰기 버전 기반 응답 캐시."""
+
+    def __init__(self, db_path: str = DB_PATH, cache_entries: int = API_CACHE_ENTRIES):
+        self.db_path = db_path
+        self.cache_entries = cache_entries
+        self.db: aiosqlite.Connection | None = None
+        self.cache: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.data_version: int | None = None
+        self.write_version = 0   # 캐시를 비운 횟수 (X-Write-Version 헤더)
+        self.route_labels = {r["destination"]: r["label"] for r in ALL_ROUTES}
+        self.stats = {"hits": 0, "misses": 0, "not_modified": 0, "invalidations": 0}
+
+    async def open(self):
+        self.db = await aiosqlite.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        self.db.row_factory = aiosqlite.Row
+
+    async def close(self):
+        if self.db is not None:
+            await self.db.close()
+            self.db = None
+
+    async def check_version(self):
+        """다른 커넥션의 커밋 여부 확인 — 바뀌었으면 캐시를 비운다."""
+        cursor = await self.db.execute("PRAGMA data_version")
+        version = (await cursor.fetchone())[0]
+        if version != self.data_version:
+            if self.data_version is not None:
+                self.write_version += 1
+                self.stats["invalidations"] += 1
+                logger.info(f"DB 변경 감지 → 응답 캐시 {len(self.cache)}개 비움")
+            self.cache.clear()
+            self.data_version = version
+
+    # ── 조회
+
+    async def _route(self, key: str):
+        origin, sep, destination = key.partition("-")
+        if not sep:
+            raise ApiError(404, f"구간 키 형식이 아님 ({key})")
+        cursor = await self.db.execute(
+            "SELECT id FROM routes WHERE origin = ? AND destination = ?", (origin, destination)
+        )
+        row = await cursor.fetchone()
+        if row is None:
+            raise ApiError(404, f"구간 없음 ({key})")
+        return row["id"]
+
+    async def routes(self, request: web.Request) -> dict:
+        cursor = await self.db.execute(ROUTES_SQL)
+        return {"routes": [
+            {
+                "key": f"{row['origin']}-{row['destination']}",
+                "origin": row["origin"],
+                "destination": row["destination"],
+                "label": self.route_labels.get(row["destination"], row["destination"]),
+                "week_count": row["week_count"],
+                "min_price": row["min_price"],
+                "updated_at": row["updated_at"],
+            }
+            for row in await cursor.fetchall()
+        ]}
+
+    async def weeks(self, request: web.Request) -> dict:
+        route_id = await self._route(request.match_info["key"])
+        today = datetime.now(KST).date()
+        cursor = await self.db.execute(WEEKS_SQL.format(where="WHERE w.route_id = ?"), (route_id,))
+        return {"weeks": [week_entry(row, today) for row in await cursor.fetchall()]}
+
+    async def history(self, request: web.Request) -> dict:
+        key = request.match_info["key"]
+        route_id = await self._route(key)
+        query = request.query
+        depart_date = query.get("depart_date")
+        since = _timestamp_param(query, "since") or MIN_TS
+        until = _timestamp_param(query, "until") or MAX_TS
+        limit = _limit_param(query)
+        cursor_ts, cursor_id = _cursor_param(query)
+
+        if depart_date is not None:
+            sql, params = WEEKLY_PAGE_SQL, (route_id, depart_date)
+        else:
+            sql, params = OVERALL_PAGE_SQL, (route_id,)
+        cursor = await self.db.execute(sql, params + (since, until, cursor_ts, cursor_id, limit + 1))
+        rows = [dict(row) for row in await cursor.fetchall()]
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['snapshot_at']}~{rows[-1]['id']}"
+        for row in rows:
+            del row["id"]
+        return {"route": key, "depart_date": depart_date, "points": rows, "next_cursor": next_cursor}
+
+    # ── HTTP
+
+    def handler(self, view):
+        async def handle(request: web.Request) -> web.Response:
+            await self.check_version()
+            # weeks의 추세 힌트는 날짜(출발까지 남은 일수)에 따라 바뀌므로 날짜도 키에 넣는다
+            cache_key = f"{datetime.now(KST).date()}|{request.path_qs}"
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                self.cache.move_to_end(cache_key)
+                self.stats["hits"] += 1
+            else:
+                self.stats["misses"] += 1
+                try:
+                    cached = CachedResponse(200, _dumps(await view(request)))
+                except ApiError as e:
+                    cached = CachedResponse(e.status, _dumps({"error": str(e)}))
+                self.cache[cache_key] = cached
+                if len(self.cache) > self.cache_entries:
+                    self.cache.popitem(last=False)
+            return self._respond(request, cached)
+        return handle
+
+    def _respond(self, request: web.Request, cached: CachedResponse) -> web.Response:
+        headers = {
+            "ETag": cached.etag,
+            "Cache-Control": "no-cache",
+            "Vary": "Accept-Encoding",
+            "X-Write-Version": str(self.write_version),
+        }
+        if cached.status == 200 and cached.etag in request.headers.get("If-None-Match", ""):
+            self.stats["not_modified"] += 1
+            return web.Response(status=304, headers=headers)
+
+        body = cached.body
+        if len(body) >= GZIP_MIN_BYTES and "gzip" in request.headers.get("Accept-Encoding", ""):
+            body = cached.gzip_body()
+            headers["Content-Encoding"] = "gzip"
+        return web.Response(status=cached.status, body=body, headers=headers,
+                            content_type="application/json", charset="utf-8")
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get("/api/routes", self.handler(self.routes))
+        app.router.add_get("/api/routes/{key}/weeks", self.handler(self.weeks))
+        app.router.add_get("/api/routes/{key}/history", self.handler(self.history))
+
+        async def on_startup(_app):
+            await self.open()
+
+        async def on_cleanup(_app):
+            await self.close()
+
+        app.on_startup.append(on_startup)
+        app.on_cleanup.append(on_cleanup)
+        return app
+
+
+async def serve(host: str, port: int):
+    api = ReadApi()
+    runner = web.AppRunner(api.app())
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    logger.info(f"조회 API http://{host}:{port}/api/routes (DB {api.db_path})")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="항공권 가격 트래커 로컬 조회 API")
+    parser.add_argument("--host", default=API_HOST, help=f"바인드 주소 (기본 {API_HOST})")
+    parser.add_argument("--port", type=int, default=API_PORT, help=f"포트 (기본 {API_PORT})")
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,170 @@
+"""항공권 가격 트래커 - 콜드 히스토리 아카이브 (Parquet)
+
+cleanup_past_dates()가 삭제하는 행(만료된 weekly_lowest, 30일+ scan_history)을
+삭제 직전에 월/구간 단위로 파티셔닝된 zstd 압축 Parquet 파일로 옮긴다.
+
+디렉토리 레이아웃 (hive 파티셔닝):
+    archive/{table}/month=YYYY-MM/route_id=N/part-{cutoff}-{batch}-{i}.parquet
+
+아카이브 기록과 SQLite DELETE는 원자적이지 않다 — 기록 후 삭제 전에 중단되면 다음 실행이
+같은 행을 다시 아카이브한다. 파일 이름이 (테이블, 월, 구간, 삭제 기준) 단위로 결정적이라
+같은 기준으로 다시 돌면 같은 파일을 덮어쓰고, 기준이 바뀐 뒤의 중복은 scan_archive()가
+키(scan_history는 id, weekly_lowest는 구간+날짜) 기준으로 제거한다.
+
+조회는 scan_archive()로 — month/route_id 조건은 파티션 프루닝으로 처리되어
+해당 파일만 읽는다. 라이브 SQLite DB와 분리되어 있어 장기 분석이 시간별 크롤러와
+경합하지 않는다.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import re
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from config import ARCHIVE_DIR
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_BATCH_ROWS = 10000   # SQLite에서 한 번에 읽어 Parquet로 쓰는 행 수
+
+# 테이블별 아카이브 컬럼 스키마 + 월 파티션 기준 컬럼 + 중복 제거 키
+# (SELECT 컬럼을 고정해 두어 라이브 테이블에 컬럼이 추가돼도 아카이브 스키마는 유지)
+ARCHIVE_TABLES = {
+    "scan_history": {
+        "schema": pa.schema([
+            ("id", pa.int64()),
+            ("route_id", pa.int32()),
+            ("depart_date", pa.string()),
+            ("return_date", pa.string()),
+            ("price", pa.int64()),
+            ("airline", pa.string()),
+            ("flight_info", pa.string()),
+            ("scanned_at", pa.string()),
+        ]),
+        "month_column": "scanned_at",
+        "key": ("id",),
+    },
+    "weekly_lowest": {
+        "schema": pa.schema([
+            ("id", pa.int64()),
+            ("route_id", pa.int32()),
+            ("depart_date", pa.string()),
+            ("return_date", pa.string()),
+            ("min_price", pa.int64()),
+            ("airline", pa.string()),
+            ("flight_info", pa.string()),
+            ("kal_price", pa.int64()),
+            ("kal_flight_info", pa.string()),
+            ("pax3_price", pa.int64()),
+            ("updated_at", pa.string()),
+        ]),
+        "month_column": "depart_date",
+        "key": ("route_id", "depart_date", "return_date"),   # id는 rebuild 교체 시 새로 부여됨
+    },
+}
+
+PARTITIONING = ds.partitioning(
+    pa.schema([("month", pa.string()), ("route_id", pa.int32())]),
+    flavor="hive",
+)
+
+
+def _write_parquet(table_name: str, rows: list, basename: str) -> None:
+    """rows를 파티셔닝된 Parquet 파일로 기록한다 (동기, 스레드에서 실행).
+
+    파티션마다 {basename}-{i}.parquet — 같은 이름의 기존 파일은 덮어쓴다.
+    """
+    spec = ARCHIVE_TABLES[table_name]
+    schema = spec["schema"]
+    month_column = spec["month_column"]
+
+    columns = {field.name: [row[field.name] for row in rows] for field in schema}
+    columns["month"] = [row[month_column][:7] for row in rows]
+    table = pa.table(columns, schema=schema.append(pa.field("month", pa.string())))
+
+    ds.write_dataset(
+        table,
+        os.path.join(ARCHIVE_DIR, table_name),
+        format="parquet",
+        partitioning=PARTITIONING,
+        basename_template=f"{basename}-{{i}}.parquet",
+        existing_data_behavior="overwrite_or_ignore",
+        file_options=ds.ParquetFileFormat().make_write_options(compression="zstd"),
+    )
+
+
+async def archive_rows(db, table_name: str, where: str, params: tuple) -> int:
+    """조건에 맞는 행을 Parquet로 아카이브하고 건수를 반환한다.
+
+    삭제는 하지 않는다 — 호출자가 같은 조건으로 DELETE 한다.
+    아카이브 실패 시 예외를 전파하므로 호출자는 삭제를 건너뛰어 데이터를 보존해야 한다.
+    행은 id 순으로 ARCHIVE_BATCH_ROWS개씩 읽어 배치마다 기록하고, 파일 이름은 params(삭제 기준)와
+    배치 번호로 정해진다 — 삭제 전에 중단된 뒤 같은 기준으로 다시 돌면 같은 파일을 덮어쓴다.
+    """
+    schema = ARCHIVE_TABLES[table_name]["schema"]
+    cols = ", ".join(field.name for field in schema)
+    cutoff = re.sub(r"[^0-9A-Za-z]", "", "-".join(str(p) for p in params))
+    cursor = await db.execute(f"SELECT {cols} FROM {table_name} WHERE {where} ORDER BY id", params)
+
+    count = 0
+    batch_no = 0
+    while rows := await cursor.fetchmany(ARCHIVE_BATCH_ROWS):
+        await asyncio.to_thread(_write_parquet, table_name, rows, f"part-{cutoff}-{batch_no:05d}")
+        count += len(rows)
+        batch_no += 1
+    if count:
+        logger.info(f"{table_name} {count}건 아카이브 완료 → {ARCHIVE_DIR}")
+    return count
+
+
+def scan_archive(table_name: str, route_ids: list[int] | None = None,
+                 months: list[str] | None = None,
+                 columns: list[str] | None = None) -> pa.Table:
+    """아카이브를 조회한다.
+
+    route_ids / months("YYYY-MM") 조건은 파티션 프루닝으로 처리되어
+    조건에 맞지 않는 파일은 열지 않는다. 삭제 전 중단으로 두 번 아카이브된 행은
+    테이블 키 기준으로 한 번만 반환한다.
+    """
+    path = os.path.join(ARCHIVE_DIR, table_name)
+    if not os.path.isdir(path):
+        schema = ARCHIVE_TABLES[table_name]["schema"].append(pa.field("month", pa.string()))
+        empty = schema.empty_table()
+        return empty.select(columns) if columns else empty
+
+    dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+
+    expr = None
+    if route_ids is not None:
+        expr = ds.field("route_id").isin(route_ids)
+    if months is not None:
+        month_expr = ds.field("month").isin(months)
+        expr = month_expr if expr is None else expr & month_expr
+
+    key = list(ARCHIVE_TABLES[table_name]["key"])
+    read_columns = None if columns is None else columns + [c for c in key if c not in columns]
+    table = dataset.to_table(columns=read_columns, filter=expr)
+
+    # 키별 첫 행만 (중복이 없으면 그대로)
+    first = (table.select(key).append_column("_row", pa.array(range(table.num_rows), pa.int64()))
+             .group_by(key, use_threads=False).aggregate([("_row", "min")]))
+    if first.num_rows < table.num_rows:
+        table = table.take(first.column("_row_min").sort())
+    return table.select(columns) if columns is not None else table
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="콜드 히스토리 아카이브 조회")
+    parser.add_argument("table", choices=sorted(ARCHIVE_TABLES))
+    parser.add_argument("--route", type=int, action="append", help="route_id (복수 지정 가능)")
+    parser.add_argument("--month", action="append", help="YYYY-MM (복수 지정 가능)")
+    args = parser.parse_args()
+
+    result = scan_archive(args.table, route_ids=args.route, months=args.month)
+    print(f"{result.num_rows}건")
+    for row in result.slice(0, 20).to_pylist():
+        print(row)
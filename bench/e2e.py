@@ -0,0 +1,176 @@
+"""항공권 가격 트래커 - 종단간 벤치마크 (모의 네이버 서버 + 임시 DB)
+
+bench/mock_naver.py 서버를 같은 이벤트 루프에 띄우고 tracker.main을 그대로 실행한다.
+DB / export / archive / metrics는 임시 디렉토리, 배포는 none, Discord는 모의 서버로 보낸다.
+실제 Chromium이 필요하다 (`playwright install chromium`).
+
+보고: URL/분, 총 소요 시간, DB 기록 시간(db + snapshot 단계), export 시간 — scan_runs 계측 기준
+
+    python bench/e2e.py                                   # 기본: 지연 300±150ms, 오류 2%, 결과 없음 5%
+    python bench/e2e.py --settle-ms 1500 --error-rate 0.1 --budget 40
+    python bench/e2e.py --runs 2 --json                   # 같은 DB로 2회 (2회차는 변경 없는 페이지 생략 경로)
+    python bench/e2e.py --leg-mode                        # 편도 조합 모드 (LEG_MODE)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from mock_naver import MockNaverServer, add_mock_arguments, options_from_args
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+logger = logging.getLogger(__name__)
+
+SEARCH_PATH = ("/flights/international/{origin}-{destination}-{depart_date}/"
+               "{destination}-{origin}-{return_date}?adult=1&fareType=Y")
+ONEWAY_PATH = "/flights/international/{origin}-{destination}-{depart_date}?adult=1&fareType=Y"
+
+
+def configure(workdir: str, base_url: str, args):
+    """config 상수를 벤치마크용으로 바꾼다.
+
+    각 모듈이 `from config import ...`로 값을 복사하므로 tracker 등을 import하기 전에 호출해야 한다.
+    """
+    import config
+
+    if "tracker" in sys.modules:
+        raise RuntimeError("tracker가 이미 import됨 — configure()를 먼저 호출해야 함")
+
+    token_file = os.path.join(workdir, "openclaw.json")
+    with open(token_file, "w", encoding="utf-8") as f:
+        json.dump({"channels": {"discord": {"token": "bench"}}}, f)
+
+    config.DB_PATH = os.path.join(workdir, "flight_tracker.db")
+    config.ARCHIVE_DIR = os.path.join(workdir, "archive")
+    config.PAGE_ARCHIVE_DIR = os.path.join(workdir, "pages")
+    config.EXPORT_DIR = os.path.join(workdir, "data")
+    config.METRICS_DIR = os.path.join(workdir, "metrics")
+    config.PUBLISH_BACKEND = "none"
+    config.NAVER_FLIGHT_URL = base_url + SEARCH_PATH
+    config.NAVER_ONEWAY_URL = base_url + ONEWAY_PATH
+    config.DISCORD_API_BASE = base_url + "/discord"
+    config.DISCORD_TOKEN_FILE = token_file
+    config.PAGE_SETTLE_MS = args.settle_ms
+    config.REQUEST_DELAY_MIN = config.REQUEST_DELAY_MAX = args.delay
+    config.ALERT_COALESCE_SECONDS = 0
+    if args.budget is not None:
+        config.SCAN_REQUEST_BUDGET = args.budget
+    config.LEG_MODE = args.leg_mode
+
+
+async def last_run() -> dict:
+    """임시 DB의 마지막 scan_runs 행."""
+    from db import get_db
+
+    db = await get_db()
+    try:
+        cursor = await db.execute("SELECT * FROM scan_runs ORDER BY id DESC LIMIT 1")
+        row = dict(await cursor.fetchone())
+        cursor = await db.execute(
+            "SELECT COUNT(*) FROM scan_metrics WHERE run_id = ? AND outcome = 'unchanged'", (row["id"],)
+        )
+        row["unchanged"] = (await cursor.fetchone())[0]
+    finally:
+        await db.close()
+    row["stages"] = json.loads(row["stages"] or "{}")
+    row["plan"] = json.loads(row["plan"] or "{}")
+    return row
+
+
+def report(run: dict, wall: float, server_stats: dict) -> dict:
+    stages = run["stages"]
+    fetches = run["fetches"] or 0
+    return {
+        "wall_s": round(wall, 2),
+        "fetches": fetches,
+        "page_loads": run["page_loads"],
+        "retries": run["retries"],
+        "no_result": run["no_result"],
+        "unchanged": run["unchanged"],
+        "urls_per_min": round(fetches / wall * 60, 1) if wall else 0.0,
+        "db_write_s": round(stages.get("db", 0.0) + stages.get("snapshot", 0.0), 3),
+        "export_s": round(stages.get("export", 0.0), 3),
+        "export_wait_s": round(stages.get("export_wait", 0.0), 3),
+        "stages": stages,
+        "plan": run["plan"],
+        "server": dict(server_stats),
+    }
+
+
+async def run_benchmark(args) -> list[dict]:
+    workdir = tempfile.mkdtemp(prefix="flight-bench-")
+    server = MockNaverServer(options_from_args(args))
+    base_url = await server.start()
+    logger.info(f"모의 서버 {base_url}, 작업 디렉토리 {workdir}")
+    try:
+        configure(workdir, base_url, args)
+        import tracker
+
+        results = []
+        for n in range(1, args.runs + 1):
+            server.stats = dict.fromkeys(server.stats, 0)
+            start = time.perf_counter()
+            await tracker.main(special_only=args.special_only, headless=True)
+            wall = time.perf_counter() - start
+            result = report(await last_run(), wall, server.stats)
+            result["run"] = n
+            results.append(result)
+        return results
+    finally:
+        await server.close()
+        if args.keep:
+            logger.info(f"결과 보존: {workdir}")
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def print_result(r: dict):
+    print(
+        f"[run {r['run']}] {r['wall_s']:.1f}s — URL {r['fetches']}개 ({r['urls_per_min']:.1f}/분), "
+        f"페이지 로드 {r['page_loads']} (재시도 {r['retries']}, 결과 없음 {r['no_result']}, "
+        f"변경 없음 {r['unchanged']})"
+    )
+    print(f"  DB 기록 {r['db_write_s']:.2f}s / export {r['export_s']:.2f}s "
+          f"(종료 대기 {r['export_wait_s']:.2f}s)")
+    print("  단계: " + ", ".join(f"{k} {v:.2f}s" for k, v in r["stages"].items()))
+    print(f"  서버: {r['server']}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="모의 서버 기반 tracker.main 종단간 벤치마크")
+    add_mock_arguments(parser)
+    parser.add_argument("--settle-ms", type=int, default=1000,
+                        help="페이지 로드 후 대기 (PAGE_SETTLE_MS 대체, 기본 1000)")
+    parser.add_argument("--delay", type=float, default=0.0, help="요청 간 대기 (초, 기본 0)")
+    parser.add_argument("--budget", type=int, default=None, help="SCAN_REQUEST_BUDGET 대체")
+    parser.add_argument("--special-only", action="store_true", help="SPECIAL_ROUTES만 스캔")
+    parser.add_argument("--leg-mode", action="store_true", help="편도 조합 모드로 스캔 (LEG_MODE)")
+    parser.add_argument("--runs", type=int, default=1, help="같은 임시 DB로 반복 실행 횟수")
+    parser.add_argument("--keep", action="store_true", help="임시 디렉토리(DB, export) 보존")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    parser.add_argument("-v", "--verbose", action="store_true", help="tracker 로그 출력")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.WARNING,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    results = asyncio.run(run_benchmark(args))
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False))
+    else:
+        for r in results:
+            print_result(r)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
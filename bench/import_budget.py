@@ -0,0 +1,113 @@
+"""항공권 가격 트래커 - import 시간 예산 점검 (`python -X importtime` 기반)
+
+cron으로 매번 새 프로세스가 뜨므로 import 비용이 곧 시작 지연이다.
+모듈마다 새 인터프리터에서 `-X importtime`으로 누적 import 시간을 재고(중앙값),
+예산 초과 / import 시점에 무거운 모듈 로드 / Discord 토큰 파일 읽기를 실패로 본다.
+
+    python bench/import_budget.py              # 전체 점검, 실패 시 exit 1
+    python bench/import_budget.py tracker -n 9 # 특정 모듈, 반복 횟수 지정
+    python bench/import_budget.py --scale 2    # 느린 머신용 예산 배율
+"""
+
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 모듈별 누적 import 예산 (ms, 인터프리터 기동 시간 제외)
+IMPORT_BUDGET_MS = {
+    "config": 5,
+    "db": 100,
+    "tracker": 150,
+    "briefing": 160,
+}
+
+# import만으로는 로드되면 안 되는 모듈 (실제 사용 함수 안에서 lazy import)
+HEAVY_MODULES = ("playwright", "pyarrow", "aiohttp", "brotli", "numpy")
+
+TOKEN_FILE_NAME = "openclaw.json"
+
+# 자식 프로세스: audit hook으로 토큰 파일 open을 감시하고, import 후 로드된 무거운 모듈을 출력
+_PROBE = """
+import sys
+opened = []
+def _hook(event, args):
+    if event == "open" and isinstance(args[0], str) and args[0].endswith({token!r}):
+        opened.append(args[0])
+sys.addaudithook(_hook)
+import {module}
+heavy = sorted(m for m in {heavy!r} if m in sys.modules)
+print("HEAVY=" + ",".join(heavy))
+print("TOKEN=" + ",".join(opened))
+"""
+
+_IMPORTTIME_RE = re.compile(r"^import time:\s+\d+ \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module: str) -> tuple[float, list[str], list[str]]:
+    """새 인터프리터에서 module을 import한다. (누적 ms, 로드된 무거운 모듈, 열린 토큰 파일)."""
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES, token=TOKEN_FILE_NAME)
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{result.stderr[-2000:]}")
+
+    cumulative_us = None
+    for line in result.stderr.splitlines():
+        m = _IMPORTTIME_RE.match(line)
+        # 들여쓰기 없는 줄 = 최상위 import
+        if m and m.group(3) == module and len(m.group(2)) == 1:
+            cumulative_us = int(m.group(1))
+    if cumulative_us is None:
+        raise RuntimeError(f"{module}: importtime 출력에서 모듈을 찾지 못함")
+
+    out = dict(line.split("=", 1) for line in result.stdout.splitlines() if "=" in line)
+    heavy = [m for m in out.get("HEAVY", "").split(",") if m]
+    token = [p for p in out.get("TOKEN", "").split(",") if p]
+    return cumulative_us / 1000, heavy, token
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="import 시간 예산 점검")
+    parser.add_argument("modules", nargs="*", help=f"점검할 모듈 (기본: {', '.join(IMPORT_BUDGET_MS)})")
+    parser.add_argument("-n", "--repeat", type=int, default=5, help="모듈별 반복 횟수 (중앙값 사용)")
+    parser.add_argument("--scale", type=float, default=1.0, help="예산 배율 (느린 머신)")
+    args = parser.parse_args()
+
+    failures = 0
+    for module in args.modules or list(IMPORT_BUDGET_MS):
+        budget = IMPORT_BUDGET_MS.get(module)
+        samples = []
+        heavy, token = [], []
+        for _ in range(args.repeat):
+            ms, heavy, token = measure(module)
+            samples.append(ms)
+        median = statistics.median(samples)
+
+        # 예산이 없는 모듈(archive, alerts 등 무거운 의존성이 본업인 모듈)은 측정값만 출력
+        problems = []
+        if budget is not None:
+            if median > budget * args.scale:
+                problems.append(f"예산 초과 ({budget * args.scale:.0f}ms)")
+            if heavy:
+                problems.append(f"무거운 모듈 로드: {', '.join(heavy)}")
+            if token:
+                problems.append("import 시 Discord 토큰 파일 읽음")
+
+        budget_str = f"{budget * args.scale:.0f}ms" if budget is not None else "-"
+        status = "FAIL" if problems else "ok"
+        print(f"{module:<10} {median:7.1f}ms (min {min(samples):.1f}) / {budget_str:<6} {status}"
+              + (f"  — {'; '.join(problems)}" if problems else ""))
+        failures += bool(problems)
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
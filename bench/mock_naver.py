@@ -0,0 +1,322 @@
+"""항공권 가격 트래커 - 모의 네이버 항공권 서버 (벤치마크 / 로컬 재현용)
+
+실제 검색 페이지처럼 빈 <main> 껍데기를 먼저 주고, 페이지 스크립트가 운임 XHR(/api/fares)을 받아
+main에 결과를 그린다. naverfetch.fetch_page_text → parse_naver_flights가 그대로 동작하는 텍스트 형식.
+
+- 운임: FIXTURE_DIR/{출발}-{도착}.txt (녹화한 main innerText)가 있으면 그대로, 없으면 URL 기준으로
+  결정적인(seed 고정) 가상 항공편 생성 — 같은 URL은 같은 seed에서 항상 같은 결과
+- 편도 검색(/flights/international/ICN-FUK-20260501, 편도 조합 모드)은 항상 가상 편도 목록 (녹화 페이지는 왕복 전용)
+- 응답 지연(latency ± jitter), 오류율(HTTP 500 — 페이지 또는 XHR), '검색 결과 없음' 비율 설정 가능
+- Discord API 흉내 (POST /discord/channels/{id}/messages) — 벤치마크 중 알림 전송을 받아 세기만 함
+
+    python bench/mock_naver.py --port 8765 --latency-ms 300 --error-rate 0.05
+    python bench/mock_naver.py record                # 실제 페이지를 FIXTURE_DIR에 녹화 (Playwright)
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+from dataclasses import dataclass
+
+from aiohttp import web
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURE_DIR = os.path.join(REPO_DIR, "bench", "fixtures")
+
+logger = logging.getLogger(__name__)
+
+AIRLINES = ["대한항공", "아시아나항공", "진에어", "제주항공", "티웨이항공", "에어부산", "에어서울", "이스타항공"]
+
+NO_RESULT_TEXT = (
+    "항공권 검색 결과\n검색 결과가 없습니다.\n"
+    "선택하신 날짜에 예약 가능한 항공편이 없습니다. 출발일 또는 도착지를 변경해 다시 검색해 주세요.\n"
+    "가까운 날짜의 항공권을 확인해 보세요."
+)
+
+# 페이지 껍데기: 운임 XHR 응답의 lines를 main에 한 줄씩 그린다 (innerText 줄바꿈 = div 경계)
+PAGE_HTML = """<!doctype html>
+<html lang="ko"><head><meta charset="utf-8"><title>네이버 항공권</title></head>
+<body><main>항공권을 검색하고 있습니다</main>
+<script>
+fetch("/api/fares" + location.search + "&path=" + encodeURIComponent(location.pathname))
+  .then(r => r.ok ? r.json() : {lines: ["일시적인 오류입니다"]})
+  .catch(() => ({lines: ["일시적인 오류입니다"]}))
+  .then(data => {
+    const main = document.querySelector("main");
+    main.replaceChildren(...data.lines.map(line => {
+      const div = document.createElement("div");
+      div.textContent = line;
+      return div;
+    }));
+  });
+</script></body></html>
+"""
+
+
+@dataclass
+class MockOptions:
+    latency_ms: float = 300        # 페이지 / XHR 응답 지연 평균
+    jitter_ms: float = 150         # ± 균등 분포
+    error_rate: float = 0.02       # HTTP 500 비율 (페이지, XHR 각각)
+    no_result_rate: float = 0.05   # '검색 결과 없음' 비율 (URL 기준 결정적)
+    seed: int = 0                  # 가격 생성 seed — 바꾸면 다른 가격대 (최저가 갱신 재현)
+    fixture_dir: str | None = FIXTURE_DIR
+
+
+def parse_search_path(path: str) -> tuple[str, str, str, str | None] | None:
+    """/flights/international/ICN-FUK-20260501/FUK-ICN-20260503 → (ICN, FUK, 20260501, 20260503).
+
+    편도(/flights/international/ICN-FUK-20260501)는 귀국일 None.
+    'ICN:airport' 같은 네이버 코드는 항공편 줄에 찍히는 IATA 코드(ICN)로 줄인다.
+    """
+    parts = path.strip("/").split("/")
+    if len(parts) not in (3, 4) or parts[:2] != ["flights", "international"]:
+        return None
+    try:
+        out_o, out_d, dep = parts[2].rsplit("-", 2)
+        ret = parts[3].rsplit("-", 2)[2] if len(parts) == 4 else None
+    except (ValueError, IndexError):
+        return None
+    return out_o.split(":")[0], out_d.split(":")[0], dep, ret
+
+
+def synthesize_lines(origin: str, destination: str, depart_date: str, return_date: str,
+                     adults: int = 1, seed: int = 0) -> list[str]:
+    """parse_naver_flights 형식의 가상 왕복 직항 목록 (항공사 / 가는 편 / 오는 편 / 왕복 가격)."""
+    rng = random.Random(f"{seed}:{origin}-{destination}-{depart_date}-{return_date}")
+    base = rng.randint(18, 60) * 10000
+    lines = [f"{origin} - {destination} 왕복 항공권", f"성인 {adults}명 · 일반석", "추천순"]
+    for _ in range(rng.randint(6, 16)):
+        airline = rng.choice(AIRLINES)
+        duration = rng.randint(80, 420)
+        out_h = rng.randint(6, 22)
+        ret_h = rng.randint(6, 22)
+        out_m, ret_m = rng.choice((0, 15, 30, 45)), rng.choice((0, 15, 30, 45))
+        out_arr = out_h * 60 + out_m + duration
+        ret_arr = ret_h * 60 + ret_m + duration
+        price = base + rng.randint(0, 40) * 5000 + (60000 if airline == "대한항공" else 0)
+        # 3인 검색은 좌석이 모자라 일부 편이 빠지거나 1인당 가격이 오른다
+        if adults > 1:
+            if rng.random() < 0.3:
+                continue
+            price += rng.choice((0, 0, 10000, 30000))
+        lines += [
+            airline,
+            f"{out_h:02d}:{out_m:02d}{origin}",
+            f"{out_arr // 60 % 24:02d}:{out_arr % 60:02d}{destination}",
+            f"직항, {duration // 60:02d}시간 {duration % 60:02d}분",
+            airline,
+            f"{ret_h:02d}:{ret_m:02d}{destination}",
+            f"{ret_arr // 60 % 24:02d}:{ret_arr % 60:02d}{origin}",
+            f"직항, {duration // 60:02d}시간 {duration % 60:02d}분",
+            f"왕복 {price:,}원",
+            "알림받기",
+        ]
+    return lines
+
+
+def synthesize_leg_lines(origin: str, destination: str, depart_date: str,
+                         adults: int = 1, seed: int = 0) -> list[str]:
+    """parse_naver_legs 형식의 가상 편도 직항 목록 (항공사 / 편 / 편도 가격 — 왕복 가격대의 절반 수준)."""
+    rng = random.Random(f"{seed}:{origin}-{destination}-{depart_date}")
+    base = rng.randint(9, 30) * 10000
+    lines = [f"{origin} - {destination} 편도 항공권", f"성인 {adults}명 · 일반석", "추천순"]
+    for _ in range(rng.randint(6, 16)):
+        airline = rng.choice(AIRLINES)
+        duration = rng.randint(80, 420)
+        h, m = rng.randint(6, 22), rng.choice((0, 15, 30, 45))
+        arr = h * 60 + m + duration
+        price = base + rng.randint(0, 20) * 5000 + (30000 if airline == "대한항공" else 0)
+        lines += [
+            airline,
+            f"{h:02d}:{m:02d}{origin}",
+            f"{arr // 60 % 24:02d}:{arr % 60:02d}{destination}",
+            f"직항, {duration // 60:02d}시간 {duration % 60:02d}분",
+            f"편도 {price:,}원",
+            "알림받기",
+        ]
+    return lines
+
+
+class MockNaverServer:
+    """aiohttp 기반 모의 서버. 같은 이벤트 루프에서 tracker.main과 함께 돌릴 수 있다.
+
+    사용:
+        server = MockNaverServer(MockOptions(latency_ms=200))
+        base_url = await server.start()          # http://127.0.0.1:{임의 포트}
+        ...
+        await server.close()
+    """
+
+    def __init__(self, options: MockOptions | None = None):
+        self.options = options or MockOptions()
+        self.stats = {"pages": 0, "fares": 0, "errors": 0, "no_result": 0, "discord": 0}
+        self._rng = random.Random(self.options.seed)
+        self._fixtures: dict[tuple[str, str], list[str]] = {}
+        self._runner: web.AppRunner | None = None
+        self._load_fixtures()
+
+        self.app = web.Application()
+        self.app.router.add_get("/flights/international/{tail:.*}", self._page)
+        self.app.router.add_get("/api/fares", self._fares)
+        self.app.router.add_post("/discord/channels/{channel}/messages", self._discord)
+
+    def _load_fixtures(self):
+        fixture_dir = self.options.fixture_dir
+        if not fixture_dir or not os.path.isdir(fixture_dir):
+            return
+        for name in sorted(os.listdir(fixture_dir)):
+            stem, ext = os.path.splitext(name)
+            if ext != ".txt" or stem.count("-") != 1:
+                continue
+            with open(os.path.join(fixture_dir, name), encoding="utf-8") as f:
+                self._fixtures[tuple(stem.split("-"))] = f.read().splitlines()
+        if self._fixtures:
+            logger.info(f"녹화 페이지 {len(self._fixtures)}개 로드 ({fixture_dir})")
+
+    async def _delay(self):
+        o = self.options
+        ms = o.latency_ms + self._rng.uniform(-o.jitter_ms, o.jitter_ms)
+        if ms > 0:
+            await asyncio.sleep(ms / 1000)
+
+    def _fail(self) -> bool:
+        if self._rng.random() < self.options.error_rate:
+            self.stats["errors"] += 1
+            return True
+        return False
+
+    async def _page(self, request: web.Request) -> web.Response:
+        await self._delay()
+        self.stats["pages"] += 1
+        if self._fail():
+            return web.Response(status=500, text="<html><body><main>오류</main></body></html>",
+                                content_type="text/html")
+        return web.Response(text=PAGE_HTML, content_type="text/html")
+
+    async def _fares(self, request: web.Request) -> web.Response:
+        await self._delay()
+        self.stats["fares"] += 1
+        if self._fail():
+            return web.json_response({"error": "internal"}, status=500)
+
+        parsed = parse_search_path(request.query.get("path", ""))
+        if parsed is None:
+            return web.json_response({"error": "bad path"}, status=400)
+        origin, destination, dep, ret = parsed
+        adults = int(request.query.get("adult", "1"))
+
+        # 결과 없음은 URL 기준으로 결정 — 재시도해도 같은 응답 (실제 매진/미운항 구간처럼)
+        key = f"{self.options.seed}:{origin}-{destination}-{dep}-{ret}-{adults}"
+        if random.Random(key).random() < self.options.no_result_rate:
+            self.stats["no_result"] += 1
+            lines = NO_RESULT_TEXT.splitlines()
+        elif ret is None:
+            lines = synthesize_leg_lines(origin, destination, dep, adults, self.options.seed)
+        elif (origin, destination) in self._fixtures:
+            lines = self._fixtures[(origin, destination)]
+        else:
+            lines = synthesize_lines(origin, destination, dep, ret, adults, self.options.seed)
+        return web.json_response({"lines": lines})
+
+    async def _discord(self, request: web.Request) -> web.Response:
+        await request.read()
+        self.stats["discord"] += 1
+        return web.json_response({"id": str(self.stats["discord"])})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """서버를 띄우고 base URL을 반환한다 (port=0이면 빈 포트)."""
+        self._runner = web.AppRunner(self.app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        bound = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound}"
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def record_fixtures(fixture_dir: str = FIXTURE_DIR):
+    """실제 네이버 검색 페이지 main innerText를 구간별로 녹화한다 (다음 금-일 1회씩)."""
+    sys.path.insert(0, REPO_DIR)
+    from datetime import datetime
+
+    from playwright.async_api import async_playwright
+
+    from config import ALL_ROUTES, TRIP_PATTERNS
+    from planner import pattern_dates
+    from naverfetch import KST, build_url, fetch_page_text
+
+    os.makedirs(fixture_dir, exist_ok=True)
+    dep, ret = pattern_dates(TRIP_PATTERNS[0], datetime.now(KST).date(), weeks=2)[-1]
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True, args=["--no-sandbox"])
+        page = await browser.new_page(locale="ko-KR")
+        for route in ALL_ROUTES:
+            url = build_url(route["origin"], route["destination"], dep, ret,
+                            naver_origin=route.get("naver_origin"), naver_dest=route.get("naver_dest"))
+            text = await fetch_page_text(page, url)
+            if text is None:
+                logger.warning(f"녹화 실패: {url}")
+                continue
+            path = os.path.join(fixture_dir, f"{route['origin']}-{route['destination']}.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            logger.info(f"녹화: {path} ({len(text)}자)")
+        await browser.close()
+
+
+def add_mock_arguments(parser: argparse.ArgumentParser):
+    """모의 서버 옵션 (bench/e2e.py와 공유)."""
+    d = MockOptions()
+    parser.add_argument("--latency-ms", type=float, default=d.latency_ms, help="응답 지연 평균 (ms)")
+    parser.add_argument("--jitter-ms", type=float, default=d.jitter_ms, help="응답 지연 ± 범위 (ms)")
+    parser.add_argument("--error-rate", type=float, default=d.error_rate, help="HTTP 500 비율 (0~1)")
+    parser.add_argument("--no-result-rate", type=float, default=d.no_result_rate,
+                        help="'검색 결과 없음' 비율 (0~1)")
+    parser.add_argument("--seed", type=int, default=d.seed, help="가격 생성 seed")
+    parser.add_argument("--fixtures", default=d.fixture_dir, help="녹화 페이지 디렉토리 ('' = 사용 안 함)")
+
+
+def options_from_args(args) -> MockOptions:
+    return MockOptions(args.latency_ms, args.jitter_ms, args.error_rate, args.no_result_rate,
+                       args.seed, args.fixtures or None)
+
+
+async def serve(options: MockOptions, host: str, port: int):
+    server = MockNaverServer(options)
+    base_url = await server.start(host, port)
+    logger.info(f"모의 네이버 서버: {base_url}/flights/international/ICN-FUK-20260501/FUK-ICN-20260503?adult=1")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        logger.info(f"요청 통계: {json.dumps(server.stats, ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="모의 네이버 항공권 서버")
+    parser.add_argument("command", nargs="?", choices=["serve", "record"], default="serve")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_mock_arguments(parser)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        asyncio.run(record_fixtures(args.fixtures or FIXTURE_DIR))
+    else:
+        try:
+            asyncio.run(serve(options_from_args(args), args.host, args.port))
+        except KeyboardInterrupt:
+            pass
@@ -1,143 +1,31 @@
 """항공권 가격 트래커 - 브리핑 발송 (가격 재검증 포함)"""
 
+import argparse
 import asyncio
 import logging
-import urllib.request
-import urllib.error
-import json
-import ssl
-import subprocess as _sp
-from datetime import datetime
+from datetime import datetime, timedelta
 from collections import defaultdict
 
 import pytz
-from playwright.async_api import async_playwright
 
-from config import ALL_ROUTES as ROUTES, DISCORD_CHANNEL_ID, BRIEFING_HOURS_KST, DEPART_TIME_FROM, RETURN_TIME_FROM
+from config import (
+    ALL_ROUTES as ROUTES, DISCORD_CHANNEL_ID, BRIEFING_HOURS_KST, DEPART_TIME_FROM, RETURN_TIME_FROM,
+    BRIEFING_VERIFY_PAGES, BRIEFING_VERIFY_DEADLINE, BRIEFING_VERIFY_TOTAL_DEADLINE,
+    BRIEFING_REUSE_MAX_AGE_MIN, BRIEFING_VOLATILE_CHANGES, BRIEFING_VOLATILE_MAX_AGE_MIN,
+    PROFILE_DIR,
+)
 from db import init_db, get_db, get_all_weekly_lowest, update_weekly_lowest
-from tracker import scrape_flights, parse_naver_flights
-
-# Discord 봇 토큰
-
-def load_discord_bot_token() -> str:
-    """openclaw config get은 민감값을 redacted 할 수 있어 설정 파일에서 직접 읽는다."""
-    try:
-        with open("/Users/yeon/.openclaw/openclaw.json", "r", encoding="utf-8") as f:
-            cfg = json.load(f)
-        token = cfg["channels"]["discord"]["token"].strip()
-        if not token:
-            raise ValueError("Discord token is empty")
-        return token
-    except Exception as e:
-        raise RuntimeError(f"Discord token 로드 실패: {e}")
-
+from metrics import stage_boundary
+from naverfetch import scrape_flights
+from trend import HINT_LABELS, trend_hint
 
-DISCORD_BOT_TOKEN = load_discord_bot_token()
-
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+# Playwright / aiohttp와 Discord 토큰은 main()에서 불러온다 (import 시점에는 상수만)
 logger = logging.getLogger(__name__)
 
 KST = pytz.timezone("Asia/Seoul")
 WEEKDAYS_KR = ["월", "화", "수", "목", "금", "토", "일"]
 
 
-# ── Discord 전송 ──────────────────────────────────────────
-
-DISCORD_MAX_CONTENT = 2000
-DISCORD_SAFE_CONTENT = 1800
-
-
-def split_discord_message(message: str, max_len: int = DISCORD_SAFE_CONTENT) -> list[str]:
-    """Discord 본문 길이 제한(2000자) 이하로 안전하게 분할한다."""
-    if len(message) <= max_len:
-        return [message]
-
-    chunks = []
-    current = []
-    current_len = 0
-
-    for line in message.split("\n"):
-        # +1은 줄바꿈 문자
-        line_len = len(line) + 1
-
-        # 단일 라인이 너무 긴 경우 강제 분할
-        if line_len > max_len:
-            if current:
-                chunks.append("\n".join(current).rstrip())
-                current = []
-                current_len = 0
-
-            raw = line
-            while len(raw) > max_len:
-                chunks.append(raw[:max_len])
-                raw = raw[max_len:]
-
-            if raw:
-                current = [raw]
-                current_len = len(raw) + 1
-            continue
-
-        if current_len + line_len > max_len and current:
-            chunks.append("\n".join(current).rstrip())
-            current = [line]
-            current_len = line_len
-        else:
-            current.append(line)
-            current_len += line_len
-
-    if current:
-        chunks.append("\n".join(current).rstrip())
-
-    return chunks
-
-
-def send_discord(message: str) -> bool:
-    url = f"https://discord.com/api/v10/channels/{DISCORD_CHANNEL_ID}/messages"
-
-    ssl_ctx = ssl.create_default_context()
-    ssl_ctx.check_hostname = False
-    ssl_ctx.verify_mode = ssl.CERT_NONE
-
-    chunks = split_discord_message(message)
-    logger.info(f"Discord 전송 분할: {len(chunks)}개 메시지")
-
-    for idx, chunk in enumerate(chunks, start=1):
-        if len(chunk) > DISCORD_MAX_CONTENT:
-            logger.error(f"Discord 전송 실패: chunk 길이 초과 ({len(chunk)})")
-            return False
-
-        payload = json.dumps({"content": chunk}).encode("utf-8")
-        req = urllib.request.Request(
-            url,
-            data=payload,
-            headers={
-                "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
-                "Content-Type": "application/json",
-                "User-Agent": "mc-mini-flight-tracker/1.0",
-            },
-            method="POST",
-        )
-
-        try:
-            with urllib.request.urlopen(req, timeout=30, context=ssl_ctx) as resp:
-                if resp.status in (200, 201):
-                    logger.info(f"Discord 브리핑 전송 완료 ({idx}/{len(chunks)})")
-                else:
-                    logger.error(f"Discord 전송 실패 ({idx}/{len(chunks)}): HTTP {resp.status}")
-                    return False
-        except urllib.error.HTTPError as e:
-            logger.error(f"Discord 전송 실패 ({idx}/{len(chunks)}): HTTP {e.code} {e.read().decode()}")
-            return False
-        except Exception as e:
-            logger.error(f"Discord 전송 실패 ({idx}/{len(chunks)}): {e}")
-            return False
-
-    return True
-
-
 # ── 포맷 헬퍼 ────────────────────────────────────────────
 
 def get_next_briefing_hour(now_hour: int) -> str:
@@ -199,7 +87,7 @@ async def verify_route_best(page, route: dict, route_rows: list, route_id: int,
     logger.info(f"[검증] {origin}→{destination} {depart_date} 재확인 중...")
     result = await scrape_flights(page, url, origin, destination, DEPART_TIME_FROM, RETURN_TIME_FROM)
 
-    now_str = datetime.now(KST).strftime("%Y-%m-%dT%H:%M:%S")
+    now_str = datetime.now(KST).isoformat()   # 트래커와 같은 시간대 포함 ISO 형식
 
     if result is None:
         # 결과 없음 → 일시적 오류일 수 있으므로 DB 건드리지 않음
@@ -252,6 +140,135 @@ async def verify_route_best(page, route: dict, route_rows: list, route_id: int,
         return best, None
 
 
+def _parse_kst(iso_str: str) -> datetime:
+    """ISO 시각 문자열 → 시간대 포함 datetime. 시간대 없는 값(이전 브리핑이 기록한 행)은 KST로 본다."""
+    dt = datetime.fromisoformat(iso_str)
+    return KST.localize(dt) if dt.tzinfo is None else dt
+
+
+async def needs_verification(db, route_id: int, best) -> tuple[bool, str]:
+    """최저가 주를 실시간 재검증해야 하는지 판단한다.
+
+    트래커가 최근에 같은 가격을 확인했고(scan_history / checked_at), 해당 출발일 가격이 최근
+    자주 바뀌지 않았으면(weekly_price_history) DB 값을 그대로 쓴다.
+
+    Returns:
+        (재검증 필요 여부, 판단 사유)
+    """
+    cursor = await db.execute(
+        "SELECT price, scanned_at FROM scan_history "
+        "WHERE route_id = ? AND depart_date = ? AND return_date = ? "
+        "ORDER BY scanned_at DESC LIMIT 1",
+        (route_id, best["depart_date"], best["return_date"]),
+    )
+    last_scan = await cursor.fetchone()
+
+    # 마지막 확인 시각: 트래커 스캔 / weekly_lowest 갱신 / 변경 없는 페이지 확인(checked_at) 중 최신
+    seen_at = [t for t in (best["updated_at"], best["checked_at"]) if t]
+    if last_scan is not None:
+        if last_scan["price"] != best["min_price"]:
+            return True, f"최근 스캔 가격 불일치 ({last_scan['price']:,} ≠ {best['min_price']:,})"
+        seen_at.append(last_scan["scanned_at"])
+    if not seen_at:
+        return True, "확인 시각 없음"
+
+    now = datetime.now(KST)
+    age_min = (now - max(_parse_kst(t) for t in seen_at)).total_seconds() / 60
+    if age_min > BRIEFING_REUSE_MAX_AGE_MIN:
+        return True, f"{age_min:.0f}분 경과 (> {BRIEFING_REUSE_MAX_AGE_MIN}분)"
+
+    # 변동성: 최근 24시간 가격 변경 횟수
+    since = (now - timedelta(hours=24)).isoformat()
+    cursor = await db.execute(
+        "SELECT min_price FROM weekly_price_history "
+        "WHERE route_id = ? AND depart_date = ? AND snapshot_at >= ? ORDER BY snapshot_at",
+        (route_id, best["depart_date"], since),
+    )
+    prices = [row["min_price"] for row in await cursor.fetchall()]
+    changes = sum(1 for a, b in zip(prices, prices[1:]) if a != b)
+    if changes >= BRIEFING_VOLATILE_CHANGES and age_min > BRIEFING_VOLATILE_MAX_AGE_MIN:
+        return True, (f"변동 잦음 (24h {changes}회) + {age_min:.0f}분 경과 "
+                      f"(> {BRIEFING_VOLATILE_MAX_AGE_MIN}분)")
+
+    return False, f"{age_min:.0f}분 전 확인, 24h 변동 {changes}회"
+
+
+async def verify_all_routes(context, route_data: dict, db, verify_ids: set[int]) -> list[dict]:
+    """verify_ids 구간을 페이지 풀(BRIEFING_VERIFY_PAGES개)로 병렬 재검증한다.
+
+    구간마다 페이지를 받은 시점부터 BRIEFING_VERIFY_DEADLINE초 기한 (앞 구간이 느려도 뒤 구간의 기한을
+    먹지 않음), 전체는 BRIEFING_VERIFY_TOTAL_DEADLINE초 상한. 기한 초과 / 상한까지 시작 못 함 / 실패한 구간은
+    DB 최저가 + 경고로 대체한다 → 브리핑 발송 시각이 가장 느린 스크래핑에 묶이지 않음.
+    verify_ids에 없는 구간은 DB 최저가를 그대로 쓴다 (context는 None이어도 됨).
+
+    Returns:
+        [{"route": dict, "best": row_or_None, "warning": str_or_None}, ...] (ROUTES 순서)
+    """
+    routes = list(enumerate(ROUTES, start=1))
+    pending_routes = [
+        (rid, route) for rid, route in routes
+        if route_data.get(rid) and rid in verify_ids
+    ]
+
+    pages: asyncio.Queue = asyncio.Queue()
+    if pending_routes:
+        for _ in range(min(BRIEFING_VERIFY_PAGES, len(pending_routes))):
+            pages.put_nowait(await context.new_page())
+
+    started: set[int] = set()
+
+    async def verify_one(route_id: int, route: dict):
+        page = await pages.get()
+        started.add(route_id)
+        try:
+            return await asyncio.wait_for(
+                verify_route_best(page, route, route_data[route_id], route_id, db),
+                BRIEFING_VERIFY_DEADLINE,
+            )
+        finally:
+            pages.put_nowait(page)
+
+    tasks = {
+        rid: asyncio.create_task(verify_one(rid, route))
+        for rid, route in pending_routes
+    }
+    if tasks:
+        _, unfinished = await asyncio.wait(tasks.values(), timeout=BRIEFING_VERIFY_TOTAL_DEADLINE)
+        for task in unfinished:
+            task.cancel()
+        await asyncio.gather(*unfinished, return_exceptions=True)
+
+    verified_data = []
+    for rid, route in routes:
+        task = tasks.get(rid)
+        if task is None:
+            # DB에 데이터 없음 → None / 재검증 생략 → DB 최저가
+            rows = route_data.get(rid)
+            best = min(rows, key=lambda r: r["min_price"]) if rows else None
+            verified_data.append({"route": route, "best": best, "warning": None})
+            continue
+
+        if not task.cancelled() and task.exception() is None:
+            best, warning = task.result()
+        else:
+            label = f"{route['origin']}→{route['destination']}"
+            best = min(route_data[rid], key=lambda r: r["min_price"])
+            if rid not in started:
+                logger.warning(f"[검증] {label} 전체 상한({BRIEFING_VERIFY_TOTAL_DEADLINE}s)까지 시작 못 함 — DB 기준 사용")
+                warning = "⏱️ 실시간 확인 대기 시간 초과 — DB 기준 가격 표시"
+            elif task.cancelled() or isinstance(task.exception(), asyncio.TimeoutError):
+                limit = (f"전체 상한({BRIEFING_VERIFY_TOTAL_DEADLINE}s)" if task.cancelled()
+                         else f"기한({BRIEFING_VERIFY_DEADLINE}s)")
+                logger.warning(f"[검증] {label} {limit} 초과 — DB 기준 사용")
+                warning = "⏱️ 실시간 확인 시간 초과 — DB 기준 가격 표시"
+            else:
+                logger.error(f"[검증] {label} 검증 오류 — DB 기준 사용: {task.exception()}")
+                warning = "⚠️ 실시간 확인 불가 — DB 기준 가격 표시"
+        verified_data.append({"route": route, "best": best, "warning": warning})
+
+    return verified_data
+
+
 # ── 브리핑 메시지 생성 ────────────────────────────────────
 
 def build_briefing_message(verified_data: list) -> str:
@@ -308,6 +325,9 @@ def build_briefing_message(verified_data: list) -> str:
         lines.append(f"   ↗ 가는편: {out_leg}")
         lines.append(f"   ↙ 오는편: {ret_leg}")
         lines.append(f"   💰 왕복 {min_price:,}원")
+        hint = trend_hint(best, now.date())
+        if hint:
+            lines.append(f"   {HINT_LABELS[hint]} (주당 {best['trend_slope'] * 7:+,.0f}원)")
         lines.append(f"   🔗 {search_url}")
         lines.append("")
 
@@ -331,7 +351,10 @@ def build_briefing_message(verified_data: list) -> str:
 # ── 메인 ─────────────────────────────────────────────────
 
 async def main():
+    from discord_client import DiscordClient, load_discord_bot_token
+
     logger.info("브리핑 발송 시작 (가격 재검증 포함)")
+    token = load_discord_bot_token()  # 토큰 문제는 브라우저 재검증 전에 드러나도록 먼저 로드
 
     await init_db()
     db = await get_db()
@@ -344,38 +367,61 @@ async def main():
         for row in rows:
             route_data[row["route_id"]].append(row)
 
-        verified_data = []
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=False,
-                args=["--no-sandbox", "--disable-blink-features=AutomationControlled"]
-            )
-            context = await browser.new_context(
-                user_agent=(
-                    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                    "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
-                ),
-                viewport={"width": 1280, "height": 800},
-                locale="ko-KR",
-            )
-            await context.add_init_script(
-                "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-            )
-            page = await context.new_page()
-
-            for route_id, route in enumerate(ROUTES, start=1):
-                route_rows = route_data.get(route_id, [])
-                best, warning = await verify_route_best(page, route, route_rows, route_id, db)
-                verified_data.append({"route": route, "best": best, "warning": warning})
-
-            await browser.close()
+        # 트래커 결과가 충분히 최신인 구간은 재검증 생략
+        verify_ids = set()
+        for route_id, route in enumerate(ROUTES, start=1):
+            route_rows = route_data.get(route_id)
+            if not route_rows:
+                continue
+            best = min(route_rows, key=lambda r: r["min_price"])
+            label = f"{route['origin']}→{route['destination']} {best['depart_date']}"
+            try:
+                needed, reason = await needs_verification(db, route_id, best)
+            except Exception as e:
+                # 판단 실패가 브리핑 전체를 막지 않도록 — 재검증 쪽으로
+                logger.error(f"[검증 판단] {label} 판단 오류: {e}")
+                needed, reason = True, "판단 오류"
+            if needed:
+                verify_ids.add(route_id)
+                logger.info(f"[검증 판단] {label} 재검증 — {reason}")
+            else:
+                logger.info(f"[검증 판단] {label} 생략 — {reason}")
+        stage_boundary("decide")
+
+        if verify_ids:
+            from playwright.async_api import async_playwright
+
+            async with async_playwright() as p:
+                browser = await p.chromium.launch(
+                    headless=False,
+                    args=["--no-sandbox", "--disable-blink-features=AutomationControlled"]
+                )
+                context = await browser.new_context(
+                    user_agent=(
+                        "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+                        "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/131.0.0.0 Safari/537.36"
+                    ),
+                    viewport={"width": 1280, "height": 800},
+                    locale="ko-KR",
+                )
+                await context.add_init_script(
+                    "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+                )
+                verified_data = await verify_all_routes(context, route_data, db, verify_ids)
+
+                await browser.close()
+        else:
+            logger.info("전 구간 최신 — 브라우저 실행 생략")
+            verified_data = await verify_all_routes(None, route_data, db, verify_ids)
+        stage_boundary("verify")
 
         message = build_briefing_message(verified_data)
         logger.info(f"브리핑 메시지 길이: {len(message)}")
-        ok = send_discord(message)
+        async with DiscordClient(token, DISCORD_CHANNEL_ID) as discord:
+            ok = await discord.send(message)
         if not ok:
             logger.error("브리핑 전송 중 오류 발생")
+        stage_boundary("send")
 
     finally:
         await db.close()
@@ -384,4 +430,21 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="항공권 가격 브리핑 발송")
+    parser.add_argument(
+        "--profile", nargs="?", const=PROFILE_DIR, default=None, metavar="DIR",
+        help=f"CPU 프로파일 / 단계별 tracemalloc / 브라우저 RSS를 DIR에 기록 (기본: {PROFILE_DIR})"
+    )
+    args = parser.parse_args()
+
+    if args.profile:
+        from profiling import RunProfiler
+
+        with RunProfiler("briefing", args.profile):
+            asyncio.run(main())
+    else:
+        asyncio.run(main())
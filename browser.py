@@ -0,0 +1,242 @@
+"""항공권 가격 트래커 - 브라우저 세션 관리 (메모리 감시 + 페이지 / 컨텍스트 / 브라우저 재생성)
+
+긴 실행에서 한 페이지로 무거운 SPA를 수십 번 로드하면 렌더러 메모리가 계속 늘다가 크래시한다
+(BrowserCrashError). BrowserSession은 fetch마다 브라우저 프로세스 RSS를 재고 선제적으로 갈아 끼운다.
+
+- 페이지 교체: fetcher의 로드가 BROWSER_PAGE_MAX_NAVIGATIONS회 이상이거나 가장 큰 브라우저 프로세스(렌더러)가
+  BROWSER_RENDERER_MAX_MB 이상 → 그 fetcher의 페이지를 닫고 새로 연다
+- 컨텍스트 교체: 브라우저 전체 RSS가 BROWSER_MAX_MB 이상 → 모든 fetcher가 쉬는 시점에 컨텍스트를 새로 만든다
+- 브라우저 재시작: 구간 경계(pipeline이 provider.boundary() 호출)에서 실행 후 로드가 BROWSER_RESTART_NAVIGATIONS회
+  이상이거나 RSS가 BROWSER_RESTART_MB 이상이면, 또는 크래시 직후 다음 fetch 전에 재시작
+- 종료 시 교체 횟수와 최대 RSS를 로그로 남긴다
+
+RSS는 profiling.sample_browser_rss (ps) — 자식 프로세스 중 Chromium 프로세스만 합산.
+"""
+
+import asyncio
+import logging
+import os
+
+from config import (
+    BROWSER_PAGE_MAX_NAVIGATIONS, BROWSER_RENDERER_MAX_MB, BROWSER_MAX_MB,
+    BROWSER_RESTART_NAVIGATIONS, BROWSER_RESTART_MB, FARE_PROVIDERS,
+)
+from profiling import sample_browser_rss
+from providers import FareProvider, HedgedFetcher, PROVIDERS
+from naverfetch import BrowserCrashError
+
+logger = logging.getLogger(__name__)
+
+LAUNCH_ARGS = ["--no-sandbox", "--disable-blink-features=AutomationControlled"]
+USER_AGENT = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
+    "AppleWebKit/537.36 (KHTML, like Gecko) "
+    "Chrome/131.0.0.0 Safari/537.36"
+)
+INIT_SCRIPT = "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
+
+
+def _page_providers(fetcher: FareProvider) -> list:
+    """fetcher가 쓰는 페이지 보유 공급자 (page 속성 교체 대상)."""
+    if isinstance(fetcher, HedgedFetcher):
+        return fetcher.providers
+    return [fetcher]
+
+
+class ManagedFetcher(FareProvider):
+    """fetch 전에 BrowserSession 점검(페이지 교체 / 재시작)을 거치는 fetcher."""
+
+    def __init__(self, session: "BrowserSession", inner: FareProvider):
+        self.session = session
+        self.inner = inner
+        self.name = inner.name
+        self.navigations = 0   # 현재 페이지로 로드한 횟수
+
+    @property
+    def hedged(self) -> int:
+        return getattr(self.inner, "hedged", 0)
+
+    @property
+    def hedge_wins(self) -> int:
+        return getattr(self.inner, "hedge_wins", 0)
+
+    async def fetch(self, url: str, timings: dict | None = None) -> str | None:
+        await self.session.before_fetch(self)
+        async with self.session.active():
+            self.navigations += 1
+            self.session.navigations += 1
+            try:
+                return await self.inner.fetch(url, timings)
+            except BrowserCrashError:
+                self.session.crashed = True
+                raise
+
+    async def boundary(self):
+        await self.session.route_boundary()
+
+
+class BrowserSession:
+    def __init__(self, playwright, headless: bool):
+        self.playwright = playwright
+        self.headless = headless
+        self.browser = None
+        self.context = None
+        self.fetchers: list[ManagedFetcher] = []
+        self.navigations = 0    # 브라우저 시작 후 로드 횟수
+        self.crashed = False
+        self.recycles = {"page": 0, "context": 0, "browser": 0}
+        self.peak_rss_kb = 0
+        self.peak_renderer_kb = 0
+        self._active = 0
+        self._paused = False
+        self._generation = 0    # 컨텍스트 교체 / 재시작마다 증가
+        self._cond = asyncio.Condition()
+
+    async def start(self):
+        self.browser = await self.playwright.chromium.launch(headless=self.headless, args=LAUNCH_ARGS)
+        self.context = await self._new_context()
+
+    async def _new_context(self):
+        context = await self.browser.new_context(
+            user_agent=USER_AGENT,
+            viewport={"width": 1280, "height": 800},
+            locale="ko-KR",
+        )
+        await context.add_init_script(INIT_SCRIPT)
+        return context
+
+    async def open_fetcher(self, names: list[str] = FARE_PROVIDERS) -> ManagedFetcher:
+        """공급자마다 페이지를 1개씩 열어 관리되는 fetcher를 만든다 (2개 이상이면 HedgedFetcher)."""
+        providers = [PROVIDERS[name](await self.context.new_page()) for name in names]
+        inner = providers[0] if len(providers) == 1 else HedgedFetcher(providers)
+        fetcher = ManagedFetcher(self, inner)
+        self.fetchers.append(fetcher)
+        return fetcher
+
+    # ── 동시 fetch / 독점 작업 조율 ───────────────────────
+
+    def active(self):
+        return _ActiveFetch(self)
+
+    async def _exclusive(self, action):
+        """진행 중인 fetch가 모두 끝난 뒤 action()을 실행한다 (그동안 새 fetch는 대기).
+        기다리는 사이 다른 fetcher가 먼저 교체 / 재시작했으면 생략한다."""
+        generation = self._generation
+        async with self._cond:
+            self._paused = True
+            try:
+                await self._cond.wait_for(lambda: self._active == 0)
+                if self._generation == generation:
+                    await action()
+                    self._generation += 1
+            finally:
+                self._paused = False
+                self._cond.notify_all()
+
+    # ── 점검 ──────────────────────────────────────────────
+
+    async def _sample(self) -> dict | None:
+        try:
+            s = await asyncio.to_thread(sample_browser_rss, os.getpid())
+        except Exception as e:
+            logger.warning(f"브라우저 RSS 측정 실패: {e}")
+            return None
+        self.peak_rss_kb = max(self.peak_rss_kb, s["browser_rss_kb"])
+        self.peak_renderer_kb = max(self.peak_renderer_kb, s["browser_max_rss_kb"])
+        return s
+
+    async def before_fetch(self, fetcher: ManagedFetcher):
+        if self.crashed:
+            await self._exclusive(self._restart)
+            return
+        sample = await self._sample()
+        if sample is not None and sample["browser_rss_kb"] >= BROWSER_MAX_MB * 1024:
+            logger.info(f"브라우저 RSS {sample['browser_rss_kb'] / 1024:.0f}MB — 컨텍스트 교체")
+            await self._exclusive(self._recycle_context)
+        elif fetcher.navigations >= BROWSER_PAGE_MAX_NAVIGATIONS or (
+                fetcher.navigations > 0 and sample is not None
+                and sample["browser_max_rss_kb"] >= BROWSER_RENDERER_MAX_MB * 1024):
+            await self._recycle_pages(fetcher)
+
+    async def route_boundary(self):
+        if self.crashed or self.navigations >= BROWSER_RESTART_NAVIGATIONS:
+            await self._exclusive(self._restart)
+            return
+        sample = await self._sample()
+        if sample is not None and sample["browser_rss_kb"] >= BROWSER_RESTART_MB * 1024:
+            logger.info(f"구간 경계 브라우저 RSS {sample['browser_rss_kb'] / 1024:.0f}MB — 재시작")
+            await self._exclusive(self._restart)
+
+    # ── 재생성 ────────────────────────────────────────────
+
+    async def _recycle_pages(self, fetcher: ManagedFetcher):
+        for provider in _page_providers(fetcher.inner):
+            old = provider.page
+            provider.page = await self.context.new_page()
+            try:
+                await old.close()
+            except Exception:
+                pass   # 이미 닫힌 페이지
+        logger.info(f"페이지 교체 ({fetcher.name}, 로드 {fetcher.navigations}회)")
+        fetcher.navigations = 0
+        self.recycles["page"] += 1
+
+    async def _reopen_pages(self):
+        for fetcher in self.fetchers:
+            for provider in _page_providers(fetcher.inner):
+                provider.page = await self.context.new_page()
+            fetcher.navigations = 0
+
+    async def _recycle_context(self):
+        old = self.context
+        self.context = await self._new_context()
+        await self._reopen_pages()
+        try:
+            await old.close()
+        except Exception:
+            pass
+        self.recycles["context"] += 1
+
+    async def _restart(self):
+        reason = "크래시 후" if self.crashed else f"로드 {self.navigations}회 후"
+        try:
+            await self.browser.close()
+        except Exception:
+            pass   # 크래시로 이미 끊긴 브라우저
+        await self.start()
+        await self._reopen_pages()
+        logger.info(f"브라우저 재시작 ({reason})")
+        self.navigations = 0
+        self.crashed = False
+        self.recycles["browser"] += 1
+
+    async def close(self):
+        await self._sample()
+        logger.info(
+            f"브라우저 관리: 페이지 교체 {self.recycles['page']}회, 컨텍스트 교체 {self.recycles['context']}회, "
+            f"재시작 {self.recycles['browser']}회 — RSS 최대 {self.peak_rss_kb / 1024:.0f}MB "
+            f"(프로세스 최대 {self.peak_renderer_kb / 1024:.0f}MB)"
+        )
+        try:
+            await self.browser.close()
+        except Exception:
+            pass
+
+
+class _ActiveFetch:
+    """fetch 구간 — 독점 작업(컨텍스트 교체 / 재시작) 중이면 끝날 때까지 기다렸다 들어간다."""
+
+    def __init__(self, session: BrowserSession):
+        self.session = session
+
+    async def __aenter__(self):
+        s = self.session
+        async with s._cond:
+            await s._cond.wait_for(lambda: not s._paused)
+            s._active += 1
+
+    async def __aexit__(self, *exc):
+        s = self.session
+        async with s._cond:
+            s._active -= 1
+            s._cond.notify_all()
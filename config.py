@@ -63,12 +63,65 @@ ALL_ROUTES = ROUTES + SPECIAL_ROUTES
 # 스캔 범위 (주)
 SCAN_WEEKS = 16
 
+# 실행당 페이지 로드 예산 (planner.py — 패턴/특별 일정 전개 후 중복 제거한 고유 검색 수 기준, 재시도 제외)
+# 초과분은 출발일이 먼 것부터 다음 실행으로 미룬다 (오래 확인하지 못한 대상은 예외 — SCAN_STALE_HOURS)
+SCAN_REQUEST_BUDGET = 120
+
+# 이 시간(시간) 넘게 확인하지 못한 대상(target_checks / weekly_lowest.checked_at, 한 번도 확인 안 함 포함)은
+# 출발일과 무관하게 예산에서 먼저 고른다 (오래된 순) — 예산 밖으로 밀린 먼 출발일도 이 주기 안에 차례가 온다
+SCAN_STALE_HOURS = 24
+
 # 네이버 항공권 URL 패턴
 NAVER_FLIGHT_URL = (
     "https://flight.naver.com/flights/international/"
     "{origin}-{destination}-{depart_date}/{destination}-{origin}-{return_date}"
     "?adult=1&fareType=Y"
 )
+# 편도 검색 URL (편도 조합 모드)
+NAVER_ONEWAY_URL = (
+    "https://flight.naver.com/flights/international/"
+    "{origin}-{destination}-{depart_date}"
+    "?adult=1&fareType=Y"
+)
+
+# 편도 조합 모드 (legs.py) — 왕복 검색(출발일 × 귀국일) 대신 가는 편(출발일별) / 오는 편(귀국일별) 편도 검색을
+# 항공사 기준으로 조합. 날짜가 겹치는 패턴이 많을수록 절감 (출발일 N × 귀국일 M → N + M 로드)
+# - 구간별 "leg_mode"가 있으면 그 값이 우선
+# - LEG_VERIFY_PER_RUN: 실행마다 구간당 대상 몇 개를 실제 왕복으로도 검색해 조합가와 비교 (leg_checks, 왕복 운임을 기록)
+LEG_MODE = False
+LEG_VERIFY_PER_RUN = 1
+
+# 페이지 로드 후 운임 XHR 렌더링 대기 (ms)
+PAGE_SETTLE_MS = 8000
+
+# 운임 공급자 (providers.py) — 첫 번째가 기본, 나머지는 헤지용 (공급자마다 페이지 1개)
+# - "naver-browser": 페이지 로드 후 PAGE_SETTLE_MS 고정 대기
+# - "naver-browser-settle": 같은 페이지 로드, 고정 대기 대신 networkidle까지만 대기 (최대 PAGE_SETTLE_MS)
+FARE_PROVIDERS = ["naver-browser", "naver-browser-settle"]
+
+# 헤지 요청: 로드가 최근 HEDGE_WINDOW개 성공 로드 지연의 HEDGE_PERCENTILE 분위수를 넘으면 다음 공급자로 추가 시도
+# (먼저 온 유효 결과 사용, 느린 쪽 취소). 표본 HEDGE_MIN_SAMPLES개 전에는 HEDGE_DEFAULT_DELAY_S초 기준
+HEDGE_PERCENTILE = 90
+HEDGE_MIN_SAMPLES = 5
+HEDGE_WINDOW = 50
+HEDGE_DEFAULT_DELAY_S = 15
+
+# 스캔 파이프라인 (pipeline.py) — fetch / 파싱 / DB 기록 / 구간 완료 처리를 단계별 태스크로 분리
+# - SCAN_FETCHERS: 동시에 로드하는 fetcher 수 (각각 FARE_PROVIDERS만큼 페이지를 연다. 1 = 순차 로드)
+# - PIPELINE_QUEUE_SIZE: 단계 사이 큐 크기 (차면 앞 단계가 대기), PIPELINE_WRITE_BATCH: DB 트랜잭션당 최대 URL 수
+SCAN_FETCHERS = 1
+PIPELINE_QUEUE_SIZE = 4
+PIPELINE_WRITE_BATCH = 8
+
+# 브라우저 메모리 관리 (browser.py) — fetch마다 Chromium 프로세스 RSS 측정
+# - 페이지 교체: fetcher가 BROWSER_PAGE_MAX_NAVIGATIONS회 로드했거나 가장 큰 프로세스가 BROWSER_RENDERER_MAX_MB 이상
+# - 컨텍스트 교체: 전체 RSS가 BROWSER_MAX_MB 이상
+# - 브라우저 재시작: 구간 경계에서 시작 후 BROWSER_RESTART_NAVIGATIONS회 로드 또는 전체 RSS BROWSER_RESTART_MB 이상 (크래시 후에는 즉시)
+BROWSER_PAGE_MAX_NAVIGATIONS = 20
+BROWSER_RENDERER_MAX_MB = 800
+BROWSER_MAX_MB = 2048
+BROWSER_RESTART_NAVIGATIONS = 60
+BROWSER_RESTART_MB = 1200
 
 # 봇 대응
 REQUEST_DELAY_MIN = 2
@@ -82,10 +135,95 @@ HEADLESS = False
 
 # Discord 채널
 DISCORD_CHANNEL_ID = "1470680847152840809"
+DISCORD_API_BASE = "https://discord.com/api/v10"
+# 봇 토큰 (openclaw 설정 파일의 channels.discord.token)
+DISCORD_TOKEN_FILE = "/Users/yeon/.openclaw/openclaw.json"
+
+# 최저가 갱신 알림 outbox 디스패처 (alerts.py)
+# - 구간의 가장 오래된 미전송 알림이 ALERT_COALESCE_SECONDS초 지나면 (또는 구간 스캔 완료 시) 묶어서 전송
+# - ALERT_POLL_SECONDS마다 outbox 확인, 전송 실패는 ALERT_MAX_ATTEMPTS회까지 재시도
+ALERT_COALESCE_SECONDS = 120
+ALERT_POLL_SECONDS = 10
+ALERT_MAX_ATTEMPTS = 5
+
+# 최저가 갱신 알림 유의성 판정 (pricestats.py — weekly_price_history 기반)
+# - ALERT_MIN_DROP_WON원 이상 그리고 ALERT_MIN_DROP_PCT% 이상 하락해야 후보
+# - 같은 구간 비교 이력(관측 PRICE_STATS_MIN_POINTS개 이상)이 있으면 아래 중 하나를 만족해야 알림:
+#   ALERT_SHARP_DROP_PCT% 이상 급락 / 같은 출발 임박도(N주 전) 가격 중 하위 ALERT_PERCENTILE% /
+#   같은 임박도 평균 대비 z ≤ -ALERT_Z_THRESHOLD / 최근 PRICE_STATS_WINDOW_DAYS일 구간 관측가 하위 ALERT_PERCENTILE%
+ALERT_MIN_DROP_WON = 3000
+ALERT_MIN_DROP_PCT = 2.0
+ALERT_SHARP_DROP_PCT = 15
+PRICE_STATS_MIN_POINTS = 8
+PRICE_STATS_WINDOW_DAYS = 14
+ALERT_Z_THRESHOLD = 1.5
+ALERT_PERCENTILE = 10
+
+# 주별 가격 추세 (trend.py — weekly_lowest 행마다 스캔 1건당 O(1) 갱신)
+# - 수준 / 기울기 평활 반감기 (일), 힌트는 관측 TREND_MIN_OBS개 이상부터
+# - 주당 변화가 수준의 ±TREND_HINT_WEEKLY_PCT% 이상이면 상승(지금 구매) / 하락(대기)
+# - 출발 TREND_BUY_DAYS일 이내는 하락 추세가 아니면 지금 구매
+TREND_LEVEL_HALFLIFE_DAYS = 1.0
+TREND_SLOPE_HALFLIFE_DAYS = 3.0
+TREND_MIN_OBS = 6
+TREND_HINT_WEEKLY_PCT = 2.0
+TREND_BUY_DAYS = 14
 
 # DB 파일 경로
 import os
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "flight_tracker.db")
 
+# 콜드 히스토리 아카이브 (cleanup 대상 행을 삭제 전 Parquet로 이동)
+ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "archive")
+
+# 원본 페이지 아카이브 (pagestore.py) — 추출한 페이지 텍스트를 내용 해시별 zstd 파일로 보관
+# 마지막으로 본 지 PAGE_ARCHIVE_RETENTION_DAYS일 지난 페이지 삭제, 전체 PAGE_ARCHIVE_MAX_MB 초과 시 오래된 것부터 삭제
+PAGE_ARCHIVE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pages")
+PAGE_ARCHIVE_ZSTD_LEVEL = 9
+PAGE_ARCHIVE_RETENTION_DAYS = 14
+PAGE_ARCHIVE_MAX_MB = 512
+
+# 대시보드용 export 디렉토리 (index.json 매니페스트 + 구간별 샤드)
+EXPORT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+# 실행 계측 Prometheus 텍스트 파일 디렉토리 ({mode}.prom, node_exporter textfile collector로 수집). None이면 생략
+METRICS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "metrics")
+
+# 로컬 조회 API (api.py) — 바인드 주소 / 응답 캐시 항목 수 / 히스토리 페이지 크기 (기본, 최대)
+API_HOST = "127.0.0.1"
+API_PORT = 8787
+API_CACHE_ENTRIES = 256
+API_HISTORY_PAGE = 200
+API_HISTORY_PAGE_MAX = 1000
+
+# --profile 출력 디렉토리 (기본: 로그 /tmp/tracker_*.log와 같은 위치) / 브라우저 RSS 샘플 주기 (초)
+PROFILE_DIR = "/tmp"
+PROFILE_RSS_INTERVAL = 5
+
+# 구간 스캔 완료 → 백그라운드 export 트리거를 묶는 대기 시간 (초)
+EXPORT_COALESCE_SECONDS = 5
+
+# export 배포 방식 (publish.py)
+# - "orphan-branch": PUBLISH_REMOTE의 PUBLISH_BRANCH에 단일 커밋 force-push (main 미사용)
+# - "directory": PUBLISH_DIR로 변경분만 복사 (정적 호스트 / 오브젝트 스토리지 동기화용)
+# - "none": 배포 안 함
+PUBLISH_BACKEND = "orphan-branch"
+PUBLISH_REMOTE = "origin"
+PUBLISH_BRANCH = "data"
+PUBLISH_DIR = None
+
 # 브리핑 시간 (KST)
 BRIEFING_HOURS_KST = [9, 13, 17, 21]
+
+# 브리핑 재검증 병렬도 (동시에 여는 페이지 수) / 구간별 기한 (초, 페이지를 받은 뒤부터) /
+# 전체 상한 (초) — 기한 초과 또는 상한까지 시작하지 못한 구간은 DB 기준으로 발송
+BRIEFING_VERIFY_PAGES = 3
+BRIEFING_VERIFY_DEADLINE = 25
+BRIEFING_VERIFY_TOTAL_DEADLINE = 60
+
+# 브리핑 재검증 생략 조건 — 트래커가 최근 같은 가격을 확인했으면 DB 값 사용
+# - 마지막 확인 후 BRIEFING_REUSE_MAX_AGE_MIN분 이내
+# - 단, 최근 24시간 가격 변경이 BRIEFING_VOLATILE_CHANGES회 이상이면 BRIEFING_VOLATILE_MAX_AGE_MIN분 이내만
+BRIEFING_REUSE_MAX_AGE_MIN = 70
+BRIEFING_VOLATILE_CHANGES = 3
+BRIEFING_VOLATILE_MAX_AGE_MIN = 15
@@ -9,6 +9,12 @@ import {
   getLabelText,
 } from "@/lib/utils";
 
+const TREND_HINTS = {
+  buy: { label: "📈 상승 추세 — 지금 구매", className: "font-medium text-red-600" },
+  wait: { label: "📉 하락 추세 — 대기", className: "font-medium text-blue-600" },
+  hold: { label: "➖ 보합", className: "text-gray-500" },
+};
+
 export default function LowestPriceCard({ route }: { route: Route }) {
   const today = new Date().toISOString().split("T")[0];
   const futureWeeks = route.weeks.filter(
@@ -70,6 +76,13 @@ export default function LowestPriceCard({ route }: { route: Route }) {
                   <div>오는편: {bestFlights.inbound}</div>
                 </>
               )}
+              {best.trend?.hint && (
+                <div className={TREND_HINTS[best.trend.hint].className}>
+                  {TREND_HINTS[best.trend.hint].label} (주당{" "}
+                  {best.trend.slope_per_day >= 0 ? "+" : "-"}
+                  {formatPrice(Math.abs(best.trend.slope_per_day * 7))})
+                </div>
+              )}
             </div>
             {/* 3인 가격 비교 */}
             {"pax3_price" in best && (
@@ -12,8 +12,8 @@ import {
 import { HistoryEntry } from "@/lib/types";
 import { formatPrice } from "@/lib/utils";
 
-function formatChartDate(isoStr: string): string {
-  const d = new Date(isoStr);
+function formatChartDate(value: string | number): string {
+  const d = new Date(value);
   const parts = new Intl.DateTimeFormat("en-US", {
     timeZone: "Asia/Seoul",
     month: "numeric",
@@ -42,7 +42,8 @@ export default function OverallChart({
   }
 
   const data = history.map((h) => ({
-    time: formatChartDate(h.snapshot_at),
+    // 다운샘플링된 히스토리는 포인트 간격이 일정하지 않으므로 시간 축에 그린다
+    ts: new Date(h.snapshot_at).getTime(),
     price: h.price,
     airline: h.airline,
   }));
@@ -57,7 +58,11 @@ export default function OverallChart({
           <LineChart data={data}>
             <CartesianGrid strokeDasharray="3 3" stroke="#e5e7eb" />
             <XAxis
-              dataKey="time"
+              dataKey="ts"
+              type="number"
+              scale="time"
+              domain={["dataMin", "dataMax"]}
+              tickFormatter={(v) => formatChartDate(v)}
               tick={{ fontSize: 11 }}
               angle={-30}
               textAnchor="end"
@@ -70,6 +75,7 @@ export default function OverallChart({
             />
             <Tooltip
               formatter={(value: number) => [formatPrice(value), "가격"]}
+              labelFormatter={(v) => formatChartDate(v)}
               labelStyle={{ fontSize: 12 }}
             />
             <Line
@@ -13,8 +13,8 @@ import {
 import { WeeklyHistoryEntry } from "@/lib/types";
 import { formatPrice, formatDate } from "@/lib/utils";
 
-function formatChartDate(isoStr: string): string {
-  const d = new Date(isoStr);
+function formatChartDate(value: string | number): string {
+  const d = new Date(value);
   const parts = new Intl.DateTimeFormat("en-US", {
     timeZone: "Asia/Seoul",
     month: "numeric",
@@ -47,7 +47,8 @@ export default function WeeklyChart({
 
   const entries = weeklyHistory[selected] || [];
   const data = entries.map((e) => ({
-    time: formatChartDate(e.snapshot_at),
+    // 다운샘플링된 히스토리는 포인트 간격이 일정하지 않으므로 시간 축에 그린다
+    ts: new Date(e.snapshot_at).getTime(),
     price: e.price,
     airline: e.airline,
   }));
@@ -76,7 +77,11 @@ export default function WeeklyChart({
             <LineChart data={data}>
               <CartesianGrid strokeDasharray="3 3" stroke="#e5e7eb" />
               <XAxis
-                dataKey="time"
+                dataKey="ts"
+                type="number"
+                scale="time"
+                domain={["dataMin", "dataMax"]}
+                tickFormatter={(v) => formatChartDate(v)}
                 tick={{ fontSize: 11 }}
                 angle={-30}
                 textAnchor="end"
@@ -89,6 +94,7 @@ export default function WeeklyChart({
               />
               <Tooltip
                 formatter={(value: number) => [formatPrice(value), "가격"]}
+                labelFormatter={(v) => formatChartDate(v)}
                 labelStyle={{ fontSize: 12 }}
               />
               <Line
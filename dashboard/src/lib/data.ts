@@ -1,10 +1,108 @@
-import { FlightData } from "./types";
+import {
+  ApiHistoryPage,
+  ApiRoutes,
+  CompactHistoryShard,
+  FlightData,
+  HistoryEntry,
+  Manifest,
+  Route,
+  RouteSummaryShard,
+  WeeklyHistoryEntry,
+  decodeHistoryShard,
+} from "./types";
 
-const DATA_URL =
-  "https://raw.githubusercontent.com/jrkim3888/airplane_ticket_price_tracker/main/data.json";
+const DATA_BASE_URL =
+  "https://raw.githubusercontent.com/jrkim3888/airplane_ticket_price_tracker/data";
 
-export async function fetchFlightData(): Promise<FlightData> {
-  const res = await fetch(DATA_URL, { cache: "no-store" });
-  if (!res.ok) throw new Error("Failed to fetch flight data");
+// 매니페스트만 매번 새로 받고, 샤드는 파일명에 내용 해시가 있어 불변 → 캐시 사용
+export async function fetchManifest(): Promise<Manifest> {
+  const res = await fetch(`${DATA_BASE_URL}/index.json`, { cache: "no-store" });
+  if (!res.ok) throw new Error("Failed to fetch manifest");
+  return res.json();
+}
+
+async function fetchShard<T>(path: string): Promise<T> {
+  const res = await fetch(`${DATA_BASE_URL}/${path}`, { cache: "force-cache" });
+  if (!res.ok) throw new Error(`Failed to fetch shard: ${path}`);
   return res.json();
 }
+
+// 로컬 조회 API (python api.py) — 설정하면 샤드 대신 DB를 직접 조회한다
+const API_BASE_URL = process.env.FLIGHT_API_URL;
+const API_HISTORY_LIMIT = 200;
+
+// ETag 재검증 캐시 — 변경이 없으면 API가 본문 없이 304를 돌려준다
+const apiCache = new Map<string, { etag: string; body: unknown }>();
+
+async function fetchApi<T>(path: string): Promise<T> {
+  const url = `${API_BASE_URL}${path}`;
+  const cached = apiCache.get(url);
+  const res = await fetch(url, {
+    cache: "no-store",
+    headers: cached ? { "If-None-Match": cached.etag } : {},
+  });
+  if (res.status === 304 && cached) return cached.body as T;
+  if (!res.ok) throw new Error(`Failed to fetch API: ${path}`);
+  const body = await res.json();
+  const etag = res.headers.get("ETag");
+  if (etag) apiCache.set(url, { etag, body });
+  return body as T;
+}
+
+// 최근 API_HISTORY_LIMIT개를 시간순으로 (API는 최신순)
+async function fetchApiHistory<T>(key: string, departDate?: string): Promise<T[]> {
+  const params = new URLSearchParams({ limit: String(API_HISTORY_LIMIT) });
+  if (departDate) params.set("depart_date", departDate);
+  const page = await fetchApi<ApiHistoryPage<T>>(`/api/routes/${key}/history?${params}`);
+  return [...page.points].reverse();
+}
+
+async function fetchFlightDataFromApi(): Promise<FlightData> {
+  const { routes: entries } = await fetchApi<ApiRoutes>("/api/routes");
+  const routes: Route[] = await Promise.all(
+    entries.map(async (entry) => {
+      const [summary, overall_history] = await Promise.all([
+        fetchApi<RouteSummaryShard>(`/api/routes/${entry.key}/weeks`),
+        fetchApiHistory<HistoryEntry>(entry.key),
+      ]);
+      const weekly = await Promise.all(
+        summary.weeks.map((w) => fetchApiHistory<WeeklyHistoryEntry>(entry.key, w.depart_date))
+      );
+      return {
+        origin: entry.origin,
+        destination: entry.destination,
+        label: entry.label,
+        weeks: summary.weeks,
+        overall_history,
+        weekly_history: Object.fromEntries(
+          summary.weeks.map((w, i) => [w.depart_date, weekly[i]])
+        ),
+      };
+    })
+  );
+  const updated_at = entries.reduce((a, e) => (e.updated_at > a ? e.updated_at : a), "");
+  return { updated_at, routes };
+}
+
+export async function fetchFlightData(): Promise<FlightData> {
+  if (API_BASE_URL) return fetchFlightDataFromApi();
+  const manifest = await fetchManifest();
+  const routes: Route[] = await Promise.all(
+    manifest.routes.map(async (entry) => {
+      const [summary, compactHistory] = await Promise.all([
+        fetchShard<RouteSummaryShard>(entry.summary.path),
+        fetchShard<CompactHistoryShard>(entry.history.path),
+      ]);
+      const history = decodeHistoryShard(compactHistory);
+      return {
+        origin: entry.origin,
+        destination: entry.destination,
+        label: entry.label,
+        weeks: summary.weeks,
+        overall_history: history.overall_history,
+        weekly_history: history.weekly_history,
+      };
+    })
+  );
+  return { updated_at: manifest.updated_at, routes };
+}
@@ -1,3 +1,12 @@
+// 가격 추세 (trend.py — 스캔마다 갱신되는 지수평활 수준/기울기)
+export interface WeekTrend {
+  level: number;          // 평활 가격 (원)
+  slope_per_day: number;  // 하루당 변화 (원/일)
+  sd: number;             // 예측 오차 표준편차 (원)
+  changed_at: string;     // 관측가가 마지막으로 바뀐 시각
+  hint: "buy" | "wait" | "hold" | null;  // 관측 부족이면 null
+}
+
 export interface WeekEntry {
   depart_date: string;
   return_date: string;
@@ -8,6 +17,7 @@ export interface WeekEntry {
   kal_flight_info: string | null;
   pax3_price: number | null;  // 3인 기준 총 가격 (adult=3 크롤링 결과)
   updated_at: string;
+  trend?: WeekTrend | null;
 }
 
 export interface HistoryEntry {
@@ -36,3 +46,117 @@ export interface FlightData {
   updated_at: string;
   routes: Route[];
 }
+
+// ── 샤딩 export (data/index.json + 구간별 샤드)
+
+export interface ShardRef {
+  path: string;  // data/ 기준 상대 경로 (파일명에 내용 해시 포함)
+  hash: string;
+  format?: string;  // history 샤드 인코딩 (예: "columnar-v1")
+}
+
+export interface ManifestRoute {
+  key: string;
+  origin: string;
+  destination: string;
+  label: string;
+  week_count: number;
+  min_price: number;
+  summary: ShardRef;
+  history: ShardRef;
+}
+
+export interface Manifest {
+  version: number;
+  updated_at: string;
+  routes: ManifestRoute[];
+}
+
+export interface RouteSummaryShard {
+  weeks: WeekEntry[];
+}
+
+export interface RouteHistoryShard {
+  overall_history: HistoryEntry[];
+  weekly_history: Record<string, WeeklyHistoryEntry[]>;
+}
+
+// ── 로컬 조회 API (api.py) 응답
+
+export interface ApiRouteEntry {
+  key: string;
+  origin: string;
+  destination: string;
+  label: string;
+  week_count: number;
+  min_price: number;
+  updated_at: string;
+}
+
+export interface ApiRoutes {
+  routes: ApiRouteEntry[];
+}
+
+// 최신순 페이지 — next_cursor가 null이면 마지막 페이지
+export interface ApiHistoryPage<T> {
+  route: string;
+  depart_date: string | null;
+  points: T[];
+  next_cursor: string | null;
+}
+
+// ── 컬럼형 히스토리 샤드 (format: "columnar-v1")
+// t: [첫 epoch초, Δ초, ...] / p: 가격 / a: airlines 인덱스 / d: depart_dates 인덱스
+
+export interface CompactSeries {
+  t: number[];
+  p: number[];
+  a: number[];
+  d?: number[];
+}
+
+export interface CompactHistoryShard {
+  format: "columnar-v1";
+  airlines: string[];
+  depart_dates: string[];
+  overall_history: CompactSeries;
+  weekly_history: Record<string, CompactSeries>;
+}
+
+function decodeTimes(deltas: number[]): string[] {
+  const out: string[] = new Array(deltas.length);
+  let ts = 0;
+  for (let i = 0; i < deltas.length; i++) {
+    ts += deltas[i];
+    out[i] = new Date(ts * 1000).toISOString();
+  }
+  return out;
+}
+
+export function decodeHistoryShard(shard: CompactHistoryShard): RouteHistoryShard {
+  if (shard.format !== "columnar-v1") {
+    throw new Error(`Unsupported history format: ${shard.format}`);
+  }
+  const { airlines, depart_dates } = shard;
+
+  const o = shard.overall_history;
+  const overallTimes = decodeTimes(o.t);
+  const overall_history: HistoryEntry[] = overallTimes.map((snapshot_at, i) => ({
+    snapshot_at,
+    price: o.p[i],
+    airline: airlines[o.a[i]],
+    depart_date: o.d ? depart_dates[o.d[i]] : "",
+  }));
+
+  const weekly_history: Record<string, WeeklyHistoryEntry[]> = {};
+  for (const [dd, s] of Object.entries(shard.weekly_history)) {
+    const times = decodeTimes(s.t);
+    weekly_history[dd] = times.map((snapshot_at, i) => ({
+      snapshot_at,
+      price: s.p[i],
+      airline: airlines[s.a[i]],
+    }));
+  }
+
+  return { overall_history, weekly_history };
+}
@@ -2,6 +2,7 @@
 
 import aiosqlite
 from config import DB_PATH
+from trend import TREND_COLUMNS, update_trend
 
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS routes (
@@ -24,6 +25,15 @@ CREATE TABLE IF NOT EXISTS weekly_lowest (
     kal_flight_info TEXT,
     pax3_price INTEGER,
     updated_at TEXT,
+    checked_at TEXT,  -- 트래커가 마지막으로 확인한 시각 (변경 없는 페이지 포함)
+    -- 가격 추세 (trend.py, 스캔 결과마다 O(1) 갱신)
+    trend_level REAL,
+    trend_slope REAL,
+    trend_var REAL,
+    trend_n INTEGER,
+    trend_last_price INTEGER,
+    trend_updated_at TEXT,
+    trend_changed_at TEXT,
     FOREIGN KEY (route_id) REFERENCES routes(id)
 );
 
@@ -64,6 +74,135 @@ CREATE TABLE IF NOT EXISTS weekly_price_history (
     flight_info TEXT,
     FOREIGN KEY (route_id) REFERENCES routes(id)
 );
+
+-- 중복 스캔 체크 / 브리핑 재검증 판단(마지막 스캔 조회)용
+CREATE INDEX IF NOT EXISTS idx_scan_history_route_dates_scanned
+    ON scan_history(route_id, depart_date, return_date, scanned_at);
+
+-- export의 시리즈별 시간순 스캔 / 길이 카운트용
+CREATE INDEX IF NOT EXISTS idx_price_history_route_snapshot
+    ON price_history(route_id, snapshot_at);
+
+CREATE INDEX IF NOT EXISTS idx_weekly_price_history_route_depart_snapshot
+    ON weekly_price_history(route_id, depart_date, snapshot_at);
+
+-- 최저가 갱신 알림 outbox (alerts.py 디스패처가 구간별로 묶어 전송 후 sent_at 기록)
+CREATE TABLE IF NOT EXISTS alert_outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    route_id INTEGER,
+    depart_date TEXT,
+    return_date TEXT,
+    old_price INTEGER,
+    new_price INTEGER,
+    airline TEXT,
+    flight_info TEXT,
+    reason TEXT,
+    created_at TEXT,
+    attempts INTEGER DEFAULT 0,
+    last_error TEXT,
+    sent_at TEXT,
+    FOREIGN KEY (route_id) REFERENCES routes(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_alert_outbox_pending
+    ON alert_outbox(sent_at, route_id, id);
+
+-- 실행 계측 (metrics.py): 실행 1회당 1행, stages/plan은 JSON
+CREATE TABLE IF NOT EXISTS scan_runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mode TEXT,
+    started_at TEXT,
+    finished_at TEXT,
+    status TEXT,
+    duration_s REAL,
+    fetches INTEGER,
+    page_loads INTEGER,
+    retries INTEGER,
+    no_result INTEGER,
+    crashes INTEGER,
+    bytes INTEGER,
+    stages TEXT,
+    plan TEXT
+);
+
+-- 페이지 로드(URL) 1건당 단계별 소요 시간 (ms)
+CREATE TABLE IF NOT EXISTS scan_metrics (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER,
+    url TEXT,
+    route_ids TEXT,
+    depart_date TEXT,
+    return_date TEXT,
+    attempts INTEGER,
+    outcome TEXT,
+    bytes INTEGER,
+    goto_ms INTEGER,
+    wait_ms INTEGER,
+    evaluate_ms INTEGER,
+    parse_ms INTEGER,
+    db_ms INTEGER,
+    sleep_ms INTEGER,
+    total_ms INTEGER,
+    started_at TEXT,
+    archive_ms INTEGER,
+    content_hash TEXT,  -- 마지막 시도의 페이지 내용 해시 (page_archive, 재처리용)
+    FOREIGN KEY (run_id) REFERENCES scan_runs(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_scan_metrics_run
+    ON scan_metrics(run_id);
+
+CREATE INDEX IF NOT EXISTS idx_scan_metrics_started
+    ON scan_metrics(started_at);
+
+-- 원본 페이지 아카이브 (pagestore.py): 내용 해시별 1행, 본문은 PAGE_ARCHIVE_DIR의 zstd 파일
+CREATE TABLE IF NOT EXISTS page_archive (
+    content_hash TEXT PRIMARY KEY,
+    url TEXT,
+    raw_bytes INTEGER,
+    stored_bytes INTEGER,
+    first_seen_at TEXT,
+    last_seen_at TEXT,
+    seen_count INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS idx_page_archive_last_seen
+    ON page_archive(last_seen_at);
+
+-- 검색 URL별 마지막 페이지 해시 + 파싱 조건 / 결과 수 — 같으면 파싱과 DB 기록 생략
+CREATE TABLE IF NOT EXISTS page_state (
+    url TEXT PRIMARY KEY,
+    content_hash TEXT,
+    parse_key TEXT,
+    results INTEGER,
+    checked_at TEXT
+);
+
+-- 편도 조합 검증 (legs.py): 같은 대상의 편도 조합가와 실제 왕복가 비교
+CREATE TABLE IF NOT EXISTS leg_checks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    route_id INTEGER,
+    depart_date TEXT,
+    return_date TEXT,
+    composed_price INTEGER,
+    roundtrip_price INTEGER,
+    composed_airline TEXT,
+    roundtrip_airline TEXT,
+    checked_at TEXT,
+    FOREIGN KEY (route_id) REFERENCES routes(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_leg_checks_route_checked
+    ON leg_checks(route_id, checked_at);
+
+-- 대상별 마지막 확인 시각 (결과 없음 포함) — weekly_lowest 행이 없는 대상도 스캔 예산 순위에 쓴다 (planner.py)
+CREATE TABLE IF NOT EXISTS target_checks (
+    route_id INTEGER,
+    depart_date TEXT,
+    return_date TEXT,
+    checked_at TEXT,
+    PRIMARY KEY (route_id, depart_date, return_date)
+);
 """
 
 
@@ -93,6 +232,32 @@ async def init_db():
             )
             await db.commit()
 
+        # 마이그레이션: 가격 추세 컬럼 추가 (기존 행은 다음 스캔부터 추세 시작)
+        trend_types = {"trend_n": "INTEGER", "trend_last_price": "INTEGER",
+                       "trend_updated_at": "TEXT", "trend_changed_at": "TEXT"}
+        missing = [c for c in TREND_COLUMNS if c not in col_names]
+        for col in missing:
+            await db.execute(f"ALTER TABLE weekly_lowest ADD COLUMN {col} {trend_types.get(col, 'REAL')}")
+        if missing:
+            await db.commit()
+
+        # 마이그레이션: weekly_lowest.checked_at / scan_metrics 페이지 아카이브 컬럼 추가
+        if "checked_at" not in col_names:
+            await db.execute("ALTER TABLE weekly_lowest ADD COLUMN checked_at TEXT")
+            await db.commit()
+        cols = await db.execute("PRAGMA table_info(scan_metrics)")
+        metric_cols = [row["name"] for row in await cols.fetchall()]
+        for col, col_type in (("archive_ms", "INTEGER"), ("content_hash", "TEXT")):
+            if col not in metric_cols:
+                await db.execute(f"ALTER TABLE scan_metrics ADD COLUMN {col} {col_type}")
+                await db.commit()
+
+        # 마이그레이션: alert_outbox.reason 컬럼 추가 (알림 유의성 근거)
+        cols = await db.execute("PRAGMA table_info(alert_outbox)")
+        if "reason" not in [row["name"] for row in await cols.fetchall()]:
+            await db.execute("ALTER TABLE alert_outbox ADD COLUMN reason TEXT")
+            await db.commit()
+
         for i, route in enumerate(ROUTES, start=1):
             existing = await db.execute(
                 "SELECT id FROM routes WHERE id = ?", (i,)
@@ -141,50 +306,115 @@ async def insert_scan(db, route_id: int, depart_date: str, return_date: str,
     )
 
 
+async def insert_leg_check(db, route_id: int, depart_date: str, return_date: str,
+                           composed: dict | None, roundtrip: dict | None, checked_at: str):
+    """leg_checks에 편도 조합 결과와 실제 왕복 결과(parse_naver_flights 형식, 없으면 None)를 기록한다."""
+    await db.execute(
+        "INSERT INTO leg_checks (route_id, depart_date, return_date, composed_price, roundtrip_price, "
+        "composed_airline, roundtrip_airline, checked_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+        (route_id, depart_date, return_date,
+         composed["min_price"] if composed else None, roundtrip["min_price"] if roundtrip else None,
+         composed["airline"] if composed else None, roundtrip["airline"] if roundtrip else None,
+         checked_at),
+    )
+
+
 async def update_weekly_lowest(db, route_id: int, depart_date: str, return_date: str,
                                price: int, airline: str, flight_info: str,
                                kal_price, kal_flight_info, updated_at: str):
-    """weekly_lowest를 갱신한다. 최저가가 갱신되었으면 (old_price, new_price)를, 아니면 None을 반환."""
+    """weekly_lowest를 갱신한다. 최저가가 갱신되었으면 (old_price, new_price)를, 아니면 None을 반환.
+
+    관측 가격(price)은 최저가 갱신 여부와 관계없이 행의 가격 추세(trend_*)에 반영한다 (O(1)).
+    """
+    trend_cols = ", ".join(TREND_COLUMNS)
     cursor = await db.execute(
-        "SELECT min_price FROM weekly_lowest WHERE route_id = ? AND depart_date = ? AND return_date = ?",
+        f"SELECT min_price, {trend_cols} FROM weekly_lowest "
+        "WHERE route_id = ? AND depart_date = ? AND return_date = ?",
         (route_id, depart_date, return_date),
     )
     row = await cursor.fetchone()
+    if isinstance(row, tuple):
+        row = dict(zip(("min_price", *TREND_COLUMNS), row))
+    trend = update_trend(row, price, updated_at)
+    trend_set = ", ".join(f"{c} = ?" for c in TREND_COLUMNS)
+    trend_values = tuple(trend[c] for c in TREND_COLUMNS)
 
     if row is None:
         # 신규 삽입
         await db.execute(
             "INSERT INTO weekly_lowest (route_id, depart_date, return_date, min_price, airline, "
-            "flight_info, kal_price, kal_flight_info, updated_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            f"flight_info, kal_price, kal_flight_info, updated_at, checked_at, {trend_cols}) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, {', '.join('?' * len(TREND_COLUMNS))})",
             (route_id, depart_date, return_date, price, airline, flight_info,
-             kal_price, kal_flight_info, updated_at),
+             kal_price, kal_flight_info, updated_at, updated_at, *trend_values),
         )
         return (None, price)
 
-    old_price = row[0] if isinstance(row, tuple) else row["min_price"]
+    old_price = row["min_price"]
 
     if price < old_price:
         await db.execute(
             "UPDATE weekly_lowest SET min_price = ?, airline = ?, flight_info = ?, "
-            "kal_price = ?, kal_flight_info = ?, updated_at = ? "
+            f"kal_price = ?, kal_flight_info = ?, updated_at = ?, checked_at = ?, {trend_set} "
             "WHERE route_id = ? AND depart_date = ? AND return_date = ?",
-            (price, airline, flight_info, kal_price, kal_flight_info, updated_at,
+            (price, airline, flight_info, kal_price, kal_flight_info, updated_at, updated_at, *trend_values,
              route_id, depart_date, return_date),
         )
         return (old_price, price)
 
-    # 최저가 아니더라도 대한항공 정보 업데이트
+    # 최저가 아니더라도 대한항공 정보 / 추세 업데이트
     if kal_price is not None:
         await db.execute(
-            "UPDATE weekly_lowest SET kal_price = ?, kal_flight_info = ?, updated_at = ? "
+            f"UPDATE weekly_lowest SET kal_price = ?, kal_flight_info = ?, updated_at = ?, checked_at = ?, "
+            f"{trend_set} WHERE route_id = ? AND depart_date = ? AND return_date = ?",
+            (kal_price, kal_flight_info, updated_at, updated_at, *trend_values,
+             route_id, depart_date, return_date),
+        )
+    else:
+        await db.execute(
+            f"UPDATE weekly_lowest SET checked_at = ?, {trend_set} "
             "WHERE route_id = ? AND depart_date = ? AND return_date = ?",
-            (kal_price, kal_flight_info, updated_at, route_id, depart_date, return_date),
+            (updated_at, *trend_values, route_id, depart_date, return_date),
         )
 
     return None
 
 
+async def touch_weekly_lowest(db, route_id: int, depart_date: str, return_date: str,
+                              checked_at: str) -> bool:
+    """변경 없는 페이지 — checked_at만 갱신한다. 행이 있었으면 True."""
+    cursor = await db.execute(
+        "UPDATE weekly_lowest SET checked_at = ? "
+        "WHERE route_id = ? AND depart_date = ? AND return_date = ?",
+        (checked_at, route_id, depart_date, return_date),
+    )
+    return cursor.rowcount > 0
+
+
+async def mark_target_checked(db, route_id: int, depart_date: str, return_date: str, checked_at: str):
+    """대상을 확인한 시각을 기록한다 (결과 유무와 무관)."""
+    await db.execute(
+        "INSERT OR REPLACE INTO target_checks (route_id, depart_date, return_date, checked_at) "
+        "VALUES (?, ?, ?, ?)",
+        (route_id, depart_date, return_date, checked_at),
+    )
+
+
+async def get_last_checked(db) -> dict[tuple[int, str, str], str]:
+    """(route_id, 출발일, 귀국일) → 마지막 확인 시각. 날짜는 YYYY-MM-DD.
+
+    target_checks(결과 없음 포함)와 weekly_lowest(checked_at, 없으면 updated_at — target_checks 이전 행) 중 최신.
+    """
+    cursor = await db.execute(
+        "SELECT route_id, depart_date, return_date, MAX(at) FROM ("
+        "  SELECT route_id, depart_date, return_date, COALESCE(checked_at, updated_at) AS at FROM weekly_lowest"
+        "  UNION ALL"
+        "  SELECT route_id, depart_date, return_date, checked_at AS at FROM target_checks"
+        ") WHERE at IS NOT NULL GROUP BY route_id, depart_date, return_date"
+    )
+    return {(rid, dd, rd): at for rid, dd, rd, at in await cursor.fetchall()}
+
+
 async def get_all_weekly_lowest(db):
     """전체 weekly_lowest를 route별, 날짜순으로 반환."""
     cursor = await db.execute(
@@ -229,3 +459,18 @@ async def insert_weekly_price_snapshot(db, route_id: int, depart_date: str,
         "VALUES (?, ?, ?, ?, ?, ?, ?)",
         (route_id, depart_date, return_date, snapshot_at, min_price, airline, flight_info),
     )
+
+
+async def enqueue_alert(db, route_id: int, depart_date: str, return_date: str,
+                        old_price: int, new_price: int, airline: str, flight_info: str,
+                        created_at: str, reason: str | None = None):
+    """최저가 갱신 알림을 alert_outbox에 적재한다. 커밋은 호출자가 (weekly_lowest 갱신과 같은 트랜잭션).
+
+    reason: 알림 유의성 근거 (pricestats.PriceStats.evaluate) — 메시지에 함께 표시
+    """
+    await db.execute(
+        "INSERT INTO alert_outbox (route_id, depart_date, return_date, old_price, new_price, "
+        "airline, flight_info, reason, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (route_id, depart_date, return_date, old_price, new_price, airline, flight_info,
+         reason, created_at),
+    )
@@ -0,0 +1,215 @@
+"""항공권 가격 트래커 - 비동기 Discord 클라이언트
+
+alerts.py(최저가 갱신 알림 디스패처)와 briefing.py(정기 브리핑)가 공유한다.
+
+- aiohttp 세션 1개를 재사용 (TLS 연결 풀링)
+- 2000자 제한에 맞춰 분할한 chunk를 순서대로 전송
+- 429 응답의 Retry-After / retry_after, X-RateLimit-Remaining / X-RateLimit-Reset-After 헤더 준수
+- post_nowait(): 큐에 넣고 즉시 반환 — 백그라운드 워커가 전송하므로 스캔 루프를 막지 않음
+"""
+
+import asyncio
+import json
+import logging
+import ssl
+
+import aiohttp
+
+from config import DISCORD_API_BASE, DISCORD_TOKEN_FILE
+
+logger = logging.getLogger(__name__)
+
+DISCORD_MAX_CONTENT = 2000
+DISCORD_SAFE_CONTENT = 1800
+DISCORD_MAX_RETRIES = 5
+DISCORD_TIMEOUT = 30
+
+
+def load_discord_bot_token() -> str:
+    """openclaw config get은 민감값을 redacted 할 수 있어 설정 파일에서 직접 읽는다."""
+    try:
+        with open(DISCORD_TOKEN_FILE, "r", encoding="utf-8") as f:
+            cfg = json.load(f)
+        token = cfg["channels"]["discord"]["token"].strip()
+        if not token:
+            raise ValueError("Discord token is empty")
+        return token
+    except Exception as e:
+        raise RuntimeError(f"Discord token 로드 실패: {e}")
+
+
+def split_discord_message(message: str, max_len: int = DISCORD_SAFE_CONTENT) -> list[str]:
+    """Discord 본문 길이 제한(2000자) 이하로 안전하게 분할한다."""
+    if len(message) <= max_len:
+        return [message]
+
+    chunks = []
+    current = []
+    current_len = 0
+
+    for line in message.split("\n"):
+        # +1은 줄바꿈 문자
+        line_len = len(line) + 1
+
+        # 단일 라인이 너무 긴 경우 강제 분할
+        if line_len > max_len:
+            if current:
+                chunks.append("\n".join(current).rstrip())
+                current = []
+                current_len = 0
+
+            raw = line
+            while len(raw) > max_len:
+                chunks.append(raw[:max_len])
+                raw = raw[max_len:]
+
+            if raw:
+                current = [raw]
+                current_len = len(raw) + 1
+            continue
+
+        if current_len + line_len > max_len and current:
+            chunks.append("\n".join(current).rstrip())
+            current = [line]
+            current_len = line_len
+        else:
+            current.append(line)
+            current_len += line_len
+
+    if current:
+        chunks.append("\n".join(current).rstrip())
+
+    return chunks
+
+
+class DiscordClient:
+    """Discord 채널 메시지 전송 클라이언트.
+
+    사용:
+        async with DiscordClient(token, channel_id) as discord:
+            await discord.send(message)      # 완료까지 대기, 성공 여부 반환
+            discord.post_nowait(message)     # 큐에 넣고 즉시 반환 (close 시 모두 전송)
+    """
+
+    def __init__(self, token: str, channel_id: str, api_base: str = DISCORD_API_BASE,
+                 max_retries: int = DISCORD_MAX_RETRIES):
+        self.url = f"{api_base}/channels/{channel_id}/messages"
+        self.max_retries = max_retries
+        self._headers = {
+            "Authorization": f"Bot {token}",
+            "Content-Type": "application/json",
+            "User-Agent": "mc-mini-flight-tracker/1.0",
+        }
+        self._session: aiohttp.ClientSession | None = None
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._worker: asyncio.Task | None = None
+        # 버킷 소진 시 다음 요청 가능 시각 (loop.time 기준)
+        self._blocked_until = 0.0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            ssl_ctx = ssl.create_default_context()
+            ssl_ctx.check_hostname = False
+            ssl_ctx.verify_mode = ssl.CERT_NONE
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                timeout=aiohttp.ClientTimeout(total=DISCORD_TIMEOUT),
+                connector=aiohttp.TCPConnector(ssl=ssl_ctx, limit=2),
+            )
+        return self._session
+
+    def _update_bucket(self, headers):
+        loop = asyncio.get_running_loop()
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset_after = headers.get("X-RateLimit-Reset-After")
+        if remaining is not None and reset_after is not None and int(float(remaining)) <= 0:
+            self._blocked_until = max(self._blocked_until, loop.time() + float(reset_after))
+
+    async def _wait_bucket(self):
+        delay = self._blocked_until - asyncio.get_running_loop().time()
+        if delay > 0:
+            logger.info(f"Discord rate limit 버킷 소진 — {delay:.1f}s 대기")
+            await asyncio.sleep(delay)
+
+    async def _post(self, content: str) -> bool:
+        """chunk 1개를 전송한다. 429 / 5xx / 네트워크 오류는 재시도."""
+        payload = json.dumps({"content": content})
+        for attempt in range(self.max_retries + 1):
+            await self._wait_bucket()
+            try:
+                async with self._get_session().post(self.url, data=payload) as resp:
+                    self._update_bucket(resp.headers)
+                    if resp.status in (200, 201):
+                        return True
+
+                    body = await resp.text()
+                    if resp.status == 429:
+                        try:
+                            retry_after = float(json.loads(body).get("retry_after"))
+                        except (ValueError, TypeError, AttributeError):
+                            retry_after = float(resp.headers.get("Retry-After", 1))
+                        logger.warning(f"Discord 429 — {retry_after:.1f}s 후 재시도")
+                        await asyncio.sleep(retry_after)
+                        continue
+                    if resp.status >= 500:
+                        logger.warning(f"Discord HTTP {resp.status} — 재시도 ({attempt + 1}/{self.max_retries})")
+                        await asyncio.sleep(2 ** attempt)
+                        continue
+
+                    logger.error(f"Discord 전송 실패: HTTP {resp.status} {body}")
+                    return False
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.warning(f"Discord 전송 오류 — 재시도 ({attempt + 1}/{self.max_retries}): {e}")
+                await asyncio.sleep(2 ** attempt)
+
+        logger.error(f"Discord 전송 실패: 재시도 {self.max_retries}회 초과")
+        return False
+
+    async def send(self, message: str) -> bool:
+        """메시지를 분할해 순서대로 전송한다. 중간 chunk가 실패하면 중단하고 False."""
+        chunks = split_discord_message(message)
+        if len(chunks) > 1:
+            logger.info(f"Discord 전송 분할: {len(chunks)}개 메시지")
+
+        for idx, chunk in enumerate(chunks, start=1):
+            if len(chunk) > DISCORD_MAX_CONTENT:
+                logger.error(f"Discord 전송 실패: chunk 길이 초과 ({len(chunk)})")
+                return False
+            if not await self._post(chunk):
+                logger.error(f"Discord 전송 실패 ({idx}/{len(chunks)})")
+                return False
+            logger.info(f"Discord 전송 완료 ({idx}/{len(chunks)})")
+        return True
+
+    def post_nowait(self, message: str):
+        """백그라운드 전송 큐에 넣고 즉시 반환한다 (전송 순서 보장)."""
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._drain_queue())
+        self._queue.put_nowait(message)
+
+    async def _drain_queue(self):
+        while True:
+            message = await self._queue.get()
+            try:
+                await self.send(message)
+            except Exception as e:
+                logger.error(f"Discord 백그라운드 전송 오류: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def close(self):
+        """큐에 남은 메시지를 모두 보낸 뒤 세션을 닫는다."""
+        if self._worker is not None:
+            await self._queue.join()
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,159 @@
+"""항공권 가격 트래커 - 히스토리 다운샘플링 (대시보드 export용, NumPy)
+
+시간별 스냅샷 시계열은 대부분 같은 가격의 반복이다. 시리즈 전체 기간을 고정 포인트 수로 줄이되
+가격 하락 / 급등은 모두 보이도록:
+
+1. 평탄 구간 압축: 가격이 바뀌는 지점의 앞뒤(구간 양끝)만 남긴다 — 꺾은선 차트 기준 손실 없음
+2. 그래도 많으면 MinMaxLTTB: 버킷마다 최저 / 최고 포인트를 먼저 고르고(MINMAX_RATIO × n 버킷, 벡터 연산)
+   그 후보에 Largest-Triangle-Three-Buckets를 적용 (버킷당 넓이 계산은 벡터, 루프는 버킷 수만큼)
+3. 전체 최저가 포인트는 항상 남긴다 (그 포인트가 든 LTTB 버킷은 넓이 대신 최저가를 선택)
+
+입력은 시간 오름차순. 반환은 남길 인덱스 (오름차순, 첫 / 마지막 포인트 포함).
+
+StreamDownsampler는 같은 방식을 커서에서 한 포인트씩 받아 적용한다 (export용) — 시리즈 길이와 무관하게
+메모리는 출력 × MINMAX_RATIO 포인트 수준. 최저 / 최고 버킷은 변경 지점이 아닌 원본 순번 기준이다.
+"""
+
+import numpy as np
+
+MINMAX_RATIO = 4   # LTTB 후보 = 출력 포인트 수 × MINMAX_RATIO (버킷당 최저 + 최고)
+
+
+def change_points(prices: np.ndarray) -> np.ndarray:
+    """가격이 바뀌기 직전 / 직후 포인트 + 처음 / 끝 인덱스."""
+    n = len(prices)
+    if n <= 2:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    changed = prices[1:] != prices[:-1]
+    keep[1:] |= changed     # 바뀐 직후
+    keep[:-1] |= changed    # 바뀌기 직전
+    return np.flatnonzero(keep)
+
+
+def minmax_candidates(prices: np.ndarray, n_buckets: int) -> np.ndarray:
+    """처음 / 끝을 제외한 구간을 n_buckets개로 나눠 버킷별 최저 / 최고 인덱스를 고른다 (+ 처음 / 끝)."""
+    n = len(prices)
+    bucket = ((np.arange(1, n - 1) - 1) * n_buckets) // (n - 2)
+    # 버킷 → 가격 → 인덱스 순 정렬: 그룹의 첫 원소가 최저, 마지막 원소가 최고
+    order = np.lexsort((np.arange(1, n - 1), prices[1:-1], bucket))
+    starts = np.flatnonzero(np.r_[True, bucket[order][1:] != bucket[order][:-1]])
+    ends = np.r_[starts[1:], len(order)] - 1
+    picked = np.unique(np.concatenate(([0, n - 1], order[starts] + 1, order[ends] + 1)))
+    return picked
+
+
+def lttb(t: np.ndarray, p: np.ndarray, n_out: int, keep: int | None = None) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets — 버킷마다 (직전 선택, 현재 후보, 다음 버킷 평균) 삼각형 넓이 최대인 포인트.
+
+    keep: 이 인덱스가 든 버킷은 넓이와 무관하게 keep을 고른다.
+    """
+    n = len(p)
+    if n <= n_out:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)   # 가운데 n_out - 2개 버킷 경계
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        if b + 2 < len(edges):
+            nxt = slice(edges[b + 1], edges[b + 2])
+            avg_t, avg_p = t[nxt].mean(), p[nxt].mean()
+        else:
+            avg_t, avg_p = t[-1], p[-1]
+        if keep is not None and lo <= keep < hi:
+            a = keep
+        else:
+            area = np.abs((t[a] - avg_t) * (p[lo:hi] - p[a]) - (t[a] - t[lo:hi]) * (avg_p - p[a]))
+            a = lo + int(np.argmax(area))
+        selected[b + 1] = a
+    return selected
+
+
+def downsample(t: np.ndarray, p: np.ndarray, n_out: int) -> np.ndarray:
+    """시계열(t: epoch초, p: 가격)을 n_out개 이하로 줄일 때 남길 인덱스."""
+    idx = change_points(p)
+    if len(idx) <= n_out:
+        return idx
+    if n_out < 3:
+        return idx[[0, -1]][:n_out]
+
+    cand = idx[minmax_candidates(p[idx], n_out * MINMAX_RATIO // 2)]
+    if len(cand) <= n_out:
+        return cand
+    tf, pf = t[cand].astype(np.float64), p[cand].astype(np.float64)
+    # 전체 최저가(처음 나온 것)는 반드시 포함
+    return cand[lttb(tf, pf, n_out, keep=int(np.argmin(pf)))]
+
+
+class StreamDownsampler:
+    """시간순 포인트를 하나씩 받아 downsample()과 같은 규칙으로 n_out개 이하를 남긴다.
+
+    count(전체 포인트 수, 버킷 경계용)는 미리 알아야 한다 — 실제 수와 달라도 버킷 범위만 어긋날 뿐 결과는 유효.
+    - 변경 지점(가격이 바뀌기 직전 / 직후 + 처음 / 끝)이 n_out개 이하이면 그대로 (손실 없음)
+    - 넘으면 원본 순번 기준 버킷(n_out × MINMAX_RATIO / 2개)별 최저 / 최고 후보에 LTTB (전체 최저가 포함)
+    변경 지점 버퍼는 n_out개를 넘는 순간 버린다 → 보관하는 포인트는 최대 n_out × MINMAX_RATIO + 2개.
+    """
+
+    def __init__(self, count: int, n_out: int):
+        self.count = max(count, 1)
+        self.n_out = n_out
+        self.n_buckets = max(n_out * MINMAX_RATIO // 2, 1)
+        self.changes: list | None = []        # (seq, t, p, item) — 변경 지점, n_out 초과 시 None
+        self.lows: dict[int, tuple] = {}      # 버킷 → 최저 (같은 가격이면 먼저 나온 것)
+        self.highs: dict[int, tuple] = {}     # 버킷 → 최고 (같은 가격이면 나중 것)
+        self.first = None
+        self.prev = None
+        self.prev_kept = False
+        self.seq = 0
+
+    def _keep_change(self, point):
+        if self.changes is not None:
+            self.changes.append(point)
+            if len(self.changes) > self.n_out:
+                self.changes = None
+
+    def add(self, t: int, p: int, item):
+        point = (self.seq, t, p, item)
+        self.seq += 1
+        if self.first is None:
+            self.first = point
+            self._keep_change(point)
+            self.prev_kept = True
+        elif p != self.prev[2]:
+            if not self.prev_kept:
+                self._keep_change(self.prev)   # 바뀌기 직전
+            self._keep_change(point)           # 바뀐 직후
+            self.prev_kept = True
+        else:
+            self.prev_kept = False
+        self.prev = point
+
+        b = min(point[0] * self.n_buckets // self.count, self.n_buckets - 1)
+        low, high = self.lows.get(b), self.highs.get(b)
+        if low is None or p < low[2]:
+            self.lows[b] = point
+        if high is None or p >= high[2]:
+            self.highs[b] = point
+
+    def result(self) -> list:
+        """남길 item 목록 (시간 오름차순)."""
+        if self.first is None:
+            return []
+        last = self.prev
+        if self.changes is not None and not self.prev_kept:
+            self._keep_change(last)   # 끝
+        if self.changes is not None:
+            return [pt[3] for pt in self.changes]
+        if self.n_out < 3:
+            return [self.first[3], last[3]][:self.n_out]
+
+        by_seq = {pt[0]: pt for pt in (self.first, last, *self.lows.values(), *self.highs.values())}
+        cand = [by_seq[k] for k in sorted(by_seq)]
+        if len(cand) <= self.n_out:
+            return [pt[3] for pt in cand]
+        tf = np.fromiter((pt[1] for pt in cand), dtype=np.float64, count=len(cand))
+        pf = np.fromiter((pt[2] for pt in cand), dtype=np.float64, count=len(cand))
+        return [cand[i][3] for i in lttb(tf, pf, self.n_out, keep=int(np.argmin(pf)))]
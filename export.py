@@ -0,0 +1,497 @@
+"""항공권 가격 트래커 - 대시보드용 데이터 내보내기 (샤딩 + 증분)
+
+DB → export 디렉토리에 다음 레이아웃으로 기록한다:
+
+    data/index.json                      # 매니페스트 (매 실행 갱신, 수 KB)
+    data/routes/{ORIGIN-DEST}.{hash}.json   # 구간별 weeks
+    data/history/{ORIGIN-DEST}.{hash}.json  # 구간별 overall_history + weekly_history
+
+샤드 파일명에 내용 해시가 들어가므로 내용이 같으면 파일을 다시 쓰지 않는다.
+클라이언트는 매니페스트만 캐시 없이 받고, 샤드는 불변 URL로 캐시해 필요한 것만 받는다.
+매니페스트에서 더 이상 참조하지 않는 샤드는 삭제한다.
+
+히스토리 샤드는 컬럼형 압축 포맷(HISTORY_FORMAT)으로 기록한다 — encode_series() 참고.
+모든 파일 옆에 정적 호스트용 .gz / .br 사본을 함께 기록한다 (해시가 새로운 샤드만 압축).
+
+히스토리는 시리즈 전체 기간을 HISTORY_LIMIT 포인트 이하로 다운샘플링해 기록한다 (downsample.py —
+평탄 구간 압축 + MinMaxLTTB, 가격 하락 / 급등과 최저가 보존). 커서 행을 StreamDownsampler에 하나씩
+넣어 줄이고, ShardWriter가 임시 파일에 점진적으로 쓰면서 해시를 계산한다 → export 메모리는 시리즈 길이와
+무관하게 시리즈당 HISTORY_LIMIT × MINMAX_RATIO 포인트 수준이다.
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import time
+from datetime import datetime
+
+import brotli
+import pytz
+
+from config import ALL_ROUTES, EXPORT_DIR, EXPORT_COALESCE_SECONDS
+from db import get_db
+from downsample import StreamDownsampler
+from trend import trend_summary
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+MANIFEST_VERSION = 2
+MANIFEST_NAME = "index.json"
+SHARD_KINDS = ("routes", "history")
+HISTORY_LIMIT = 200   # 시리즈당 최대 포인트 (다운샘플링 후)
+HISTORY_FORMAT = "columnar-v1"
+COMPRESSED_SUFFIXES = (".gz", ".br")
+
+# 구간 요약(routes 샤드 / api.py)의 weeks — 구간, 출발일 순
+WEEKS_SQL = """
+    SELECT w.route_id, r.origin, r.destination,
+           w.depart_date, w.return_date,
+           w.min_price, w.airline, w.flight_info,
+           w.kal_price, w.kal_flight_info,
+           w.pax3_price, w.updated_at,
+           w.trend_level, w.trend_slope, w.trend_var, w.trend_n, w.trend_changed_at
+    FROM weekly_lowest w
+    JOIN routes r ON w.route_id = r.id
+    {where}
+    ORDER BY r.id, w.depart_date
+"""
+
+# 시리즈 전체 (시간순) — idx_price_history_route_snapshot /
+# idx_weekly_price_history_route_depart_snapshot 인덱스 순서로 스캔. 행은 커서에서 하나씩
+# StreamDownsampler로 넘기고, 버킷 경계에 쓸 시리즈 길이는 *_COUNT_SQL로 먼저 센다 (같은 인덱스)
+OVERALL_COUNT_SQL = "SELECT COUNT(*) FROM price_history WHERE route_id = ?"
+
+WEEKLY_COUNT_SQL = """
+    SELECT depart_date, COUNT(*) FROM weekly_price_history
+    WHERE route_id = ?
+    GROUP BY depart_date
+"""
+
+OVERALL_HISTORY_SQL = """
+    SELECT snapshot_at, overall_min_price AS price, airline, depart_date
+    FROM price_history
+    WHERE route_id = ?
+    ORDER BY snapshot_at, id
+"""
+
+WEEKLY_HISTORY_SQL = """
+    SELECT depart_date, snapshot_at, min_price AS price, airline
+    FROM weekly_price_history
+    WHERE route_id = ?
+    ORDER BY depart_date, snapshot_at, id
+"""
+
+
+def _dumps(payload) -> bytes:
+    return json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _atomic_write(path: pathlib.Path, body: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(body)
+    os.replace(tmp, path)
+
+
+def _write_with_siblings(path: pathlib.Path, body: bytes):
+    """본문과 .gz / .br 사본을 기록한다. (gzip mtime=0 → 같은 내용이면 같은 바이트)"""
+    _atomic_write(path.with_name(path.name + ".gz"), gzip.compress(body, 9, mtime=0))
+    _atomic_write(path.with_name(path.name + ".br"), brotli.compress(body, quality=11))
+    _atomic_write(path, body)
+
+
+def week_entry(row, today) -> dict:
+    """WEEKS_SQL 행 → weeks 항목 (routes 샤드와 api.py 응답이 같은 모양)."""
+    return {
+        "depart_date": row["depart_date"],
+        "return_date": row["return_date"],
+        "min_price": row["min_price"],
+        "airline": row["airline"],
+        "flight_info": row["flight_info"],
+        "kal_price": row["kal_price"],
+        "kal_flight_info": row["kal_flight_info"],
+        "pax3_price": row["pax3_price"],
+        "updated_at": row["updated_at"],
+        "trend": trend_summary(row, today),
+    }
+
+
+def _epoch(iso_str: str) -> int:
+    return int(datetime.fromisoformat(iso_str).timestamp())
+
+
+def encode_series(entries: list[dict], airlines: dict[str, int],
+                  depart_dates: dict[str, int] | None = None) -> dict:
+    """히스토리 포인트 리스트(시간 오름차순)를 컬럼형으로 인코딩한다.
+
+    {"t": [첫 epoch초, Δ초, Δ초, ...], "p": [가격...], "a": [항공사 사전 인덱스...],
+     "d": [출발일 사전 인덱스...]}  ("d"는 depart_dates 사전을 넘긴 경우만)
+    """
+    t, p, a, d = [], [], [], []
+    prev = 0
+    for e in entries:
+        ts = _epoch(e["snapshot_at"])
+        t.append(ts - prev)
+        prev = ts
+        p.append(e["price"])
+        a.append(airlines.setdefault(e["airline"], len(airlines)))
+        if depart_dates is not None:
+            d.append(depart_dates.setdefault(e["depart_date"], len(depart_dates)))
+    series = {"t": t, "p": p, "a": a}
+    if depart_dates is not None:
+        series["d"] = d
+    return series
+
+
+def encode_history(overall: list[dict], weekly: dict[str, list[dict]]) -> dict:
+    """구간 히스토리를 HISTORY_FORMAT 샤드 페이로드로 인코딩한다."""
+    airlines: dict[str, int] = {}
+    depart_dates: dict[str, int] = {}
+    overall_series = encode_series(overall, airlines, depart_dates)
+    weekly_series = {dd: encode_series(entries, airlines) for dd, entries in weekly.items()}
+    return {
+        "format": HISTORY_FORMAT,
+        "airlines": list(airlines),
+        "depart_dates": list(depart_dates),
+        "overall_history": overall_series,
+        "weekly_history": weekly_series,
+    }
+
+
+class ShardWriter:
+    """샤드 JSON을 임시 파일에 점진적으로 기록하면서 해시를 계산한다.
+
+    commit() 시 내용 해시 파일명으로 원자적 rename — 같은 해시 파일이 이미 있으면 임시 파일만 버린다.
+    .gz / .br 사본은 해시가 새로울 때만 commit()에서 만든다 (같은 내용을 다시 압축하지 않음).
+    commit()은 압축 때문에 블로킹이므로 이벤트 루프에서는 asyncio.to_thread로 부른다.
+    예외 시 abort()로 임시 파일을 정리한다.
+    """
+
+    def __init__(self, export_dir: pathlib.Path, kind: str, key: str):
+        self.export_dir = export_dir
+        self.kind = kind
+        self.key = key
+        kind_dir = export_dir / kind
+        kind_dir.mkdir(parents=True, exist_ok=True)
+        self._tmp = kind_dir / f".{key}.json.tmp"
+        self._hash = hashlib.sha256()
+        self._f = open(self._tmp, "wb")
+
+    def write(self, s: str):
+        b = s.encode("utf-8")
+        self._hash.update(b)
+        self._f.write(b)
+
+    def dump(self, obj):
+        self.write(json.dumps(obj, ensure_ascii=False, separators=(",", ":")))
+
+    def commit(self) -> tuple[str, str, bool]:
+        """Returns: (상대 경로, 해시, 새로 기록했는지 여부)"""
+        self._f.close()
+        digest = self._hash.hexdigest()[:16]
+        rel = f"{self.kind}/{self.key}.{digest}.json"
+        path = self.export_dir / rel
+        if path.exists():
+            self._tmp.unlink()
+            return rel, digest, False
+        try:
+            _compress_siblings(self._tmp, path)
+        except Exception:
+            self._tmp.unlink(missing_ok=True)
+            raise
+        # 본문을 마지막에 rename → 본문이 있으면 사본도 있음
+        os.replace(self._tmp, path)
+        return rel, digest, True
+
+    def abort(self):
+        self._f.close()
+        self._tmp.unlink(missing_ok=True)
+
+
+def _compress_siblings(src: pathlib.Path, path: pathlib.Path, chunk_size: int = 1 << 20):
+    """src 본문을 청크 단위로 읽어 path 옆에 .gz / .br 사본을 기록한다 (임시 파일 → 원자적 rename)."""
+    gz_tmp = src.with_name(src.name + ".gz")
+    br_tmp = src.with_name(src.name + ".br")
+    try:
+        with open(src, "rb") as f, open(gz_tmp, "wb") as gz_f, open(br_tmp, "wb") as br_f:
+            br = brotli.Compressor(quality=11)
+            with gzip.GzipFile(filename="", mode="wb", compresslevel=9, fileobj=gz_f, mtime=0) as gz:
+                while chunk := f.read(chunk_size):
+                    gz.write(chunk)
+                    br_f.write(br.process(chunk))
+            br_f.write(br.finish())
+    except Exception:
+        gz_tmp.unlink(missing_ok=True)
+        br_tmp.unlink(missing_ok=True)
+        raise
+    os.replace(gz_tmp, path.with_name(path.name + ".gz"))
+    os.replace(br_tmp, path.with_name(path.name + ".br"))
+
+
+def write_shard(export_dir: pathlib.Path, kind: str, key: str, payload) -> tuple[str, str, bool]:
+    """작은 샤드를 한 번에 기록한다.
+
+    Returns:
+        (상대 경로, 해시, 새로 기록했는지 여부)
+    """
+    writer = ShardWriter(export_dir, kind, key)
+    try:
+        writer.dump(payload)
+    except Exception:
+        writer.abort()
+        raise
+    return writer.commit()
+
+
+async def _stream_history(db, writer: ShardWriter, route_id: int):
+    """구간 히스토리를 columnar-v1 포맷으로 writer에 스트리밍한다.
+
+    행은 커서에서 하나씩 StreamDownsampler로 넘긴다 — 시리즈 전체를 메모리에 올리지 않고,
+    시리즈마다 HISTORY_LIMIT 포인트 이하로 다운샘플링한다.
+    사전(airlines / depart_dates)은 시리즈를 쓰면서 채워지므로 객체 끝에 기록한다.
+    """
+    airlines: dict[str, int] = {}
+    depart_dates: dict[str, int] = {}
+
+    writer.write(f'{{"format":"{HISTORY_FORMAT}","overall_history":')
+    cursor = await db.execute(OVERALL_COUNT_SQL, (route_id,))
+    sampler = StreamDownsampler((await cursor.fetchone())[0], HISTORY_LIMIT)
+    cursor = await db.execute(OVERALL_HISTORY_SQL, (route_id,))
+    async for row in cursor:
+        sampler.add(_epoch(row["snapshot_at"]), row["price"], dict(row))
+    writer.dump(encode_series(sampler.result(), airlines, depart_dates))
+
+    writer.write(',"weekly_history":{')
+    cursor = await db.execute(WEEKLY_COUNT_SQL, (route_id,))
+    counts = {dd: n for dd, n in await cursor.fetchall()}   # 출발일 수만큼 (수십 개)
+    cursor = await db.execute(WEEKLY_HISTORY_SQL, (route_id,))
+    current_dd = None
+    sampler = None
+    first = True
+
+    def flush():
+        nonlocal first
+        if current_dd is None:
+            return
+        writer.write(("" if first else ",") + json.dumps(current_dd) + ":")
+        writer.dump(encode_series(sampler.result(), airlines))
+        first = False
+
+    async for row in cursor:
+        if row["depart_date"] != current_dd:
+            flush()
+            current_dd = row["depart_date"]
+            sampler = StreamDownsampler(counts.get(current_dd, 0), HISTORY_LIMIT)
+        sampler.add(_epoch(row["snapshot_at"]), row["price"], dict(row))
+    flush()
+
+    writer.write('},"airlines":')
+    writer.dump(list(airlines))
+    writer.write(',"depart_dates":')
+    writer.dump(list(depart_dates))
+    writer.write("}")
+
+
+def prune_shards(export_dir: pathlib.Path, referenced: set[str]) -> list[str]:
+    """매니페스트에서 참조하지 않는 샤드 파일(.gz/.br 사본 포함)을 삭제하고 삭제 목록을 반환한다."""
+    removed = []
+    for kind in SHARD_KINDS:
+        kind_dir = export_dir / kind
+        if not kind_dir.is_dir():
+            continue
+        for path in kind_dir.iterdir():
+            if path.name.startswith("."):  # 진행 중인 ShardWriter 임시 파일
+                continue
+            rel = f"{kind}/{path.name}"
+            base = rel
+            for suffix in COMPRESSED_SUFFIXES:
+                base = base.removesuffix(suffix)
+            if base not in referenced:
+                path.unlink()
+                removed.append(rel)
+    return removed
+
+
+def _load_manifest(export_dir: pathlib.Path) -> dict | None:
+    try:
+        with open(export_dir / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+async def export_data(export_dir: pathlib.Path | None = None,
+                      history_routes: set[int] | None = None) -> list[str]:
+    """DB → 샤드 + 매니페스트를 기록하고, 변경(추가/삭제)된 상대 경로 목록을 반환한다.
+
+    history_routes: 히스토리 샤드를 다시 만들 route_id 집합 (None이면 전체). 나머지 구간은 이전 매니페스트의
+    히스토리 샤드를 그대로 참조한다 (파일이 없으면 다시 만듦). routes 샤드(weeks)는 작아서 항상 다시 만든다.
+    DB 읽기는 호출한 이벤트 루프에서, 샤드 commit(압축) / 매니페스트 / 정리 같은 블로킹 파일 작업은 스레드에서.
+
+    방어 설계:
+    - 메인 쿼리(weekly_lowest) 실패 → 예외 전파 (매니페스트 미작성)
+    - 히스토리 쿼리 실패 → 경고 로그만, 해당 구간은 빈 히스토리로 정상 작성
+    - 매니페스트는 모든 샤드 commit 후 마지막에 원자적으로 교체
+    """
+    export_dir = pathlib.Path(export_dir or EXPORT_DIR)
+
+    route_labels = {r["destination"]: r["label"] for r in ALL_ROUTES}
+    route_map = {}
+
+    previous = await asyncio.to_thread(_load_manifest, export_dir)
+    previous_routes = {r["key"]: r for r in previous["routes"]} if previous else {}
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "updated_at": datetime.now(KST).isoformat(),
+        "routes": [],
+    }
+    changed = []
+    referenced = set()
+    streamed = 0
+
+    today = datetime.now(KST).date()
+
+    db = await get_db()
+    try:
+        # ── 1. 메인 데이터: weekly_lowest (실패 시 예외 전파)
+        rows = await db.execute(WEEKS_SQL.format(where=""))
+        async for row in rows:
+            key = f"{row['origin']}-{row['destination']}"
+            if key not in route_map:
+                route_map[key] = {
+                    "route_id": row["route_id"],
+                    "origin": row["origin"],
+                    "destination": row["destination"],
+                    "label": route_labels.get(row["destination"], row["destination"]),
+                    "weeks": [],
+                }
+            route_map[key]["weeks"].append(week_entry(row, today))
+
+        for key, route in route_map.items():
+            summary_path, summary_hash, summary_new = await asyncio.to_thread(
+                write_shard, export_dir, "routes", key, {"weeks": route["weeks"]}
+            )
+
+            # ── 2. 히스토리 데이터: 트리거된 구간만 다시 만든다. 실패해도 메인 데이터는 보존
+            kept = previous_routes.get(key, {}).get("history")
+            if (history_routes is not None and route["route_id"] not in history_routes
+                    and kept and kept.get("format") == HISTORY_FORMAT
+                    and (export_dir / kept["path"]).exists()):
+                history_path, history_hash, history_new = kept["path"], kept["hash"], False
+            else:
+                streamed += 1
+                writer = ShardWriter(export_dir, "history", key)
+                try:
+                    await _stream_history(db, writer, route["route_id"])
+                    history_path, history_hash, history_new = await asyncio.to_thread(writer.commit)
+                except Exception as e:
+                    writer.abort()
+                    logger.warning(f"히스토리 쿼리 실패 (빈 히스토리로 진행, {key}): {e}")
+                    history_path, history_hash, history_new = await asyncio.to_thread(
+                        write_shard, export_dir, "history", key, encode_history([], {})
+                    )
+
+            referenced.update((summary_path, history_path))
+            changed.extend(p for p, new in ((summary_path, summary_new),
+                                             (history_path, history_new)) if new)
+
+            manifest["routes"].append({
+                "key": key,
+                "origin": route["origin"],
+                "destination": route["destination"],
+                "label": route["label"],
+                "week_count": len(route["weeks"]),
+                "min_price": min(w["min_price"] for w in route["weeks"]),
+                "summary": {"path": summary_path, "hash": summary_hash},
+                "history": {"path": history_path, "hash": history_hash,
+                            "format": HISTORY_FORMAT},
+            })
+
+    finally:
+        await db.close()
+
+    # ── 3. 매니페스트 교체 + 미참조 샤드 정리
+    # 샤드 구성이 이전 매니페스트와 같으면 매니페스트(updated_at 포함)도 그대로 둔다 → 배포 no-op
+    if previous is not None and previous.get("routes") == manifest["routes"]:
+        changed.extend(await asyncio.to_thread(prune_shards, export_dir, referenced))
+        logger.info(f"export 변경 없음 ({len(manifest['routes'])}개 구간, 히스토리 {streamed}개 확인, "
+                    f"매니페스트 유지)")
+        return changed
+
+    await asyncio.to_thread(_write_with_siblings, export_dir / MANIFEST_NAME, _dumps(manifest))
+    changed.append(MANIFEST_NAME)
+    changed.extend(await asyncio.to_thread(prune_shards, export_dir, referenced))
+
+    logger.info(
+        f"export 완료 ({len(manifest['routes'])}개 구간, 히스토리 {streamed}개 확인, "
+        f"샤드 변경 {len(changed) - 1}개) → {export_dir}"
+    )
+    return changed
+
+
+class ProgressiveExporter:
+    """구간 스캔이 끝날 때마다 export(+배포)를 백그라운드에서 실행한다.
+
+    - trigger(route_ids)는 즉시 반환 — 스캐너를 막지 않는다. route_ids는 히스토리가 바뀐 구간
+      (빈 값이면 weeks만 바뀜, 예: 3인 가격). job(history_routes)에는 합친 집합을 넘긴다.
+    - 트리거 후 EXPORT_COALESCE_SECONDS 동안 들어온 트리거, 실행 중에 들어온 트리거는
+      한 번의 후속 실행으로 합친다.
+    - job은 스캔과 같은 이벤트 루프의 태스크 — DB 읽기는 aiosqlite, 파일 쓰기 / 압축은 export_data가
+      스레드로 넘기므로 스캔 루프를 막지 않는다.
+    - close()는 대기 중인 트리거가 있으면 마지막으로 한 번 더 실행한 뒤 종료한다.
+    """
+
+    def __init__(self, job, coalesce_seconds: float = EXPORT_COALESCE_SECONDS):
+        self._job = job
+        self._coalesce_seconds = coalesce_seconds
+        self._wake = asyncio.Event()
+        self._dirty = False
+        self._routes: set[int] = set()
+        self._closing = False
+        self._task = None
+        self.runs = 0
+        self.seconds = 0.0   # job 실행 시간 합계 (백그라운드, 스캔과 겹침)
+
+    def start(self):
+        self._task = asyncio.create_task(self._loop())
+
+    def trigger(self, route_ids=()):
+        self._routes.update(route_ids)
+        self._dirty = True
+        self._wake.set()
+
+    async def _loop(self):
+        while True:
+            await self._wake.wait()
+            self._wake.clear()
+            if self._dirty and not self._closing:
+                await asyncio.sleep(self._coalesce_seconds)
+            if self._dirty:
+                self._dirty = False
+                routes, self._routes = self._routes, set()
+                start = time.perf_counter()
+                try:
+                    await self._job(routes)
+                    self.runs += 1
+                except Exception as e:
+                    self._routes |= routes   # 다음 트리거 때 같이 다시 만든다
+                    logger.error(f"백그라운드 export 실패: {e}")
+                finally:
+                    self.seconds += time.perf_counter() - start
+            if self._closing and not self._dirty:
+                return
+
+    async def close(self):
+        self._closing = True
+        self._wake.set()
+        if self._task is not None:
+            await self._task
@@ -0,0 +1,216 @@
+"""항공권 가격 트래커 - 편도 조합 모드 (가는 편 / 오는 편 편도 검색 → 왕복 조합)
+
+왕복 검색은 (출발일, 귀국일) 쌍마다 1회라 패턴이 늘수록 출발일 × 귀국일로 커진다.
+편도 조합 모드는 출발일별 가는 편, 귀국일별 오는 편을 1번씩만 로드하고 대상마다 조합한다 (N × M → N + M).
+
+- parse_naver_legs: 편도 결과 페이지 → 직항 편 목록 (항공사, 출발 시각, 편도 가격)
+- index_legs: 항공사별로 출발 시각순 정렬 + 뒤에서부터의 최저가(suffix min) — 시간 조건 "HH시 이후"의
+  최저가를 이분 탐색 1번으로 찾는다
+- compose_round_trip: 항공사 키 해시 조인 (가는 편 항공사 수 + 오는 편 항공사 수에 선형).
+  parse_naver_flights와 같이 동일 항공사 왕복만 조합하고 같은 결과 형식을 반환
+- LegComposer: 파이프라인 writer가 편도 결과를 넣으면 두 편이 모두 모인 대상의 조합 결과를 돌려준다.
+  검증 대상(planner가 왕복 로드에도 넣은 대상)은 실제 왕복 결과를 기록하고 조합가는 비교용으로만 쓴다
+
+편도 합은 왕복 운임과 다를 수 있다 (왕복 할인 운임 등) — leg_checks로 차이를 추적한다.
+"""
+
+import re
+from bisect import bisect_left
+
+from planner import ScanFetch, ScanPlan, ScanTarget
+from naverparse import is_airline_name
+
+ONEWAY_PRICE_RE = re.compile(r"편도\s*([\d,]+)원")
+
+
+def parse_naver_legs(text: str, dep_code: str) -> list[dict]:
+    """편도 검색 페이지 텍스트에서 직항 편을 모두 추출한다 (시간 조건은 조합 단계에서 적용).
+
+    Returns:
+        [{"airline": str, "hour": int, "depart": "HH:MM", "arrive": "HH:MM", "price": int}, ...]
+    """
+    lines = [l.strip() for l in text.split("\n") if l.strip()]
+    depart_pat = re.compile(rf"\d{{2}}:\d{{2}}{re.escape(dep_code)}")
+
+    legs = []
+    i = 0
+    while i < len(lines):
+        # lines[i] = HH:MM{출발}, lines[i+1] = HH:MM{도착}, lines[i+2~4] = "직항, ..." (+1일 줄이 끼어들 수 있음)
+        if not depart_pat.match(lines[i]) or i + 2 >= len(lines):
+            i += 1
+            continue
+        is_direct = any(
+            "직항" in lines[i + k] and "경유" not in lines[i + k]
+            for k in range(2, 5) if i + k < len(lines)
+        )
+        if not is_direct:
+            i += 1
+            continue
+
+        airline = "기타"
+        for k in range(i - 1, max(i - 6, -1), -1):
+            if is_airline_name(lines[k]):
+                airline = lines[k]
+                break
+
+        # 가격: 15줄 내 "편도 XXX원" — 다음 편 출발 줄을 만나면 중단 (가격 없는 편)
+        price = None
+        for j in range(i + 3, min(i + 18, len(lines))):
+            if depart_pat.match(lines[j]):
+                break
+            m = ONEWAY_PRICE_RE.search(lines[j])
+            if m:
+                price = int(m.group(1).replace(",", ""))
+                break
+
+        if price:
+            legs.append({
+                "airline": airline,
+                "hour": int(lines[i][:2]),
+                "depart": lines[i][:5],
+                "arrive": lines[i + 1][:5],
+                "price": price,
+            })
+        i += 3
+
+    return legs
+
+
+def index_legs(legs: list[dict]) -> dict[str, tuple[list[int], list[dict]]]:
+    """항공사 → (출발 시각 오름차순 목록, suffix 최저가 편). suffix[k] = k번째 이후 편 중 최저가."""
+    by_airline: dict[str, list[dict]] = {}
+    for leg in legs:
+        if leg["airline"] != "기타":   # 항공사를 모르는 편은 조합하지 않는다
+            by_airline.setdefault(leg["airline"], []).append(leg)
+
+    index = {}
+    for airline, items in by_airline.items():
+        items.sort(key=lambda leg: leg["hour"])
+        suffix = items[:]
+        for k in range(len(items) - 2, -1, -1):
+            if suffix[k + 1]["price"] < suffix[k]["price"]:
+                suffix[k] = suffix[k + 1]
+        index[airline] = ([leg["hour"] for leg in items], suffix)
+    return index
+
+
+def _cheapest(entry: tuple[list[int], list[dict]], hour_from: int) -> dict | None:
+    hours, suffix = entry
+    k = bisect_left(hours, hour_from)
+    return suffix[k] if k < len(suffix) else None
+
+
+def compose_round_trip(out_index: dict, ret_index: dict, origin: str, destination: str,
+                       depart_time_from: int, return_time_from: int) -> dict | None:
+    """항공사별 (시간 조건을 만족하는 최저가 가는 편 + 오는 편) 조합 → parse_naver_flights 결과 형식."""
+    if len(ret_index) < len(out_index):
+        pairs = ((a, out_index[a], ret_index[a]) for a in ret_index if a in out_index)
+    else:
+        pairs = ((a, out_index[a], ret_index[a]) for a in out_index if a in ret_index)
+
+    results = []
+    for airline, out_entry, ret_entry in pairs:
+        out = _cheapest(out_entry, depart_time_from)
+        ret = _cheapest(ret_entry, return_time_from)
+        if out is None or ret is None:
+            continue
+        results.append({
+            "airline": airline,
+            "price": out["price"] + ret["price"],
+            "flight_info": (
+                f"{out['depart']} {origin}→{destination} {out['arrive']} / "
+                f"{ret['depart']} {destination}→{origin} {ret['arrive']}"
+            ),
+        })
+
+    if not results:
+        return None
+    best = min(results, key=lambda x: x["price"])
+    kal = min((r for r in results if "대한항공" in r["airline"]), key=lambda x: x["price"], default=None)
+    return {
+        "min_price": best["price"],
+        "airline": best["airline"],
+        "flight_info": best["flight_info"],
+        "kal_price": kal["price"] if kal else None,
+        "kal_flight_info": kal["flight_info"] if kal else None,
+        "_all_results": results,
+    }
+
+
+def _target_key(t: ScanTarget) -> tuple[int, str, str]:
+    return (t.route_id, t.depart_date, t.return_date)
+
+
+class LegComposer:
+    """편도 로드 결과를 모아 대상별 왕복 조합을 만든다 (파이프라인 writer 전용, 단일 태스크).
+
+    계획에서 두 편이 모두 선택된 대상만 조합한다 (예산으로 한 편이 빠진 대상은 다음 실행으로).
+    """
+
+    def __init__(self, plan: ScanPlan):
+        self.legs: dict[int, dict | None] = {}             # id(fetch) → index_legs 결과 (크래시면 None)
+        self.pending: dict[tuple, tuple[ScanTarget, int, int]] = {}   # 대상 → (대상, 가는 편, 오는 편)
+        self.verify: dict[tuple, ScanTarget] = {}          # 왕복 로드에도 들어 있는 대상
+        self.composed: dict[tuple, dict | None] = {}       # 검증 대상의 조합 결과
+        self.roundtrip: dict[tuple, dict | None] = {}      # 검증 대상의 왕복 결과
+
+        out_of: dict[tuple, tuple[ScanTarget, ScanFetch]] = {}
+        ret_of: dict[tuple, ScanFetch] = {}
+        roundtrip: set[tuple] = set()
+        for fetch in plan.fetches:
+            for t in fetch.targets:
+                key = _target_key(t)
+                if fetch.kind == "out":
+                    out_of[key] = (t, fetch)
+                elif fetch.kind == "ret":
+                    ret_of[key] = fetch
+                else:
+                    roundtrip.add(key)
+        for key, (target, out) in out_of.items():
+            if key in ret_of:
+                self.pending[key] = (target, id(out), id(ret_of[key]))
+                if key in roundtrip:
+                    self.verify[key] = target
+
+    def verifies(self, fetch: ScanFetch) -> bool:
+        """왕복 로드에 검증 대상이 들어 있는지 (변경 없는 페이지여도 파싱해야 비교할 수 있다)."""
+        return any(_target_key(t) in self.verify for t in fetch.targets)
+
+    def add_legs(self, fetch: ScanFetch, index: dict | None) -> list[tuple[ScanTarget, dict | None]]:
+        """편도 로드 1개의 결과(index_legs, 크래시면 None)를 넣고, 기록할 (대상, 조합 결과) 목록을 반환한다.
+
+        두 편 중 하나라도 크래시면 그 대상은 건너뛴다 (데이터 보존). 결과 없는 편은 빈 index → 결과 None.
+        """
+        self.legs[id(fetch)] = index
+        ready = []
+        for t in fetch.targets:
+            key = _target_key(t)
+            entry = self.pending.get(key)
+            if entry is None or entry[1] not in self.legs or entry[2] not in self.legs:
+                continue
+            del self.pending[key]
+            out, ret = self.legs[entry[1]], self.legs[entry[2]]
+            if out is None or ret is None:
+                continue
+            result = compose_round_trip(out, ret, t.origin, t.destination,
+                                        t.depart_time_from, t.return_time_from)
+            if key in self.verify:
+                self.composed[key] = result
+            else:
+                ready.append((entry[0], result))
+        return ready
+
+    def add_roundtrip(self, target: ScanTarget, result: dict | None):
+        """검증 대상의 실제 왕복 결과."""
+        key = _target_key(target)
+        if key in self.verify:
+            self.roundtrip[key] = result
+
+    def pop_checks(self) -> list[tuple[ScanTarget, dict | None, dict | None]]:
+        """조합 / 왕복 결과가 모두 모인 검증 대상 → [(대상, 조합 결과, 왕복 결과)] (둘 다 없으면 제외)."""
+        checks = []
+        for key in [k for k in self.composed if k in self.roundtrip]:
+            composed, roundtrip = self.composed.pop(key), self.roundtrip.pop(key)
+            if composed is not None or roundtrip is not None:
+                checks.append((self.verify[key], composed, roundtrip))
+        return checks
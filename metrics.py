@@ -0,0 +1,220 @@
+"""항공권 가격 트래커 - 실행 계측 (scan_metrics / scan_runs / Prometheus 텍스트 파일)
+
+스캔 단계별 소요 시간을 가볍게 잰다 (time.perf_counter 합산, 외부 의존성 없음).
+
+- scan_metrics: 페이지 로드(URL) 1건당 1행 — goto / wait / evaluate / archive / parse / db / sleep 시간(ms),
+  시도 횟수, 결과(ok / unchanged / no_result / crash), 받은 텍스트 바이트, 페이지 내용 해시
+- scan_runs: 실행 1회당 1행 — 시작 시 status='running'으로 넣고 종료 시 합계와 함께 갱신
+  (비정상 종료한 실행은 running으로 남는다)
+- METRICS_DIR/{mode}.prom: 마지막 실행 요약을 Prometheus 텍스트 포맷으로 기록 (node_exporter textfile collector용)
+"""
+
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import pytz
+
+from config import METRICS_DIR
+from db import get_db
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+# 페이지 로드 단계 (scan_metrics {stage}_ms 컬럼)
+FETCH_STAGES = ("goto", "wait", "evaluate", "parse", "db", "sleep", "archive")
+
+# 단계 경계 콜백 — profiling.RunProfiler가 --profile 실행 중에만 등록 (tracemalloc 스냅샷)
+boundary_hooks: list = []
+
+
+def stage_boundary(stage: str):
+    """스캔 / 브리핑의 단계 경계를 알린다 (등록된 콜백이 없으면 no-op)."""
+    for hook in list(boundary_hooks):
+        try:
+            hook(stage)
+        except Exception as e:
+            logger.warning(f"단계 경계 콜백 실패 ({stage}): {e}")
+
+
+@contextmanager
+def timed(timings: dict | None, name: str):
+    """블록 실행 시간(초)을 timings[name]에 더한다. timings가 None이면 아무것도 하지 않는다."""
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[name] = timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class RunRecorder:
+    """실행 1회의 계측 수집기.
+
+    사용:
+        recorder = RunRecorder("tracker")
+        await recorder.begin()
+        with recorder.stage("pax3"):
+            ...
+        recorder.add_fetch(url, ...)       # execute_scan_plan이 URL마다 호출
+        await recorder.finish()            # scan_runs / scan_metrics 기록 + .prom 파일
+    """
+
+    def __init__(self, mode: str):
+        self.mode = mode
+        self.run_id: int | None = None
+        self.started_at = datetime.now(KST).isoformat()
+        self._start = time.perf_counter()
+        self.stages: dict[str, float] = defaultdict(float)
+        self.counters: dict[str, int] = defaultdict(int)
+        self.plan: dict = {}
+        self._fetches: list[tuple] = []
+
+    @contextmanager
+    def stage(self, name: str):
+        with timed(self.stages, name):
+            yield
+
+    def add_stage(self, name: str, seconds: float):
+        self.stages[name] += seconds
+
+    def add_fetch(self, url: str, route_ids: list[int], depart_date: str, return_date: str,
+                  attempts: int, outcome: str, nbytes: int, timings: dict, started_at: str,
+                  content_hash: str | None = None):
+        """페이지 로드 1건의 단계별 시간을 기록하고 실행 합계에 더한다."""
+        for name in FETCH_STAGES:
+            self.stages[name] += timings.get(name, 0.0)
+        self.counters["fetches"] += 1
+        self.counters["page_loads"] += attempts
+        self.counters["retries"] += max(attempts - 1, 0)
+        self.counters[outcome] += 1
+        self.counters["bytes"] += nbytes
+        self._fetches.append((
+            url, ",".join(map(str, route_ids)), depart_date, return_date, attempts, outcome, nbytes,
+            *(round(timings.get(name, 0.0) * 1000) for name in FETCH_STAGES),
+            round(sum(timings.values()) * 1000), started_at, content_hash,
+        ))
+
+    async def begin(self):
+        """scan_runs에 running 행을 만든다. 실패해도 스캔은 계속 (계측만 생략)."""
+        try:
+            db = await get_db()
+            try:
+                cursor = await db.execute(
+                    "INSERT INTO scan_runs (mode, started_at, status) VALUES (?, ?, 'running')",
+                    (self.mode, self.started_at),
+                )
+                self.run_id = cursor.lastrowid
+                await db.commit()
+            finally:
+                await db.close()
+        except Exception as e:
+            logger.error(f"scan_runs 기록 실패 (계측 생략): {e}")
+
+    def summary(self) -> dict:
+        duration = time.perf_counter() - self._start
+        return {
+            "duration_s": round(duration, 3),
+            "stages": {k: round(v, 3) for k, v in sorted(self.stages.items())},
+            "counters": dict(sorted(self.counters.items())),
+            "plan": self.plan,
+        }
+
+    async def finish(self, status: str = "ok"):
+        """scan_runs 행을 합계로 갱신하고 scan_metrics를 일괄 기록, Prometheus 파일을 쓴다."""
+        summary = self.summary()
+        c = self.counters
+        if self.run_id is not None:
+            try:
+                db = await get_db()
+                try:
+                    await db.executemany(
+                        "INSERT INTO scan_metrics (run_id, url, route_ids, depart_date, return_date, "
+                        "attempts, outcome, bytes, goto_ms, wait_ms, evaluate_ms, parse_ms, db_ms, "
+                        "sleep_ms, archive_ms, total_ms, started_at, content_hash) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        [(self.run_id, *row) for row in self._fetches],
+                    )
+                    await db.execute(
+                        "UPDATE scan_runs SET finished_at=?, status=?, duration_s=?, "
+                        "fetches=?, page_loads=?, retries=?, no_result=?, crashes=?, bytes=?, "
+                        "stages=?, plan=? WHERE id=?",
+                        (datetime.now(KST).isoformat(), status, summary["duration_s"],
+                         c["fetches"], c["page_loads"], c["retries"], c["no_result"], c["crash"],
+                         c["bytes"], json.dumps(summary["stages"]), json.dumps(self.plan),
+                         self.run_id),
+                    )
+                    await db.commit()
+                finally:
+                    await db.close()
+            except Exception as e:
+                logger.error(f"scan_runs / scan_metrics 기록 실패: {e}")
+
+        try:
+            write_prometheus(self.mode, status, summary,
+                             os.path.join(METRICS_DIR, f"{self.mode}.prom") if METRICS_DIR else None)
+        except Exception as e:
+            logger.error(f"Prometheus 메트릭 파일 기록 실패: {e}")
+
+        stages = ", ".join(f"{k} {v:.1f}s" for k, v in summary["stages"].items())
+        logger.info(f"실행 계측 (run_id={self.run_id}): 총 {summary['duration_s']:.1f}s — {stages}")
+        return summary
+
+
+def write_prometheus(mode: str, status: str, summary: dict, path: str | None):
+    """실행 요약을 Prometheus 텍스트 포맷으로 원자적으로 기록한다 (path가 None이면 생략)."""
+    if not path:
+        return
+    labels = f'mode="{mode}"'
+    c = summary["counters"]
+    lines = [
+        "# HELP flight_tracker_last_run_timestamp_seconds 마지막 실행 종료 시각",
+        "# TYPE flight_tracker_last_run_timestamp_seconds gauge",
+        f"flight_tracker_last_run_timestamp_seconds{{{labels}}} {time.time():.0f}",
+        "# HELP flight_tracker_last_run_success 마지막 실행 성공 여부",
+        "# TYPE flight_tracker_last_run_success gauge",
+        f"flight_tracker_last_run_success{{{labels}}} {1 if status == 'ok' else 0}",
+        "# HELP flight_tracker_run_duration_seconds 마지막 실행 총 소요 시간",
+        "# TYPE flight_tracker_run_duration_seconds gauge",
+        f"flight_tracker_run_duration_seconds{{{labels}}} {summary['duration_s']}",
+        "# HELP flight_tracker_stage_seconds 마지막 실행의 단계별 소요 시간 합계",
+        "# TYPE flight_tracker_stage_seconds gauge",
+    ]
+    for stage, seconds in summary["stages"].items():
+        lines.append(f'flight_tracker_stage_seconds{{{labels},stage="{stage}"}} {seconds}')
+    lines += [
+        "# HELP flight_tracker_fetches 마지막 실행의 결과별 고유 페이지 로드 수",
+        "# TYPE flight_tracker_fetches gauge",
+    ]
+    for outcome in ("ok", "unchanged", "no_result", "crash"):
+        lines.append(f'flight_tracker_fetches{{{labels},outcome="{outcome}"}} {c.get(outcome, 0)}')
+    for name, help_text in (
+        ("page_loads", "재시도 포함 페이지 로드 수"),
+        ("retries", "재시도 수"),
+        ("bytes", "받은 페이지 텍스트 바이트"),
+    ):
+        lines += [
+            f"# HELP flight_tracker_{name} 마지막 실행의 {help_text}",
+            f"# TYPE flight_tracker_{name} gauge",
+            f"flight_tracker_{name}{{{labels}}} {c.get(name, 0)}",
+        ]
+    if summary["plan"]:
+        lines += [
+            "# HELP flight_tracker_plan 마지막 실행의 스캔 계획 규모 (대상 / 고유 / 선택 / 제외)",
+            "# TYPE flight_tracker_plan gauge",
+        ]
+    for name, value in summary["plan"].items():
+        lines.append(f'flight_tracker_plan{{{labels},kind="{name}"}} {value}')
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    os.replace(tmp, path)
@@ -0,0 +1,113 @@
+"""항공권 가격 트래커 - 네이버 검색 URL + 페이지 텍스트 로드
+
+tracker / providers / browser / pipeline / briefing이 공유하는 말단 모듈 (tracker를 import하지 않는다).
+cron은 `python tracker.py`로 실행하므로 tracker는 __main__으로 로드된다 — 라이브러리 모듈이 tracker를
+다시 import하면 모듈이 두 벌 생기고 BrowserCrashError도 서로 다른 클래스가 되어 except에 걸리지 않는다.
+"""
+
+import logging
+
+import pytz
+
+from config import NAVER_FLIGHT_URL, NAVER_ONEWAY_URL, PAGE_SETTLE_MS
+from metrics import timed
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+
+def build_url(origin: str, destination: str, depart_date: str, return_date: str,
+              adults: int = 1,
+              naver_origin: str | None = None, naver_dest: str | None = None) -> str:
+    """네이버 항공 검색 URL 생성.
+    naver_origin/naver_dest: URL에서 사용할 코드 (예: 'ICN:airport', 'HKT:city').
+    지정하지 않으면 origin/destination 그대로 사용.
+    """
+    o = naver_origin or origin
+    d = naver_dest or destination
+    url = NAVER_FLIGHT_URL.format(
+        origin=o,
+        destination=d,
+        depart_date=depart_date,
+        return_date=return_date,
+    )
+    if adults != 1:
+        url = url.replace("adult=1", f"adult={adults}")
+    return url
+
+
+def build_leg_url(origin: str, destination: str, depart_date: str,
+                  naver_origin: str | None = None, naver_dest: str | None = None) -> str:
+    """네이버 항공 편도 검색 URL 생성 (편도 조합 모드, legs.py)."""
+    return NAVER_ONEWAY_URL.format(
+        origin=naver_origin or origin,
+        destination=naver_dest or destination,
+        depart_date=depart_date,
+    )
+
+
+def fetch_url(fetch) -> str:
+    """스캔 계획의 페이지 로드 1개(planner.ScanFetch) → 검색 URL (왕복 / 편도)."""
+    if fetch.kind == "roundtrip":
+        return build_url(fetch.origin, fetch.destination, fetch.depart_date, fetch.return_date,
+                         naver_origin=fetch.naver_origin, naver_dest=fetch.naver_dest)
+    return build_leg_url(fetch.origin, fetch.destination, fetch.depart_date,
+                         naver_origin=fetch.naver_origin, naver_dest=fetch.naver_dest)
+
+
+class BrowserCrashError(Exception):
+    """Playwright 브라우저가 비정상 종료된 경우 발생 — 데이터 삭제 방지용."""
+    pass
+
+
+async def fetch_page_text(page, url: str, timings: dict | None = None, settle=None) -> str | None:
+    """네이버 항공권 검색 페이지를 열어 main 요소의 innerText를 반환한다. 실패 시 None.
+
+    브라우저 크래시는 BrowserCrashError로 올린다 (호출자가 데이터 삭제를 피하도록).
+    timings를 주면 goto / wait / evaluate 소요 시간(초)을 더한다.
+    settle(page): 로드 후 대기 방식 (기본: PAGE_SETTLE_MS 고정 대기).
+    """
+    try:
+        with timed(timings, "goto"):
+            await page.goto(url, wait_until="domcontentloaded", timeout=60000)
+        with timed(timings, "wait"):
+            if settle is None:
+                await page.wait_for_timeout(PAGE_SETTLE_MS)
+            else:
+                await settle(page)
+
+        with timed(timings, "evaluate"):
+            text = await page.evaluate(
+                '() => { const m = document.querySelector("main"); return m ? m.innerText : ""; }'
+            )
+
+        if not text or len(text) < 100:
+            logger.warning(f"텍스트 추출 실패 또는 내용 부족: {url}")
+            return None
+
+        return text
+
+    except Exception as e:
+        err_str = str(e)
+        # 브라우저 크래시 감지 — 이 경우 데이터를 삭제하면 안 됨
+        if any(kw in err_str for kw in [
+            "Target page, context or browser has been closed",
+            "Browser has been closed",
+            "browser has been disconnected",
+            "Connection closed",
+        ]):
+            raise BrowserCrashError(err_str)
+        logger.error(f"크롤링 오류 ({url}): {e}")
+        return None
+
+
+async def scrape_flights(source, url: str, origin: str, destination: str,
+                         depart_time_from: int, return_time_from: int) -> dict | None:
+    """네이버 항공권 페이지에서 항공편 정보를 크롤링한다.
+
+    source: 운임 공급자(providers.FareProvider) 또는 Playwright 페이지 (naver-browser로 감쌈).
+    """
+    from providers import as_provider
+
+    return await as_provider(source).scrape(url, origin, destination, depart_time_from, return_time_from)
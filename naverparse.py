@@ -0,0 +1,165 @@
+"""항공권 가격 트래커 - 네이버 검색 결과 페이지 파서
+
+페이지 main innerText(줄 단위) → 동일 항공사 왕복 직항 최저가. 크롤러(tracker / pipeline), 브리핑 재검증,
+페이지 아카이브 재파싱(pagestore), 편도 조합(legs — is_airline_name)이 같은 규칙을 쓴다.
+브라우저 / DB 의존 없음.
+"""
+
+import re
+
+# 파서 동작을 바꾸면 올린다 — page_state의 "변경 없는 페이지" 생략이 새 파서로 다시 파싱하도록
+PARSER_VERSION = 1
+
+# 항공사명으로 잘못 인식하면 안 되는 메타 라인
+META_KEYWORDS = {"이벤트혜택", "공동운항", "동일가", "특가확인", "알림받기"}
+
+
+def _is_meta(s: str) -> bool:
+    return any(kw in s for kw in META_KEYWORDS) or s.strip() in {"할인", " 할인"}
+
+
+def is_airline_name(s: str) -> bool:
+    """항공사명 줄인지 (메타 라인 / 숫자 / 기호가 섞인 줄 제외)."""
+    if _is_meta(s):
+        return False
+    if re.search(r"\d", s):
+        return False
+    if not re.match(r"^[가-힣a-zA-Z\s·,]+$", s):
+        return False
+    return 2 <= len(s) <= 30
+
+
+def parse_naver_flights(text: str, origin: str, destination: str,
+                        depart_time_from: int, return_time_from: int) -> dict | None:
+    """main 요소의 innerText를 줄 단위로 파싱하여 항공편 정보를 추출한다.
+
+    항공사명 → (이벤트혜택?) → HH:MMICN → HH:MMDEST → 직항, ... 패턴을 찾되
+    가는 편/오는 편 항공사가 다른 조합(혼합 예약)도 처리한다.
+
+    Returns:
+        {
+            "min_price": int,
+            "airline": str,
+            "flight_info": str,
+            "kal_price": int | None,
+            "kal_flight_info": str | None,
+        }
+    """
+    lines = [l.strip() for l in text.split("\n") if l.strip()]
+
+    depart_out_pat = re.compile(rf"\d{{2}}:\d{{2}}{re.escape(origin)}")
+    depart_ret_pat = re.compile(rf"\d{{2}}:\d{{2}}{re.escape(destination)}")
+
+    results = []
+    i = 0
+    while i < len(lines):
+        # 가는 편 출발 패턴: HH:MMICN
+        if not depart_out_pat.match(lines[i]):
+            i += 1
+            continue
+
+        # lines[i]   = HH:MMICN (가는 편 출발)
+        # lines[i+1] = HH:MMDEST (가는 편 도착)
+        # lines[i+2] = "직항, ..." or "경유..."
+        if i + 2 >= len(lines):
+            i += 1
+            continue
+
+        depart_hour = int(lines[i][:2])
+        # +1일 오버나이트 경우 i+2에 +1일 줄이 끼어들 수 있으므로 i+2~i+4 범위 확인
+        is_out_direct = any(
+            "직항" in lines[i + k] and "경유" not in lines[i + k]
+            for k in range(2, 5) if i + k < len(lines)
+        )
+
+        if not is_out_direct:
+            i += 1
+            continue
+
+        # 가는 편 직항 확인. 오는 편 출발 HH:MMDEST 탐색 (다음 15줄 내)
+        # 오는 편이 +1일 오버나이트인 경우 +1일 줄이 j+2에 끼어드므로 j+2~j+4 범위 확인
+        ret_start = None
+        for j in range(i + 3, min(i + 18, len(lines))):
+            if depart_ret_pat.match(lines[j]):
+                is_ret_direct = any(
+                    "직항" in lines[j + k] and "경유" not in lines[j + k]
+                    for k in range(2, 5) if j + k < len(lines)
+                )
+                if is_ret_direct:
+                    ret_start = j
+                    break
+
+        if ret_start is None:
+            i += 1
+            continue
+
+        return_hour = int(lines[ret_start][:2])
+
+        # 시간 조건 체크
+        if depart_hour < depart_time_from or return_hour < return_time_from:
+            i += 1
+            continue
+
+        # 항공사: lines[i] 이전을 역방향으로 탐색 (메타 라인 건너뜀)
+        airline = "기타"
+        for k in range(i - 1, max(i - 6, -1), -1):
+            if is_airline_name(lines[k]):
+                airline = lines[k]
+                break
+
+        # 동일 항공사 왕복 필터: 가는 편 도착(i+1)과 오는 편 출발(ret_start) 사이에
+        # 다른 항공사명이 있으면 혼합 조합 → 스킵
+        is_mixed = False
+        for k in range(i + 3, ret_start):
+            if is_airline_name(lines[k]) and lines[k] != airline:
+                is_mixed = True
+                break
+        if is_mixed:
+            i += 1
+            continue
+
+        # 가격 찾기: 오는 편 직항 줄 이후 15줄 내에서 "왕복 XXX원" 패턴
+        price = None
+        for j in range(ret_start + 3, min(ret_start + 18, len(lines))):
+            m = re.search(r"왕복\s*([\d,]+)원", lines[j])
+            if m:
+                price = int(m.group(1).replace(",", ""))
+                break
+
+        if not price:
+            i += 1
+            continue
+
+        flight_info = (
+            f"{lines[i][:5]} {origin}→{destination} {lines[i+1][:5]} / "
+            f"{lines[ret_start][:5]} {destination}→{origin} {lines[ret_start+1][:5]}"
+        )
+        results.append({
+            "airline": airline,
+            "price": price,
+            "flight_info": flight_info,
+        })
+
+        i = ret_start + 3  # 다음 항목으로
+
+    if not results:
+        return None
+
+    # 특정 항공사+편 검색 모드 (pax3 체크용)
+    # target_airline이 있으면 해당 항공사 결과만 반환
+    # (함수 시그니처 변경 없이 클로저로 처리 — 아래 check_pax3_prices에서 직접 파싱 호출)
+
+    # 최저가 찾기
+    best = min(results, key=lambda x: x["price"])
+
+    # KAL 찾기 (왕복 모두 대한항공인 조합 — 항공사명에 "대한항공" 포함)
+    kal = next((r for r in results if "대한항공" in r["airline"]), None)
+
+    return {
+        "min_price": best["price"],
+        "airline": best["airline"],
+        "flight_info": best["flight_info"],
+        "kal_price": kal["price"] if kal else None,
+        "kal_flight_info": kal["flight_info"] if kal else None,
+        "_all_results": results,  # pax3 체크용 전체 결과
+    }
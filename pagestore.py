@@ -0,0 +1,218 @@
+"""항공권 가격 트래커 - 원본 페이지 아카이브 (내용 주소 zstd 저장소)
+
+추출한 페이지 텍스트(main innerText)를 sha256 내용 해시로 zstd 압축 저장한다.
+같은 내용은 한 번만 저장되고, 해시는 scan_metrics.content_hash에 페이지 로드마다 남는다
+→ 파서가 깨졌을 때 원본 확인 / 새 파서로 재처리(replay)용 코퍼스.
+
+    pages/{hash[:2]}/{hash}.zst
+
+- page_archive: 해시별 1행 (url, 원본 / 저장 바이트, 처음 / 마지막으로 본 시각, 본 횟수)
+- page_state: 검색 URL별 마지막 해시 + 파싱 조건 — tracker가 같은 페이지면 파싱과 DB 기록을 생략
+  (weekly_lowest.checked_at만 갱신)
+- 보존: 마지막으로 본 지 PAGE_ARCHIVE_RETENTION_DAYS일 지난 페이지 삭제,
+  전체가 PAGE_ARCHIVE_MAX_MB를 넘으면 오래 안 본 것부터 삭제 (page_state가 가리키는 해시는 유지)
+
+    python pagestore.py stats
+    python pagestore.py show HASH
+    python pagestore.py replay --since 2026-10-01 [--url ICN-FUK]   # 보관된 페이지를 현재 파서로 재파싱
+"""
+
+import argparse
+import asyncio
+import hashlib
+import logging
+import os
+from datetime import datetime, timedelta
+
+import pytz
+import zstandard
+
+from config import (
+    PAGE_ARCHIVE_DIR, PAGE_ARCHIVE_ZSTD_LEVEL, PAGE_ARCHIVE_RETENTION_DAYS, PAGE_ARCHIVE_MAX_MB,
+)
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class PageStore:
+    """pages/ 디렉토리의 내용 주소 파일 저장소 (DB는 다루지 않음)."""
+
+    def __init__(self, root: str = PAGE_ARCHIVE_DIR, level: int = PAGE_ARCHIVE_ZSTD_LEVEL):
+        self.root = root
+        self._compressor = zstandard.ZstdCompressor(level=level)
+        self._decompressor = zstandard.ZstdDecompressor()
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.zst")
+
+    def put(self, digest: str, text: str) -> int:
+        """없으면 압축 저장한다. 저장된 파일 크기(바이트)를 반환."""
+        path = self.path(digest)
+        if os.path.exists(path):
+            return os.path.getsize(path)
+        body = self._compressor.compress(text.encode("utf-8"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(body)
+        os.replace(tmp, path)
+        return len(body)
+
+    def get(self, digest: str) -> str:
+        with open(self.path(digest), "rb") as f:
+            return self._decompressor.decompress(f.read()).decode("utf-8")
+
+    def remove(self, digest: str):
+        try:
+            os.remove(self.path(digest))
+        except FileNotFoundError:
+            pass
+
+
+async def archive_page(db, store: PageStore, url: str, text: str, seen_at: str) -> str:
+    """페이지 텍스트를 저장하고 page_archive를 갱신한다 (커밋은 호출자). 내용 해시를 반환."""
+    digest = content_hash(text)
+    stored = store.put(digest, text)
+    await record_page(db, url, digest, len(text.encode("utf-8")), stored, seen_at)
+    return digest
+
+
+async def record_page(db, url: str, digest: str, raw_bytes: int, stored_bytes: int, seen_at: str):
+    """저장된 페이지 1건을 page_archive에 기록한다 (파일 저장과 DB 기록을 다른 단계에서 할 때)."""
+    await db.execute(
+        "INSERT INTO page_archive "
+        "(content_hash, url, raw_bytes, stored_bytes, first_seen_at, last_seen_at, seen_count) "
+        "VALUES (?, ?, ?, ?, ?, ?, 1) "
+        "ON CONFLICT(content_hash) DO UPDATE SET "
+        "last_seen_at = excluded.last_seen_at, seen_count = seen_count + 1",
+        (digest, url, raw_bytes, stored_bytes, seen_at, seen_at),
+    )
+
+
+async def load_page_state(db) -> dict[str, tuple]:
+    """url → (content_hash, parse_key, results)."""
+    cursor = await db.execute("SELECT url, content_hash, parse_key, results FROM page_state")
+    return {row[0]: (row[1], row[2], row[3]) for row in await cursor.fetchall()}
+
+
+async def save_page_state(db, url: str, digest: str, parse_key: str, results: int, checked_at: str):
+    await db.execute(
+        "INSERT OR REPLACE INTO page_state (url, content_hash, parse_key, results, checked_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (url, digest, parse_key, results, checked_at),
+    )
+
+
+async def prune_page_archive(db, store: PageStore, now: datetime | None = None) -> tuple[int, int]:
+    """보존 기간 / 용량 한도를 넘은 페이지를 삭제한다. (삭제 수, 삭제 바이트) 반환."""
+    now = now or datetime.now(KST)
+    cutoff = (now - timedelta(days=PAGE_ARCHIVE_RETENTION_DAYS)).isoformat()
+    # 더 이상 스캔하지 않는 URL(지난 출발일 등)의 상태부터 정리 → 가리키던 페이지도 삭제 대상이 됨
+    await db.execute("DELETE FROM page_state WHERE checked_at < ?", (cutoff,))
+    cursor = await db.execute(
+        "SELECT a.content_hash, a.stored_bytes, a.last_seen_at < ? AS expired "
+        "FROM page_archive a "
+        "WHERE a.content_hash NOT IN (SELECT content_hash FROM page_state WHERE content_hash IS NOT NULL) "
+        "ORDER BY a.last_seen_at",
+        (cutoff,),
+    )
+    candidates = await cursor.fetchall()
+    cursor = await db.execute("SELECT COALESCE(SUM(stored_bytes), 0) FROM page_archive")
+    total = (await cursor.fetchone())[0]
+    limit = PAGE_ARCHIVE_MAX_MB * 1024 * 1024
+
+    removed = freed = 0
+    for digest, stored, expired in candidates:
+        if not expired and total <= limit:
+            break
+        store.remove(digest)
+        await db.execute("DELETE FROM page_archive WHERE content_hash = ?", (digest,))
+        total -= stored or 0
+        removed += 1
+        freed += stored or 0
+    await db.commit()
+    return removed, freed
+
+
+async def replay(since: str, url_filter: str | None = None):
+    """scan_metrics에 기록된 페이지 로드를 보관된 원본으로 재파싱해 출력한다 (DB 변경 없음)."""
+    from config import ALL_ROUTES, DEPART_TIME_FROM, RETURN_TIME_FROM
+    from db import get_db
+    from naverparse import parse_naver_flights
+
+    store = PageStore()
+    db = await get_db()
+    try:
+        cursor = await db.execute(
+            "SELECT started_at, url, route_ids, depart_date, content_hash FROM scan_metrics "
+            "WHERE started_at >= ? AND content_hash IS NOT NULL ORDER BY started_at",
+            (since,),
+        )
+        rows = await cursor.fetchall()
+    finally:
+        await db.close()
+
+    for row in rows:
+        if url_filter and url_filter not in row["url"]:
+            continue
+        try:
+            text = store.get(row["content_hash"])
+        except FileNotFoundError:
+            print(f"{row['started_at'][:16]} {row['content_hash'][:12]} (보존 기간 지나 삭제됨)")
+            continue
+        for rid in map(int, row["route_ids"].split(",")):
+            route = ALL_ROUTES[rid - 1]
+            result = parse_naver_flights(
+                text, route["origin"], route["destination"],
+                route.get("depart_time_from", DEPART_TIME_FROM),
+                route.get("return_time_from", RETURN_TIME_FROM),
+            )
+            price = f"{result['min_price']:,}원 {result['airline']}" if result else "결과 없음"
+            print(f"{row['started_at'][:16]} {row['content_hash'][:12]} "
+                  f"{route['origin']}→{route['destination']} {row['depart_date']}: {price}")
+
+
+async def print_stats():
+    from db import get_db
+
+    db = await get_db()
+    try:
+        cursor = await db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(raw_bytes), 0), COALESCE(SUM(stored_bytes), 0), "
+            "COALESCE(SUM(seen_count), 0), MIN(first_seen_at) FROM page_archive"
+        )
+        count, raw, stored, seen, first = await cursor.fetchone()
+    finally:
+        await db.close()
+    ratio = raw / stored if stored else 0
+    print(f"페이지 {count}개 (로드 {seen}회), 원본 {raw / 1048576:.1f}MB → 저장 {stored / 1048576:.1f}MB "
+          f"(×{ratio:.1f}), 가장 오래된 페이지 {first or '-'}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="원본 페이지 아카이브 조회")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("stats", help="저장 페이지 수 / 용량")
+    show = sub.add_parser("show", help="페이지 원문 출력")
+    show.add_argument("hash")
+    rp = sub.add_parser("replay", help="보관된 페이지를 현재 파서로 재파싱")
+    rp.add_argument("--since", required=True, help="scan_metrics.started_at 하한 (YYYY-MM-DD)")
+    rp.add_argument("--url", default=None, help="URL에 포함된 문자열로 필터 (예: ICN-FUK)")
+    args = parser.parse_args()
+
+    if args.command == "stats":
+        asyncio.run(print_stats())
+    elif args.command == "show":
+        print(PageStore().get(args.hash))
+    else:
+        asyncio.run(replay(args.since, args.url))
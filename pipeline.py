@@ -0,0 +1,330 @@
+"""항공권 가격 트래커 - 스캔 파이프라인 (fetch → parse → DB writer → notifier)
+
+스캔 계획(planner.ScanPlan) 실행을 단계별 태스크로 나누고 크기 제한 asyncio.Queue로 잇는다.
+브라우저 페이지는 파싱 / DB 기록 / 스냅샷·알림을 기다리지 않고 다음 페이지를 로드한다.
+
+    jobs ─▶ fetcher × N ─▶ [parse_q] ─▶ parser ─▶ [write_q] ─▶ writer ─▶ [done_q] ─▶ notifier
+              ▲                           │
+              └──────── 재시도 ───────────┘
+
+- fetcher: fetcher(공급자 / HedgedFetcher)마다 1개. 요청 간 랜덤 딜레이는 다음 로드 전에 둔다.
+  구간이 바뀌면 provider.boundary() (browser.BrowserSession의 선제 재시작 기회)
+- parser: 페이지 파일 저장(pagestore, 스레드) + 변경 없는 페이지 판정 + 대상별 파싱.
+  결과가 하나도 없으면 MAX_RETRIES까지 jobs 끝에 다시 넣는다
+- writer: 단일 DB 연결. 쌓인 결과를 최대 PIPELINE_WRITE_BATCH개씩 한 트랜잭션으로 기록
+- notifier: 구간의 마지막 페이지가 커밋되면 on_route_done(route_id) (스냅샷 / export / 알림 트리거)
+
+편도 조합 모드(legs.py): 편도 로드는 parser가 항공사별 편 목록으로 만들고, writer가 LegComposer에 넣어
+두 편이 모두 모인 대상의 조합 결과를 기록한다 (변경 없는 페이지 생략 대상 아님). 검증 대상은 왕복 결과와 비교해 leg_checks에 남긴다.
+
+역압: parse_q / write_q가 차면 앞 단계가 기다린다 (PIPELINE_QUEUE_SIZE).
+종료: 모든 job이 writer로 넘어가면(jobs.join) writer → notifier 순으로 남은 항목을 비우고 끝낸다.
+어느 단계든 예외로 죽으면 나머지를 취소하고 예외를 올린다 (커밋 전 배치는 버려짐).
+"""
+
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from config import MAX_RETRIES, REQUEST_DELAY_MIN, REQUEST_DELAY_MAX, PIPELINE_QUEUE_SIZE, PIPELINE_WRITE_BATCH
+from db import get_db, insert_leg_check
+from legs import LegComposer, index_legs, parse_naver_legs
+from metrics import RunRecorder, timed
+from naverfetch import KST, BrowserCrashError, fetch_url
+from pagestore import PageStore, content_hash, record_page, load_page_state, save_page_state
+from planner import ScanFetch, ScanPlan
+from scanrecord import record_scan_result, parse_key, parse_for_targets, touch_unchanged
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class FetchJob:
+    """검색 URL 1개의 처리 상태 — 단계 사이를 이동한다."""
+    fetch: ScanFetch
+    url: str
+    label: str
+    parse_key: str
+    previous: tuple | None            # page_state (content_hash, parse_key, results)
+    started_at: str = ""
+    attempts: int = 0
+    nbytes: int = 0
+    timings: dict = field(default_factory=dict)
+    pages: list = field(default_factory=list)    # 저장한 페이지 (hash, 원본 바이트, 저장 바이트)
+    text: str | None = None
+    digest: str | None = None
+    results: list | None = None
+    legs: dict | None = None                     # 편도 로드: index_legs 결과
+    crashed: bool = False
+    unchanged: bool = False
+
+
+class ScanPipeline:
+    def __init__(self, providers: list, plan: ScanPlan, on_route_done=None,
+                 recorder: RunRecorder | None = None, price_stats=None,
+                 queue_size: int = PIPELINE_QUEUE_SIZE, write_batch: int = PIPELINE_WRITE_BATCH):
+        self.providers = providers
+        self.plan = plan
+        self.on_route_done = on_route_done
+        self.recorder = recorder
+        self.price_stats = price_stats
+        self.write_batch = write_batch
+        self.store = PageStore()
+        self.remaining = plan.route_fetch_counts()
+        self.composer = LegComposer(plan) if any(f.kind != "roundtrip" for f in plan.fetches) else None
+
+        self.jobs: asyncio.Queue = asyncio.Queue()    # 계획 전체 + 재시도 (크기 = 계획 URL 수)
+        self.parse_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.write_q: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.done_q: asyncio.Queue = asyncio.Queue()  # 구간당 1개
+        self.db = None
+        self.stats = {
+            "targets": plan.target_count,
+            "unique": plan.unique_count,
+            "selected": len(plan.fetches),
+            "executed": 0,
+            "page_loads": 0,
+            "no_result": 0,
+            "unchanged": 0,
+            "crashed": 0,
+            "hedged": 0,
+            "hedge_wins": 0,
+            "write_batches": 0,
+            "composed": 0,
+            "leg_checks": 0,
+        }
+
+    async def run(self) -> dict:
+        hedged_before = [(getattr(p, "hedged", 0), getattr(p, "hedge_wins", 0)) for p in self.providers]
+        self.db = await get_db()
+        try:
+            page_state = await load_page_state(self.db)
+            for fetch in self.plan.fetches:
+                url = fetch_url(fetch)
+                if fetch.kind == "roundtrip":
+                    label = f"{fetch.origin}→{fetch.destination} {fetch.depart_date} ~ {fetch.return_date}"
+                    verify = self.composer is not None and self.composer.verifies(fetch)
+                    previous = None if verify else page_state.get(url)
+                else:
+                    label = f"{fetch.origin}→{fetch.destination} {fetch.depart_date} (편도)"
+                    previous = None
+                self.jobs.put_nowait(FetchJob(fetch, url, label, parse_key(fetch.targets), previous))
+
+            workers = [asyncio.create_task(self._fetch_stage(p)) for p in self.providers]
+            workers.append(asyncio.create_task(self._parse_stage()))
+            writer = asyncio.create_task(self._write_stage())
+            notifier = asyncio.create_task(self._notify_stage())
+            joined = asyncio.create_task(self.jobs.join())
+            tasks = [joined, writer, notifier, *workers]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                if joined not in done:
+                    for task in done:
+                        task.result()   # 단계 예외를 그대로 올린다
+                    raise RuntimeError("파이프라인 단계가 예기치 않게 종료됨")
+                # 모든 job이 write_q로 넘어감 → fetcher / parser는 유휴. writer, notifier 순으로 비운다
+                await self.write_q.put(None)
+                await writer
+                await self.done_q.put(None)
+                await notifier
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        finally:
+            await self.db.close()
+
+        for p, (hedged, wins) in zip(self.providers, hedged_before):
+            self.stats["hedged"] += getattr(p, "hedged", 0) - hedged
+            self.stats["hedge_wins"] += getattr(p, "hedge_wins", 0) - wins
+        return self.stats
+
+    async def _fetch_stage(self, provider):
+        first = True
+        last_routes = None
+        while True:
+            job = await self.jobs.get()
+            if last_routes is not None and job.fetch.route_ids != last_routes:
+                await provider.boundary()
+            last_routes = job.fetch.route_ids
+            if not first:
+                with timed(job.timings, "sleep"):
+                    await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
+            first = False
+
+            if job.attempts == 0:
+                job.started_at = datetime.now(KST).isoformat()
+                shared = f" (대상 {len(job.fetch.targets)}개 공유)" if len(job.fetch.targets) > 1 else ""
+                logger.info(f"스캔: {job.label}{shared}")
+            else:
+                logger.info(f"재시도 ({job.attempts}/{MAX_RETRIES}): {job.label}")
+            job.attempts += 1
+            try:
+                job.text = await provider.fetch(job.url, job.timings)
+            except BrowserCrashError as e:
+                logger.error(f"브라우저 크래시 감지 ({job.label}): {e}")
+                job.crashed = True
+            await self.parse_q.put(job)
+
+    async def _parse_stage(self):
+        while True:
+            job = await self.parse_q.get()
+            try:
+                if await self._parse(job):
+                    await self.write_q.put(job)
+                else:
+                    self.jobs.put_nowait(job)   # 재시도 — join 카운트가 0이 되기 전에 넣는다
+            finally:
+                self.jobs.task_done()
+
+    async def _parse(self, job: FetchJob) -> bool:
+        """job을 writer로 넘길지(True) 다시 로드할지(False)."""
+        if job.crashed:
+            return True
+        if job.text is not None:
+            raw = job.text.encode("utf-8")
+            job.nbytes += len(raw)
+            try:
+                with timed(job.timings, "archive"):
+                    digest = content_hash(job.text)
+                    stored = await asyncio.to_thread(self.store.put, digest, job.text)
+                job.pages.append((digest, len(raw), stored))
+                job.digest = digest
+            except Exception as e:
+                logger.error(f"페이지 아카이브 실패 (계속 진행): {e}")
+                job.digest = None
+            if job.fetch.kind != "roundtrip":
+                with timed(job.timings, "parse"):
+                    job.legs = index_legs(parse_naver_legs(job.text, job.fetch.origin))
+                if job.legs:
+                    return True
+                return job.attempts > MAX_RETRIES
+            if job.digest is not None and job.previous is not None \
+                    and job.previous[:2] == (job.digest, job.parse_key):
+                job.unchanged = True   # writer가 기존 행 확인 후 확정
+                return True
+            with timed(job.timings, "parse"):
+                job.results = parse_for_targets(job.text, job.fetch.targets)
+            if any(r is not None for r in job.results):
+                return True
+        return job.attempts > MAX_RETRIES
+
+    async def _write_stage(self):
+        while True:
+            job = await self.write_q.get()
+            if job is None:
+                return
+            batch = [job]
+            closing = False
+            while len(batch) < self.write_batch and not self.write_q.empty():
+                job = self.write_q.get_nowait()
+                if job is None:
+                    closing = True
+                    break
+                batch.append(job)
+
+            start = time.perf_counter()
+            outcomes = [await self._record(job) for job in batch]
+            await self.db.commit()
+            self.stats["write_batches"] += 1
+            share = (time.perf_counter() - start) / len(batch)
+
+            for job, outcome in zip(batch, outcomes):
+                job.text = None
+                job.timings["db"] = job.timings.get("db", 0.0) + share
+                self.stats["executed"] += 1
+                self.stats["page_loads"] += job.attempts
+                if self.recorder is not None:
+                    fetch = job.fetch
+                    self.recorder.add_fetch(job.url, fetch.route_ids, fetch.depart_date, fetch.return_date,
+                                            job.attempts, outcome, job.nbytes, job.timings, job.started_at,
+                                            job.digest)
+                for rid in job.fetch.route_ids:
+                    self.remaining[rid] -= 1
+                    if self.remaining[rid] == 0:
+                        self.done_q.put_nowait(rid)
+            if closing:
+                return
+
+    async def _record(self, job: FetchJob) -> str:
+        """job 1개를 현재 트랜잭션에 기록하고 outcome을 반환한다 (커밋은 배치 단위)."""
+        db = self.db
+        targets = job.fetch.targets
+        for digest, raw_bytes, stored_bytes in job.pages:
+            await record_page(db, job.url, digest, raw_bytes, stored_bytes, job.started_at)
+
+        if job.crashed:
+            # 브라우저 크래시 시 데이터 삭제하지 않고 스킵 (크래시 전에 받은 페이지의 아카이브 기록은 남긴다)
+            self.stats["crashed"] += 1
+            logger.warning(f"브라우저 크래시로 스캔 스킵 (데이터 보존): {job.label}")
+            if job.fetch.kind != "roundtrip":
+                self.composer.add_legs(job.fetch, None)   # 이 편이 필요한 대상도 스킵
+            return "crash"
+
+        if job.fetch.kind != "roundtrip":
+            return await self._record_legs(job)
+
+        if job.unchanged:
+            if await touch_unchanged(db, targets, job.previous[2], datetime.now(KST).isoformat()):
+                self.stats["unchanged"] += 1
+                logger.info(f"페이지 변경 없음 — 파싱 / 기록 생략: {job.label}")
+                await save_page_state(db, job.url, job.digest, job.parse_key, job.previous[2], job.started_at)
+                return "unchanged"
+            # 직전 결과 행이 사라짐 → 평소대로 파싱해 기록
+            job.results = parse_for_targets(job.text, targets)
+
+        results = job.results or [None] * len(targets)
+        outcome = "ok" if any(r is not None for r in results) else "no_result"
+        if outcome == "no_result":
+            self.stats["no_result"] += 1
+        for target, result in zip(targets, results):
+            await record_scan_result(db, target, result, self.price_stats, commit=False)
+            if self.composer is not None:
+                self.composer.add_roundtrip(target, result)
+        # 결과를 낸 페이지(마지막으로 받은 텍스트) 기준으로 기록. 아카이브 실패면 상태 유지
+        if job.digest is not None:
+            await save_page_state(db, job.url, job.digest, job.parse_key,
+                                  sum(r is not None for r in results), job.started_at)
+        await self._record_checks()
+        return outcome
+
+    async def _record_legs(self, job: FetchJob) -> str:
+        """편도 로드 1개 — 두 편이 모두 모인 대상의 조합 결과를 기록한다."""
+        outcome = "ok" if job.legs else "no_result"
+        if outcome == "no_result":
+            self.stats["no_result"] += 1
+        for target, result in self.composer.add_legs(job.fetch, job.legs or {}):
+            await record_scan_result(self.db, target, result, self.price_stats, commit=False)
+            self.stats["composed"] += 1
+        await self._record_checks()
+        return outcome
+
+    async def _record_checks(self):
+        if self.composer is None:
+            return
+        now = datetime.now(KST).isoformat()
+        for target, composed, roundtrip in self.composer.pop_checks():
+            dd = f"{target.depart_date[:4]}-{target.depart_date[4:6]}-{target.depart_date[6:]}"
+            rd = f"{target.return_date[:4]}-{target.return_date[4:6]}-{target.return_date[6:]}"
+            await insert_leg_check(self.db, target.route_id, dd, rd, composed, roundtrip, now)
+            self.stats["leg_checks"] += 1
+            c = f"{composed['min_price']:,}원" if composed else "없음"
+            r = f"{roundtrip['min_price']:,}원" if roundtrip else "없음"
+            diff = f" ({composed['min_price'] - roundtrip['min_price']:+,}원)" if composed and roundtrip else ""
+            logger.info(f"편도 조합 검증: {target.origin}→{target.destination} {dd} ~ {rd} "
+                        f"조합 {c} / 왕복 {r}{diff}")
+
+    async def _notify_stage(self):
+        while True:
+            route_id = await self.done_q.get()
+            if route_id is None:
+                return
+            if self.on_route_done is None:
+                continue
+            try:
+                await self.on_route_done(route_id)
+            except Exception as e:
+                logger.error(f"구간 완료 처리 실패 (route_id={route_id}): {e}")
@@ -0,0 +1,225 @@
+"""항공권 가격 트래커 - 스캔 계획 (패턴 전개 + 페이지 로드 중복 제거 + 요청 예산)
+
+TRIP_PATTERNS × ROUTES, SPECIAL_DATES, SPECIAL_ROUTES의 dates를 모두 (구간, 출발일, 귀국일)
+대상으로 전개한 뒤, 같은 검색 URL을 쓰는 대상을 페이지 로드 1회(ScanFetch)로 묶는다.
+로드한 페이지는 대상마다 자기 시간 조건으로 파싱해 나눠 쓴다 (tracker.execute_scan_plan).
+
+- 패턴끼리 / SPECIAL_DATES / 특별 구간 dates가 겹치면 한 번만 로드
+- 실행당 고유 페이지 로드 수를 SCAN_REQUEST_BUDGET으로 제한
+  (SCAN_STALE_HOURS 넘게 확인하지 못한 것을 오래된 순으로 먼저, 나머지는 출발일이 가까운 것, 공유 대상이 많은 것
+  우선 — 예산 밖 대상은 데이터를 건드리지 않고 다음 실행으로. 미룬 대상은 오래될수록 앞으로 온다)
+- 계획(naive / 고유 / 선택) 대비 실행 결과를 한 줄로 보고
+- 편도 조합 모드 구간(LEG_MODE / 구간 "leg_mode"): 로드가 줄어들면 대상마다 가는 편(출발일) / 오는 편(귀국일)
+  편도 로드에 넣어 날짜별로 공유하고 (legs.LegComposer가 조합), 구간당 LEG_VERIFY_PER_RUN개는 왕복 로드에도 넣어 검증
+"""
+
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+
+from config import (
+    ROUTES, SPECIAL_ROUTES, TRIP_PATTERNS, SPECIAL_DATES, SCAN_WEEKS,
+    DEPART_TIME_FROM, RETURN_TIME_FROM, SCAN_REQUEST_BUDGET, LEG_MODE, LEG_VERIFY_PER_RUN,
+)
+
+
+@dataclass
+class ScanTarget:
+    """DB에 기록할 단위 — weekly_lowest 1행 (구간 + 출발/귀국일 + 시간 조건)."""
+    route_id: int
+    origin: str
+    destination: str
+    depart_date: str          # YYYYMMDD
+    return_date: str          # YYYYMMDD
+    depart_time_from: int
+    return_time_from: int
+    sources: list[str] = field(default_factory=list)   # 이 대상을 요구한 패턴 이름들
+
+
+@dataclass
+class ScanFetch:
+    """페이지 로드 1회 — 같은 URL을 쓰는 대상 전체에 결과를 나눠 준다.
+
+    편도(kind "out" / "ret")는 그 편의 출발지 / 도착지(오는 편은 구간의 반대)와 날짜를 depart_date에 담고
+    return_date는 "". targets는 그 편이 필요한 왕복 대상들.
+    """
+    origin: str
+    destination: str
+    naver_origin: str | None
+    naver_dest: str | None
+    depart_date: str
+    return_date: str
+    targets: list[ScanTarget] = field(default_factory=list)
+    kind: str = "roundtrip"   # "roundtrip" / "out" / "ret"
+
+    @property
+    def route_ids(self) -> list[int]:
+        return sorted({t.route_id for t in self.targets})
+
+
+@dataclass
+class ScanPlan:
+    fetches: list[ScanFetch]          # 실행 순서 (구간 → 출발일)
+    skipped: list[ScanFetch]          # 예산 초과로 이번 실행에서 제외
+    target_count: int                 # 중복 제거 전 (패턴별로 따로 로드했을 때의 페이지 수)
+    budget: int
+
+    @property
+    def unique_count(self) -> int:
+        return len(self.fetches) + len(self.skipped)
+
+    def route_fetch_counts(self) -> dict[int, int]:
+        """구간별로 완료까지 남은 페이지 로드 수 (구간 완료 판정용)."""
+        counts: dict[int, int] = {}
+        for fetch in self.fetches:
+            for rid in fetch.route_ids:
+                counts[rid] = counts.get(rid, 0) + 1
+        return counts
+
+    def summary(self) -> str:
+        legs = sum(f.kind != "roundtrip" for f in self.fetches + self.skipped)
+        return (
+            f"스캔 계획: 대상 {self.target_count}개 → 고유 페이지 {self.unique_count}개 "
+            f"(중복 {self.target_count - self.unique_count}개 절감"
+            + (f", 편도 {legs}개" if legs else "") + "), "
+            f"예산 {self.budget} → 실행 {len(self.fetches)}개 / 제외 {len(self.skipped)}개"
+        )
+
+
+def pattern_dates(pattern: dict, today: date, weeks: int = SCAN_WEEKS) -> list[tuple[str, str]]:
+    """TRIP_PATTERNS 항목 1개를 오늘부터 weeks주치 (출발일, 귀국일) 쌍으로 전개한다.
+
+    오늘이 출발 요일이면 오늘부터 포함.
+    """
+    trip_length = (pattern["return_weekday"] - pattern["depart_weekday"]) % 7
+    first = today + timedelta(days=(pattern["depart_weekday"] - today.weekday()) % 7)
+    dates = []
+    for week in range(weeks):
+        depart = first + timedelta(weeks=week)
+        ret = depart + timedelta(days=trip_length)
+        dates.append((depart.strftime("%Y%m%d"), ret.strftime("%Y%m%d")))
+    return dates
+
+
+def _parse_ymd(s: str) -> date:
+    return date(int(s[:4]), int(s[4:6]), int(s[6:]))
+
+
+def expand_targets(today: date, special_only: bool = False) -> tuple[list[ScanTarget], int]:
+    """모든 패턴/특별 일정을 대상으로 전개한다. 같은 (구간, 날짜)는 1개로 합치고 출처만 누적.
+
+    (대상 목록, 합치기 전 요청 수)를 반환. 지난 출발일은 제외.
+    """
+    targets: dict[tuple[int, str, str], ScanTarget] = {}
+    count = 0
+
+    def add(route_id: int, route: dict, dep: str, ret: str, source: str):
+        nonlocal count
+        if _parse_ymd(dep) < today:
+            return
+        count += 1
+        key = (route_id, dep, ret)
+        if key not in targets:
+            targets[key] = ScanTarget(
+                route_id, route["origin"], route["destination"], dep, ret,
+                route.get("depart_time_from", DEPART_TIME_FROM),
+                route.get("return_time_from", RETURN_TIME_FROM),
+            )
+        targets[key].sources.append(source)
+
+    if not special_only:
+        for route_id, route in enumerate(ROUTES, start=1):
+            for pattern in TRIP_PATTERNS:
+                for dep, ret in pattern_dates(pattern, today):
+                    add(route_id, route, dep, ret, pattern["name"])
+            for dep, ret in SPECIAL_DATES:
+                add(route_id, route, dep, ret, "특별 일정")
+
+    offset = len(ROUTES)
+    for j, route in enumerate(SPECIAL_ROUTES, start=1):
+        for dep, ret in route.get("dates", []):
+            add(offset + j, route, dep, ret, "특별 구간")
+
+    return list(targets.values()), count
+
+
+def _checked_key(t: ScanTarget) -> tuple[int, str, str]:
+    d, r = t.depart_date, t.return_date
+    return (t.route_id, f"{d[:4]}-{d[4:6]}-{d[6:]}", f"{r[:4]}-{r[4:6]}-{r[6:]}")
+
+
+def build_scan_plan(today: date, special_only: bool = False, budget: int = SCAN_REQUEST_BUDGET,
+                    last_checked: dict[tuple[int, str, str], str] | None = None,
+                    stale_before: str = "") -> ScanPlan:
+    """대상을 페이지 로드 단위로 묶고 예산 안에서 실행할 로드를 고른다.
+
+    last_checked: (route_id, 출발일, 귀국일 — YYYY-MM-DD) → 마지막 확인 시각 (db.get_last_checked).
+    stale_before: 이 시각(ISO 문자열)보다 오래 확인하지 못한 대상이 있는 로드를 먼저 고른다.
+    둘 다 없으면 모든 로드가 같은 순위 → 출발일순.
+    """
+    last_checked = last_checked or {}
+    targets, target_count = expand_targets(today, special_only)
+
+    all_routes = ROUTES + SPECIAL_ROUTES
+    fetches: dict[tuple, ScanFetch] = {}
+
+    def add(key: tuple, t: ScanTarget, make):
+        if key not in fetches:
+            fetches[key] = make()
+        fetches[key].targets.append(t)
+
+    def add_roundtrip(t: ScanTarget, route: dict):
+        naver_origin = route.get("naver_origin")
+        naver_dest = route.get("naver_dest")
+        # 검색 URL을 결정하는 값만 키로 사용 (시간 조건은 파싱 단계에서 대상별로 적용)
+        add((naver_origin or t.origin, naver_dest or t.destination, t.depart_date, t.return_date), t,
+            lambda: ScanFetch(t.origin, t.destination, naver_origin, naver_dest, t.depart_date, t.return_date))
+
+    def add_legs(t: ScanTarget, route: dict):
+        naver_origin = route.get("naver_origin")
+        naver_dest = route.get("naver_dest")
+        no, nd = naver_origin or t.origin, naver_dest or t.destination
+        add(("out", no, nd, t.depart_date), t,
+            lambda: ScanFetch(t.origin, t.destination, naver_origin, naver_dest, t.depart_date, "", kind="out"))
+        add(("ret", nd, no, t.return_date), t,
+            lambda: ScanFetch(t.destination, t.origin, naver_dest, naver_origin, t.return_date, "", kind="ret"))
+
+    leg_targets: dict[int, list[ScanTarget]] = {}
+    for t in targets:
+        route = all_routes[t.route_id - 1]
+        if route.get("leg_mode", LEG_MODE):
+            leg_targets.setdefault(t.route_id, []).append(t)
+        else:
+            add_roundtrip(t, route)
+
+    # 편도 조합은 로드가 줄어드는 구간에만 (출발일 수 + 귀국일 수 + 검증 < 왕복 날짜 쌍 수).
+    # 출발일마다 귀국일이 1~2개뿐이면 편도가 오히려 많다
+    for route_id, ts in leg_targets.items():
+        route = all_routes[route_id - 1]
+        verify = min(LEG_VERIFY_PER_RUN, len(ts))
+        legs = len({t.depart_date for t in ts}) + len({t.return_date for t in ts})
+        if legs + verify >= len(ts):
+            for t in ts:
+                add_roundtrip(t, route)
+            continue
+        for t in ts:
+            add_legs(t, route)
+        # 검증: 대상 verify개를 날마다 돌아가며 왕복 로드에도 넣는다
+        ts.sort(key=lambda t: (t.depart_date, t.return_date))
+        start = today.toordinal() % len(ts)
+        for t in (ts + ts)[start:start + verify]:
+            add_roundtrip(t, route)
+
+    # 예산 선택: 오래 확인하지 못한 로드(대상 중 가장 오래된 확인 시각, 한 번도 확인 안 함 = "")를 오래된 순으로 먼저,
+    # (결과 없음도 target_checks에 확인 시각이 남으므로 "행 없음"이 매번 앞으로 오지 않는다)
+    # 나머지는 출발일이 가까운 순, 같으면 공유 대상이 많은 순
+    def rank(f: ScanFetch) -> tuple:
+        oldest = min(last_checked.get(_checked_key(t), "") for t in f.targets)
+        stale = not oldest or oldest < stale_before
+        return (not stale, oldest if stale else "", f.depart_date, -len(f.targets))
+
+    ranked = sorted(fetches.values(), key=rank)
+    selected, skipped = ranked[:budget], ranked[budget:]
+
+    # 실행 순서: 구간별로 모아서 (구간 완료 시점마다 스냅샷/export 가능하도록) 출발일순
+    selected.sort(key=lambda f: (f.route_ids[0], f.depart_date, f.return_date))
+    return ScanPlan(selected, skipped, target_count, budget)
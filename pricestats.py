@@ -0,0 +1,172 @@
+"""항공권 가격 트래커 - 가격 통계 (최저가 갱신 알림 유의성 판정)
+
+weekly_price_history 전체를 실행당 1회 NumPy 배열로 읽어 그룹별 통계를 한 번에 계산한다.
+행 단위 Python 루프 / 알림마다 SQL 없이 정렬 + bincount로 그룹 집계.
+
+- (구간, 출발일) 시계열: 관측 수, 역대 최저, 평균 / 표준편차
+- 구간별 출발 임박도 곡선: 출발 N주 전 버킷마다 관측 수, 중앙값(통상가), 평균 / 표준편차, 하위 ALERT_PERCENTILE%
+- 구간별 최근 PRICE_STATS_WINDOW_DAYS일 하위 ALERT_PERCENTILE% (rolling percentile)
+
+weekly_lowest는 내려가기만 하므로 같은 시계열의 역대 최저는 거의 항상 갱신된다 — "싸다"의 기준은
+같은 구간의 같은 출발 임박도 / 최근 관측 분포로 잡고, 역대 최저는 알림 근거에 덧붙이기만 한다.
+"""
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+import pytz
+
+from config import (
+    PRICE_STATS_WINDOW_DAYS, PRICE_STATS_MIN_POINTS,
+    ALERT_MIN_DROP_PCT, ALERT_MIN_DROP_WON, ALERT_SHARP_DROP_PCT, ALERT_Z_THRESHOLD,
+    ALERT_PERCENTILE,
+)
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+CURVE_MAX_WEEKS = 26   # 임박도 곡선 범위 (출발 26주 이상 전은 마지막 구간에 합침)
+SERIES_KEY_BASE = 1_000_000   # 시계열 키 = route_id × BASE + 출발일(epoch 일수)
+
+
+def _group_moments(groups: np.ndarray, values: np.ndarray, n_groups: int):
+    """그룹별 (관측 수, 평균, 표준편차). 빈 그룹은 NaN."""
+    counts = np.bincount(groups, minlength=n_groups)
+    sums = np.bincount(groups, weights=values, minlength=n_groups)
+    sq = np.bincount(groups, weights=values * values, minlength=n_groups)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        std = np.sqrt(np.maximum(sq / counts - mean ** 2, 0.0))
+    return counts, mean, std
+
+
+def group_quantile(groups: np.ndarray, values: np.ndarray, q: float, n_groups: int) -> np.ndarray:
+    """그룹별 q 분위수 (선형 보간). 값이 없는 그룹은 NaN."""
+    out = np.full(n_groups, np.nan)
+    if len(values) == 0:
+        return out
+    order = np.lexsort((values, groups))
+    v = values[order]
+    counts = np.bincount(groups, minlength=n_groups)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    has = counts > 0
+    pos = q * (counts[has] - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.ceil(pos).astype(np.int64)
+    frac = pos - lo
+    base = starts[has]
+    out[has] = v[base + lo] * (1 - frac) + v[base + hi] * frac
+    return out
+
+
+@dataclass
+class AlertDecision:
+    significant: bool
+    reason: str | None   # 알림 메시지에 붙일 근거 (예: "출발 3주 전 하위 10% · 역대 최저")
+
+
+class PriceStats:
+    """가격 통계 묶음. load()로 만들고 evaluate()로 조회한다."""
+
+    def __init__(self, route_ids, depart_dates, snapshot_at, prices, now: datetime | None = None,
+                 window_days: int = PRICE_STATS_WINDOW_DAYS):
+        """route_ids / depart_dates('YYYY-MM-DD') / snapshot_at('YYYY-MM-DDTHH:MM:SS', KST) / prices 열 배열."""
+        now = now or datetime.now(KST)
+        self.now_day = np.datetime64(now.strftime("%Y-%m-%d"), "D")
+        self.window_days = window_days
+        route_ids = np.asarray(route_ids, dtype=np.int64)
+        prices = np.asarray(prices, dtype=np.float64)
+        depart = np.asarray(depart_dates, dtype="datetime64[D]")
+        snap = np.asarray(snapshot_at, dtype="datetime64[s]")
+        self.size = len(prices)
+
+        # (구간, 출발일) 시계열
+        dep_days = depart.astype(np.int64)
+        uniq, inv = np.unique(route_ids * SERIES_KEY_BASE + dep_days, return_inverse=True)
+        n = len(uniq)
+        self.series = {(int(k // SERIES_KEY_BASE), str(np.datetime64(int(k % SERIES_KEY_BASE), "D"))): i
+                       for i, k in enumerate(uniq)}
+        self.count, self.mean, self.std = _group_moments(inv, prices, n)
+        self.low = np.full(n, np.inf)
+        np.minimum.at(self.low, inv, prices)
+
+        # 구간별 출발 임박도 곡선 (route × 출발 N주 전)
+        routes = np.unique(route_ids)
+        self.route_index = {int(r): i for i, r in enumerate(routes)}
+        route_idx = np.searchsorted(routes, route_ids)
+        weeks_out = np.clip((dep_days - snap.astype("datetime64[D]").astype(np.int64)) // 7,
+                            0, CURVE_MAX_WEEKS)
+        n_buckets = CURVE_MAX_WEEKS + 1
+        shape = (len(routes), n_buckets)
+        bucket = route_idx * n_buckets + weeks_out
+        count, mean, std = _group_moments(bucket, prices, len(routes) * n_buckets)
+        self.curve_count = count.reshape(shape)
+        self.curve_mean = mean.reshape(shape)
+        self.curve_std = std.reshape(shape)
+        self.curve_median = group_quantile(bucket, prices, 0.5, len(routes) * n_buckets).reshape(shape)
+        self.curve_pct = group_quantile(bucket, prices, ALERT_PERCENTILE / 100,
+                                        len(routes) * n_buckets).reshape(shape)
+
+        # 구간별 최근 window_days일 하위 백분위
+        recent = snap >= (np.datetime64(now.strftime("%Y-%m-%dT%H:%M:%S"), "s")
+                          - np.timedelta64(window_days, "D"))
+        self.window_count = np.bincount(route_idx[recent], minlength=len(routes))
+        self.window_pct = group_quantile(route_idx[recent], prices[recent],
+                                         ALERT_PERCENTILE / 100, len(routes))
+
+    @classmethod
+    async def load(cls, db, now: datetime | None = None) -> "PriceStats":
+        """weekly_price_history를 한 번에 읽어 통계를 만든다."""
+        cursor = await db.execute(
+            "SELECT route_id, depart_date, substr(snapshot_at, 1, 19), min_price FROM weekly_price_history "
+            "WHERE min_price IS NOT NULL"
+        )
+        rows = await cursor.fetchall()
+        if not rows:
+            return cls([], [], [], [], now)
+        route_ids, depart_dates, snapshot_at, prices = zip(*rows)
+        return cls(route_ids, depart_dates, snapshot_at, prices, now)
+
+    def weeks_out(self, depart_date: str) -> int:
+        days = int((np.datetime64(depart_date, "D") - self.now_day).astype(np.int64))
+        return min(max(days // 7, 0), CURVE_MAX_WEEKS)
+
+    def evaluate(self, route_id: int, depart_date: str, old_price: int, new_price: int) -> AlertDecision:
+        """최저가 갱신(old → new)이 알릴 만한지 판정한다."""
+        drop = old_price - new_price
+        drop_pct = drop / old_price * 100
+        if drop < ALERT_MIN_DROP_WON or drop_pct < ALERT_MIN_DROP_PCT:
+            return AlertDecision(False, None)
+
+        r = self.route_index.get(route_id)
+        w = self.weeks_out(depart_date)
+        has_curve = r is not None and self.curve_count[r, w] >= PRICE_STATS_MIN_POINTS
+        has_window = r is not None and self.window_count[r] >= PRICE_STATS_MIN_POINTS
+        i = self.series.get((route_id, depart_date))
+        new_low = i is not None and new_price < self.low[i]
+
+        if not (has_curve or has_window):
+            # 비교할 이력이 부족 — 최소 하락폭만 적용
+            return AlertDecision(True, "역대 최저" if new_low else None)
+
+        reasons = []
+        if drop_pct >= ALERT_SHARP_DROP_PCT:
+            reasons.append(f"급락 -{drop_pct:.0f}%")
+        if has_curve:
+            if new_price <= self.curve_pct[r, w]:
+                reasons.append(f"출발 {w}주 전 기준 하위 {ALERT_PERCENTILE}%")
+            if self.curve_std[r, w] > 0:
+                z = (new_price - self.curve_mean[r, w]) / self.curve_std[r, w]
+                if z <= -ALERT_Z_THRESHOLD:
+                    reasons.append(f"통상가 {self.curve_median[r, w]:,.0f}원 대비 z {z:.1f}")
+        if has_window and new_price <= self.window_pct[r]:
+            reasons.append(f"최근 {self.window_days}일 구간 하위 {ALERT_PERCENTILE}%")
+
+        if not reasons:
+            return AlertDecision(False, None)
+        if new_low:
+            reasons.append("역대 최저")
+        return AlertDecision(True, " · ".join(reasons))
@@ -0,0 +1,196 @@
+"""항공권 가격 트래커 - 실행 프로파일링 (`--profile`)
+
+tracker.py / briefing.py 실행 전체를 감싸 성능 보고에 첨부할 파일을 남긴다.
+표준 라이브러리와 `ps`만 사용한다 (추가 의존성 없음). 브라우저 RSS 샘플(sample_browser_rss)은 browser.py도 쓴다.
+
+출력 (PROFILE_DIR, 기본은 로그와 같은 /tmp):
+- {name}-{stamp}.prof          cProfile (asyncio 태스크는 모두 메인 스레드에서 돌므로 전 태스크 포함)
+- {name}-{stamp}.cpu.txt       누적 시간 상위 함수
+- {name}-{stamp}.mem.txt       단계 경계(metrics.stage_boundary)마다 tracemalloc 현재/최대 사용량, 상위 할당 위치, 직전 대비 증가분
+- {name}-{stamp}-{n}-{stage}.tracemalloc   단계별 스냅샷 원본 (tracemalloc.Snapshot.load로 분석)
+- {name}-{stamp}.rss.csv       브라우저(Chromium) 자식 프로세스 RSS 샘플
+
+백그라운드 export 스레드의 CPU 시간은 .prof에 포함되지 않는다 (scan_runs의 export 단계 시간 참고).
+"""
+
+import cProfile
+import csv
+import io
+import logging
+import os
+import pstats
+import subprocess
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+import pytz
+
+from config import PROFILE_DIR, PROFILE_RSS_INTERVAL
+import metrics
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+TRACEMALLOC_FRAMES = 10
+TOP_N = 40
+BROWSER_PROCESS_KEYWORDS = ("chrom", "headless_shell")
+
+
+def _process_table() -> list[tuple[int, int, int, str]]:
+    """(pid, ppid, rss_kb, command) 목록. macOS / Linux 공통으로 ps 사용."""
+    out = subprocess.run(
+        ["ps", "-A", "-o", "pid=,ppid=,rss=,comm="],
+        capture_output=True, text=True, check=True,
+    ).stdout
+    rows = []
+    for line in out.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) == 4:
+            rows.append((int(parts[0]), int(parts[1]), int(parts[2]), parts[3]))
+    return rows
+
+
+def sample_browser_rss(root_pid: int) -> dict:
+    """root_pid의 자손 프로세스 중 브라우저 프로세스 RSS 합계/최대/개수 (KB)."""
+    rows = _process_table()
+    children: dict[int, list] = {}
+    for row in rows:
+        children.setdefault(row[1], []).append(row)
+
+    descendants = []
+    stack = [root_pid]
+    while stack:
+        for row in children.get(stack.pop(), []):
+            descendants.append(row)
+            stack.append(row[0])
+
+    browser = [r for r in descendants
+               if any(k in r[3].lower() for k in BROWSER_PROCESS_KEYWORDS)]
+    return {
+        "browser_procs": len(browser),
+        "browser_rss_kb": sum(r[2] for r in browser),
+        "browser_max_rss_kb": max((r[2] for r in browser), default=0),
+        "children_rss_kb": sum(r[2] for r in descendants),
+    }
+
+
+class RunProfiler:
+    """with RunProfiler("tracker"): asyncio.run(main())"""
+
+    def __init__(self, name: str, out_dir: str | None = None,
+                 rss_interval: float = PROFILE_RSS_INTERVAL):
+        self.name = name
+        self.out_dir = out_dir or PROFILE_DIR
+        self.rss_interval = rss_interval
+        stamp = datetime.now(KST).strftime("%Y%m%d-%H%M%S")
+        self.prefix = os.path.join(self.out_dir, f"{name}-{stamp}")
+        self._profile = cProfile.Profile()
+        self._profiling = False
+        self._marks = 0
+        self._last_snapshot = None
+        self._mem_lines: list[str] = []
+        self._stop = threading.Event()
+        self._sampler: threading.Thread | None = None
+        self._start = 0.0
+        self.peak_browser_rss_kb = 0
+
+    def __enter__(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        self._start = time.perf_counter()
+        tracemalloc.start(TRACEMALLOC_FRAMES)
+        self._sampler = threading.Thread(target=self._sample_loop, name="rss-sampler", daemon=True)
+        self._sampler.start()
+        metrics.boundary_hooks.append(self.mark)
+        self._profile.enable()
+        self._profiling = True
+        logger.info(f"프로파일링 시작 → {self.prefix}.*")
+        return self
+
+    def __exit__(self, *exc):
+        self._profile.disable()
+        self._profiling = False
+        metrics.boundary_hooks.remove(self.mark)
+        self.mark("end")
+        tracemalloc.stop()
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join(timeout=self.rss_interval + 5)
+        self._write_cpu()
+        with open(f"{self.prefix}.mem.txt", "w", encoding="utf-8") as f:
+            f.write("\n".join(self._mem_lines) + "\n")
+        logger.info(
+            f"프로파일 저장: {self.prefix}.prof / .cpu.txt / .mem.txt / .rss.csv "
+            f"(브라우저 RSS 최대 {self.peak_browser_rss_kb / 1024:.0f}MB)"
+        )
+        return False
+
+    def mark(self, stage: str):
+        """tracemalloc 스냅샷을 저장하고 요약(현재/최대, 상위 할당, 직전 대비 증가)을 남긴다."""
+        if not tracemalloc.is_tracing():
+            return
+        # 스냅샷 비용이 CPU 프로파일에 섞이지 않도록 잠시 중단
+        if self._profiling:
+            self._profile.disable()
+        try:
+            self._snapshot(stage)
+        finally:
+            if self._profiling:
+                self._profile.enable()
+
+    def _snapshot(self, stage: str):
+        self._marks += 1
+        snapshot = tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot.dump(f"{self.prefix}-{self._marks:02d}-{stage}.tracemalloc")
+
+        elapsed = time.perf_counter() - self._start
+        lines = [f"== [{self._marks:02d}] {stage} (+{elapsed:.1f}s) "
+                 f"current {current / 1048576:.1f}MB / peak {peak / 1048576:.1f}MB"]
+        lines.append("-- top allocations")
+        for stat in snapshot.statistics("lineno")[:15]:
+            lines.append(f"   {stat}")
+        if self._last_snapshot is not None:
+            lines.append("-- growth since previous mark")
+            for stat in snapshot.compare_to(self._last_snapshot, "lineno")[:15]:
+                lines.append(f"   {stat}")
+        self._mem_lines.extend(lines + [""])
+        self._last_snapshot = snapshot
+        logger.info(f"[profile] {stage}: Python 메모리 {current / 1048576:.1f}MB (peak {peak / 1048576:.1f}MB)")
+
+    def _sample_loop(self):
+        pid = os.getpid()
+        with open(f"{self.prefix}.rss.csv", "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["time", "elapsed_s", "browser_procs", "browser_rss_kb",
+                             "browser_max_rss_kb", "children_rss_kb"])
+            while True:
+                try:
+                    s = sample_browser_rss(pid)
+                except Exception as e:
+                    logger.warning(f"RSS 샘플링 실패 (중단): {e}")
+                    return
+                self.peak_browser_rss_kb = max(self.peak_browser_rss_kb, s["browser_rss_kb"])
+                writer.writerow([
+                    datetime.now(KST).isoformat(timespec="seconds"),
+                    round(time.perf_counter() - self._start, 1),
+                    s["browser_procs"], s["browser_rss_kb"], s["browser_max_rss_kb"], s["children_rss_kb"],
+                ])
+                f.flush()
+                if self._stop.wait(self.rss_interval):
+                    return
+
+    def _write_cpu(self):
+        self._profile.dump_stats(f"{self.prefix}.prof")
+        buf = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=buf)
+        stats.sort_stats("cumulative").print_stats(TOP_N)
+        buf.write("\n")
+        stats.sort_stats("tottime").print_stats(TOP_N)
+        with open(f"{self.prefix}.cpu.txt", "w", encoding="utf-8") as f:
+            f.write(buf.getvalue())
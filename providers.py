@@ -0,0 +1,179 @@
+"""항공권 가격 트래커 - 운임 공급자 (페이지 텍스트 fetch 추상화 + 헤지 요청)
+
+공급자는 검색 URL 1개의 결과 페이지 텍스트(main innerText)를 돌려준다 — 파싱(parse_naver_flights),
+페이지 아카이브, 변경 없는 페이지 생략은 공급자와 무관하게 tracker가 그대로 처리한다.
+
+- naver-browser: 페이지 로드 후 PAGE_SETTLE_MS 고정 대기 (기존 동작)
+- naver-browser-settle: 같은 브라우저 로드지만 고정 대기 대신 네트워크가 조용해질 때까지(networkidle)만 대기,
+  최대 PAGE_SETTLE_MS. 운임 JSON을 직접 받는 공급자가 아니다 — 네이버 운임 API는 공개 규격이 없어
+  파서 / 페이지 아카이브 입력이 같은 페이지 텍스트 방식을 유지한다
+- stub: URL → 텍스트 함수 (벤치마크 / 오프라인 재현용, 지연 지정 가능)
+
+HedgedFetcher: 로드가 최근 지연의 HEDGE_PERCENTILE 분위수를 넘기면 다음 공급자(별도 페이지)로
+두 번째 시도를 띄우고 먼저 온 유효 텍스트를 쓴다 (느린 쪽은 취소) → 실행 시간이 최악이 아닌 통상 지연에 묶인다.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+
+from config import (
+    PAGE_SETTLE_MS, HEDGE_PERCENTILE, HEDGE_MIN_SAMPLES, HEDGE_WINDOW, HEDGE_DEFAULT_DELAY_S,
+)
+from naverparse import parse_naver_flights
+from naverfetch import BrowserCrashError, fetch_page_text
+
+logger = logging.getLogger(__name__)
+
+
+class FareProvider:
+    """검색 URL → 페이지 텍스트. 실패 시 None, 브라우저 크래시는 BrowserCrashError."""
+
+    name = "base"
+
+    async def fetch(self, url: str, timings: dict | None = None) -> str | None:
+        raise NotImplementedError
+
+    async def scrape(self, url: str, origin: str, destination: str,
+                     depart_time_from: int, return_time_from: int) -> dict | None:
+        text = await self.fetch(url)
+        if text is None:
+            return None
+        return parse_naver_flights(text, origin, destination, depart_time_from, return_time_from)
+
+    async def boundary(self):
+        """구간 경계 (다음 fetch가 다른 구간) — 브라우저 재시작 등 정리 기회. 기본은 no-op."""
+
+
+class NaverBrowserProvider(FareProvider):
+    name = "naver-browser"
+
+    def __init__(self, page):
+        self.page = page
+
+    async def fetch(self, url: str, timings: dict | None = None) -> str | None:
+        return await fetch_page_text(self.page, url, timings)
+
+
+async def wait_for_fares(page):
+    """운임 XHR이 끝나 네트워크가 조용해질 때까지 대기 (최대 PAGE_SETTLE_MS)."""
+    from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+    try:
+        await page.wait_for_load_state("networkidle", timeout=PAGE_SETTLE_MS)
+    except PlaywrightTimeoutError:
+        pass   # 폴링 / 분석 요청이 계속되는 페이지 — 고정 대기와 같아짐
+
+
+class NaverSettleProvider(NaverBrowserProvider):
+    name = "naver-browser-settle"
+
+    async def fetch(self, url: str, timings: dict | None = None) -> str | None:
+        return await fetch_page_text(self.page, url, timings, settle=wait_for_fares)
+
+
+class StubProvider(FareProvider):
+    """texts(url) → 텍스트 또는 None. latency_s는 초 또는 url → 초 함수."""
+
+    name = "stub"
+
+    def __init__(self, texts, latency_s=0.0):
+        self.texts = texts
+        self.latency_s = latency_s
+
+    async def fetch(self, url: str, timings: dict | None = None) -> str | None:
+        delay = self.latency_s(url) if callable(self.latency_s) else self.latency_s
+        if delay:
+            await asyncio.sleep(delay)
+        return self.texts(url)
+
+
+PROVIDERS = {
+    "naver-browser": NaverBrowserProvider,
+    "naver-browser-settle": NaverSettleProvider,
+}
+
+
+class HedgedFetcher(FareProvider):
+    """providers[0]으로 시작해 hedge_delay()마다 다음 공급자로 추가 시도, 먼저 온 유효 텍스트를 사용."""
+
+    name = "hedged"
+
+    def __init__(self, providers: list[FareProvider], percentile: float = HEDGE_PERCENTILE,
+                 min_samples: int = HEDGE_MIN_SAMPLES, window: int = HEDGE_WINDOW,
+                 default_delay_s: float = HEDGE_DEFAULT_DELAY_S):
+        self.providers = providers
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.default_delay_s = default_delay_s
+        self.latencies: deque[float] = deque(maxlen=window)
+        self.hedged = 0        # 추가 시도를 띄운 fetch 수
+        self.hedge_wins = 0    # 추가 시도가 이긴 fetch 수
+
+    def hedge_delay(self) -> float:
+        """최근 성공 로드 지연의 percentile 분위수 (표본이 적으면 기본값)."""
+        if len(self.latencies) < self.min_samples:
+            return self.default_delay_s
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+
+    async def fetch(self, url: str, timings: dict | None = None) -> str | None:
+        attempts: dict[asyncio.Task, tuple[FareProvider, dict, float]] = {}
+
+        def launch(provider: FareProvider):
+            attempt_timings: dict[str, float] = {}
+            task = asyncio.create_task(provider.fetch(url, attempt_timings))
+            attempts[task] = (provider, attempt_timings, time.perf_counter())
+
+        waiting = list(self.providers)
+        launch(waiting.pop(0))
+        pending = set(attempts)
+        winner = None
+        crash = None
+        try:
+            while pending and winner is None:
+                done, pending = await asyncio.wait(
+                    pending, timeout=self.hedge_delay() if waiting else None,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    provider = waiting.pop(0)
+                    if len(attempts) == 1:
+                        self.hedged += 1
+                    logger.info(f"헤지 요청: {provider.name} (>{self.hedge_delay():.1f}s)")
+                    launch(provider)
+                    pending = {t for t in attempts if not t.done()}
+                    continue
+                for task in done:
+                    try:
+                        text = task.result()
+                    except BrowserCrashError as e:
+                        crash = e
+                        continue
+                    if text is not None and winner is None:
+                        winner = task
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        if winner is None:
+            if crash is not None:
+                raise crash
+            return None
+
+        provider, attempt_timings, started = attempts[winner]
+        self.latencies.append(time.perf_counter() - started)
+        if winner is not next(iter(attempts)):
+            self.hedge_wins += 1
+        if timings is not None:
+            for stage, seconds in attempt_timings.items():
+                timings[stage] = timings.get(stage, 0.0) + seconds
+        return winner.result()
+
+
+def as_provider(source) -> FareProvider:
+    """공급자는 그대로, Playwright 페이지는 naver-browser 공급자로 감싼다."""
+    return source if isinstance(source, FareProvider) else NaverBrowserProvider(source)
+
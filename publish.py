@@ -0,0 +1,183 @@
+"""항공권 가격 트래커 - export 결과 배포 (publisher)
+
+export.py가 만든 EXPORT_DIR(index.json + 샤드)을 대시보드가 읽을 수 있는 곳으로 올린다.
+main 브랜치에 매시간 데이터를 커밋하면 저장소가 계속 커지므로 main에는 커밋하지 않는다.
+
+백엔드 (config.PUBLISH_BACKEND):
+- "orphan-branch": EXPORT_DIR 내용을 부모 없는 단일 커밋으로 만들어 PUBLISH_BRANCH에
+  force-push 한다. 트리 해시가 마지막 배포와 같으면 push 생략.
+- "directory": PUBLISH_DIR(정적 호스트 / 오브젝트 스토리지 동기화 대상)로 복사한다.
+  파일별 sha256을 기록해 두고 바뀐 파일만 복사, 매니페스트는 항상 마지막에 교체.
+- "none": 배포하지 않음 (로컬 export만)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import shutil
+import subprocess
+import tempfile
+from datetime import datetime
+
+import pytz
+
+from config import PUBLISH_BACKEND, PUBLISH_REMOTE, PUBLISH_BRANCH, PUBLISH_DIR
+from export import MANIFEST_NAME
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+
+def _iter_export_files(export_dir: pathlib.Path) -> list[str]:
+    """export 디렉토리의 배포 대상 상대 경로 목록 (임시 파일 제외)."""
+    files = []
+    for path in sorted(export_dir.rglob("*")):
+        if not path.is_file():
+            continue
+        if path.name.startswith(".") or path.name.endswith(".tmp"):
+            continue
+        files.append(path.relative_to(export_dir).as_posix())
+    return files
+
+
+def _is_manifest(rel: str) -> bool:
+    return rel == MANIFEST_NAME or rel.startswith(MANIFEST_NAME + ".")
+
+
+def _sha256(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+class OrphanBranchPublisher:
+    """EXPORT_DIR 스냅샷을 단일 커밋 orphan 브랜치로 force-push 한다.
+
+    현재 작업 트리/인덱스는 건드리지 않는다 (임시 GIT_INDEX_FILE 사용).
+    마지막으로 push에 성공한 커밋은 로컬 ref(refs/publish/{branch})에 기록해 두고
+    트리 해시가 같으면 push를 생략한다.
+    """
+
+    def __init__(self, repo_dir: pathlib.Path, remote: str = "origin", branch: str = "data"):
+        self.repo_dir = pathlib.Path(repo_dir)
+        self.remote = remote
+        self.branch = branch
+        self.state_ref = f"refs/publish/{branch}"
+
+    def _git(self, *args, env=None, cwd=None) -> str:
+        result = subprocess.run(
+            ["git", *args], cwd=cwd or self.repo_dir, env=env,
+            check=True, capture_output=True, text=True,
+        )
+        return result.stdout.strip()
+
+    def publish(self, export_dir: pathlib.Path) -> bool:
+        export_dir = pathlib.Path(export_dir)
+        git_dir = self._git("rev-parse", "--absolute-git-dir")
+
+        with tempfile.TemporaryDirectory() as tmp:
+            env = {**os.environ, "GIT_INDEX_FILE": os.path.join(tmp, "index")}
+            files = _iter_export_files(export_dir)
+            # 임시 인덱스에 export 파일만 올려 트리 생성 (작업 트리 .gitignore 영향 없음)
+            for i in range(0, len(files), 500):
+                self._git(f"--git-dir={git_dir}", f"--work-tree={export_dir}",
+                          "add", "-f", "--", *files[i:i + 500], env=env, cwd=export_dir)
+            tree = self._git(f"--git-dir={git_dir}", "write-tree", env=env)
+
+        try:
+            last_tree = self._git("rev-parse", "--verify", "--quiet", f"{self.state_ref}^{{tree}}")
+        except subprocess.CalledProcessError:
+            last_tree = None
+        if tree == last_tree:
+            logger.info(f"배포 변경사항 없음 ({self.branch} 트리 동일), push 생략")
+            return False
+
+        now_str = datetime.now(KST).strftime("%Y-%m-%d %H:%M KST")
+        commit = self._git("commit-tree", tree, "-m", f"data: {now_str} 가격 업데이트")
+        self._git("push", "--force", self.remote, f"{commit}:refs/heads/{self.branch}")
+        self._git("update-ref", self.state_ref, commit)
+        logger.info(f"{self.remote}/{self.branch} force-push 완료 ({commit[:8]}, {len(files)}개 파일)")
+        return True
+
+
+class DirectoryPublisher:
+    """EXPORT_DIR을 대상 디렉토리(정적 호스트 / 오브젝트 스토리지 레이아웃)로 복사한다.
+
+    대상의 .publish-state.json에 파일별 sha256을 기록해 바뀐 파일만 복사한다.
+    순서: 샤드 → 매니페스트 → 미참조 파일 삭제 (클라이언트가 없는 샤드를 참조하지 않도록).
+    """
+
+    STATE_NAME = ".publish-state.json"
+
+    def __init__(self, target_dir: pathlib.Path):
+        self.target_dir = pathlib.Path(target_dir)
+
+    def _copy(self, src: pathlib.Path, rel: str):
+        dst = self.target_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.tmp")
+        shutil.copyfile(src, tmp)
+        os.replace(tmp, dst)
+
+    def publish(self, export_dir: pathlib.Path) -> bool:
+        export_dir = pathlib.Path(export_dir)
+        state_path = self.target_dir / self.STATE_NAME
+        try:
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            state = {}
+
+        files = _iter_export_files(export_dir)
+        hashes = {rel: _sha256(export_dir / rel) for rel in files}
+        uploads = [
+            rel for rel in files
+            if state.get(rel) != hashes[rel] or not (self.target_dir / rel).exists()
+        ]
+        uploads.sort(key=_is_manifest)  # 매니페스트는 마지막
+
+        for rel in uploads:
+            self._copy(export_dir / rel, rel)
+            state[rel] = hashes[rel]
+
+        stale = [rel for rel in state if rel not in hashes]
+        for rel in stale:
+            (self.target_dir / rel).unlink(missing_ok=True)
+            del state[rel]
+
+        self.target_dir.mkdir(parents=True, exist_ok=True)
+        tmp = state_path.with_name(state_path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(state, f, ensure_ascii=False, indent=2, sort_keys=True)
+        os.replace(tmp, state_path)
+
+        if uploads or stale:
+            logger.info(f"{self.target_dir} 배포 완료 (복사 {len(uploads)}개, 삭제 {len(stale)}개)")
+            return True
+        logger.info("배포 변경사항 없음, 복사 생략")
+        return False
+
+
+class NullPublisher:
+    def publish(self, export_dir: pathlib.Path) -> bool:
+        logger.info("PUBLISH_BACKEND=none — 배포 생략")
+        return False
+
+
+def get_publisher(backend: str | None = None):
+    """config.PUBLISH_BACKEND에 맞는 publisher를 반환한다."""
+    backend = backend or PUBLISH_BACKEND
+    if backend == "orphan-branch":
+        return OrphanBranchPublisher(pathlib.Path(__file__).parent, PUBLISH_REMOTE, PUBLISH_BRANCH)
+    if backend == "directory":
+        if not PUBLISH_DIR:
+            raise ValueError("PUBLISH_BACKEND=directory 인데 PUBLISH_DIR이 비어 있음")
+        return DirectoryPublisher(PUBLISH_DIR)
+    if backend == "none":
+        return NullPublisher()
+    raise ValueError(f"알 수 없는 PUBLISH_BACKEND: {backend}")
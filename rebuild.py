@@ -0,0 +1,417 @@
+"""항공권 가격 트래커 - 파생 테이블 재구성 (scan_history → weekly_lowest / price_history / weekly_price_history)
+
+파서 버그로 잘못 기록된 scan_history 행을 지웠거나, "항공편 소멸"로 weekly_lowest 행이 삭제된 뒤
+재크롤링 없이 파생 테이블을 다시 만든다.
+
+- 구간(route) 단위로 처리 — 원본 관측을 TEMP 테이블(rebuild_scans)에 옮기고 집합 연산(윈도 함수)으로
+  한 번에 계산하므로 메모리는 구간 1개 분량으로 제한된다
+- 결과는 {table}_rebuild 섀도 테이블에 쓰고, 마지막에 한 트랜잭션으로 DROP + RENAME → 원자적 교체
+  (교체 전 실패하면 기존 테이블은 그대로)
+
+재구성 규칙 (tracker의 증분 갱신과 같은 결과가 되도록):
+- 스냅샷 시각: 기존 스냅샷 시각을 그대로 격자로 쓴다 — 관측은 1시간 안에 이어지는 첫 기존 스냅샷에
+  붙이고, 그런 스냅샷이 없는 관측만 시간(hour) 버킷(버킷 안 마지막 관측 시각)으로 묶는다
+- weekly_price_history: 주(출발/귀국일)마다 첫 관측 버킷부터 출발일까지, 각 버킷 시점의 누적 최저가
+  (항공사 / 여정은 그 최저가를 처음 기록한 관측). 같은 시간(hour)에 같은 가격 행은 한 번만 (증분 갱신과 동일)
+- price_history: 버킷마다 주별 누적 최저가 중 최저
+- weekly_lowest: 출발일이 오늘 이후인 주의 누적 최저가 + 추세(trend_*)를 관측 순서대로 재계산.
+  kal_* / pax3_price는 scan_history에 없으므로 기존 행 값을 유지. 관측이 없는 기존 행은 그대로 둔다
+- 원본 관측보다 오래된 스냅샷(scan_history 보존 기간 밖)은 그대로 유지 — --archive로 Parquet 아카이브의
+  scan_history까지 원본에 넣으면 그 기간도 재구성
+
+    python rebuild.py --dry-run        # 섀도 테이블만 만들고 비교 결과 출력 (교체 안 함)
+    python rebuild.py                  # 재구성 후 교체
+    python rebuild.py --archive        # 아카이브된 scan_history 포함
+"""
+
+import argparse
+import asyncio
+import logging
+import re
+import time
+from datetime import datetime, timedelta
+
+import pytz
+
+from db import get_db, init_db
+from trend import TREND_COLUMNS, update_trend
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+DERIVED_TABLES = ("weekly_lowest", "price_history", "weekly_price_history")
+SHADOW_SUFFIX = "_rebuild"
+ARCHIVE_BATCH_ROWS = 10000
+RUNNING_GUARD_HOURS = 3   # 이 시간 안에 시작해 아직 running인 실행이 있으면 거부 (--force로 무시)
+
+SOURCE_SQL = """
+    CREATE TEMP TABLE IF NOT EXISTS rebuild_scans (
+        route_id INTEGER, depart_date TEXT, return_date TEXT,
+        price INTEGER, airline TEXT, flight_info TEXT, scanned_at TEXT, bucket TEXT
+    );
+    CREATE INDEX IF NOT EXISTS temp.idx_rebuild_scans
+        ON rebuild_scans(depart_date, return_date, scanned_at);
+    CREATE TEMP TABLE IF NOT EXISTS rebuild_grid (snapshot_at TEXT PRIMARY KEY) WITHOUT ROWID;
+    CREATE TEMP TABLE IF NOT EXISTS rebuild_snapshots (
+        depart_date TEXT, return_date TEXT, snapshot_at TEXT,
+        min_price INTEGER, airline TEXT, flight_info TEXT, dup INTEGER
+    );
+"""
+
+WEEKLY_SNAPSHOT_COLS = "route_id, depart_date, return_date, snapshot_at, min_price, airline, flight_info"
+PRICE_SNAPSHOT_COLS = "route_id, snapshot_at, overall_min_price, airline, depart_date, flight_info"
+WEEKLY_LOWEST_COLS = ("route_id, depart_date, return_date, min_price, airline, flight_info, "
+                      "kal_price, kal_flight_info, pax3_price, updated_at, checked_at, "
+                      + ", ".join(TREND_COLUMNS))
+
+# 스냅샷 격자 = 기존 스냅샷 시각 그대로 (tracker는 두 테이블에 같은 snapshot_at을 쓴다)
+GRID_SQL = """
+    INSERT OR IGNORE INTO rebuild_grid
+    SELECT snapshot_at FROM price_history WHERE route_id = :rid AND snapshot_at >= :cutoff
+    UNION
+    SELECT snapshot_at FROM weekly_price_history WHERE route_id = :rid AND snapshot_at >= :cutoff
+"""
+
+# 관측 → 버킷: 1시간 안에 이어지는 첫 기존 스냅샷 (관측 직후 같은 실행에서 기록된 스냅샷)
+BUCKET_SQL = """
+    UPDATE rebuild_scans SET bucket = (
+        SELECT MIN(g.snapshot_at) FROM rebuild_grid g
+        WHERE g.snapshot_at >= rebuild_scans.scanned_at
+          AND julianday(substr(g.snapshot_at, 1, 19))
+              < julianday(substr(rebuild_scans.scanned_at, 1, 19)) + 1.0 / 24
+    )
+"""
+
+# 기존 스냅샷이 없는 관측만 시간 버킷으로 (버킷 안 마지막 관측 시각)
+FALLBACK_BUCKET_SQL = """
+    UPDATE rebuild_scans SET bucket = f.snapshot_at
+    FROM (
+        SELECT substr(scanned_at, 1, 13) AS h, MAX(scanned_at) AS snapshot_at
+        FROM rebuild_scans WHERE bucket IS NULL GROUP BY h
+    ) f
+    WHERE rebuild_scans.bucket IS NULL AND substr(rebuild_scans.scanned_at, 1, 13) = f.h
+"""
+
+# 주별 누적 최저가 스냅샷 — 기존 스냅샷 격자 + 관측 버킷 위에서 계산.
+# dup: 같은 주·같은 시간(hour)에 같은 가격 행이 이미 있음 (insert_weekly_price_snapshot의 중복 방지와 동일)
+SNAPSHOT_REBUILD_SQL = """
+    INSERT INTO rebuild_snapshots
+    WITH buckets AS (
+        SELECT snapshot_at FROM rebuild_grid
+        UNION
+        SELECT bucket FROM rebuild_scans
+    ),
+    obs AS (   -- 주 × 버킷 최저 관측 (bare column: MIN 행의 항공사 / 여정)
+        SELECT depart_date, return_date, bucket, MIN(price) AS price, airline, flight_info
+        FROM rebuild_scans
+        GROUP BY depart_date, return_date, bucket
+    ),
+    span AS (
+        SELECT depart_date, return_date, MIN(bucket) AS first_bucket
+        FROM obs GROUP BY depart_date, return_date
+    ),
+    filled AS (
+        SELECT s.depart_date, s.return_date, b.snapshot_at, o.price,
+               MIN(o.price) OVER w AS running_min,
+               MIN(o.price) OVER (w ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS prev_min
+        FROM span s
+        JOIN buckets b ON b.snapshot_at >= s.first_bucket AND substr(b.snapshot_at, 1, 10) <= s.depart_date
+        LEFT JOIN obs o ON o.depart_date = s.depart_date AND o.return_date = s.return_date
+                       AND o.bucket = b.snapshot_at
+        WINDOW w AS (PARTITION BY s.depart_date, s.return_date ORDER BY b.snapshot_at)
+    ),
+    marked AS (   -- 누적 최저가를 마지막으로 갱신한 버킷, 직전 버킷의 시간 / 누적 최저가
+        SELECT *, MAX(CASE WHEN price IS NOT NULL AND (prev_min IS NULL OR price < prev_min)
+                           THEN snapshot_at END) OVER w AS record_bucket,
+               substr(LAG(snapshot_at) OVER w, 1, 13) AS prev_hour,
+               LAG(running_min) OVER w AS prev_running_min
+        FROM filled
+        WINDOW w AS (PARTITION BY depart_date, return_date ORDER BY snapshot_at)
+    )
+    SELECT m.depart_date, m.return_date, m.snapshot_at, m.running_min, r.airline, r.flight_info,
+           m.prev_hour IS substr(m.snapshot_at, 1, 13) AND m.prev_running_min IS m.running_min
+    FROM marked m
+    JOIN obs r ON r.depart_date = m.depart_date AND r.return_date = m.return_date
+              AND r.bucket = m.record_bucket
+"""
+
+WEEKLY_REBUILD_SQL = f"""
+    INSERT INTO weekly_price_history{SHADOW_SUFFIX} ({WEEKLY_SNAPSHOT_COLS})
+    SELECT :rid, depart_date, return_date, snapshot_at, min_price, airline, flight_info
+    FROM rebuild_snapshots WHERE NOT dup
+    ORDER BY snapshot_at, depart_date
+"""
+
+# price_history는 중복 방지 없이 스냅샷마다 1행 — 건너뛴 주별 행도 포함해 최저를 고른다
+PRICE_REBUILD_SQL = f"""
+    INSERT INTO price_history{SHADOW_SUFFIX} ({PRICE_SNAPSHOT_COLS})
+    SELECT :rid, snapshot_at, MIN(min_price), airline, depart_date, flight_info
+    FROM rebuild_snapshots
+    GROUP BY snapshot_at
+    ORDER BY snapshot_at
+"""
+
+WEEKLY_LOWEST_REBUILD_SQL = f"""
+    INSERT INTO weekly_lowest{SHADOW_SUFFIX} (route_id, depart_date, return_date, min_price, airline,
+        flight_info, kal_price, kal_flight_info, pax3_price, updated_at, checked_at)
+    SELECT :rid, s.depart_date, s.return_date, s.min_price, s.airline, s.flight_info,
+           w.kal_price, w.kal_flight_info, w.pax3_price, s.updated_at,
+           MAX(c.checked_at, COALESCE(w.checked_at, ''))
+    FROM (
+        SELECT depart_date, return_date, MIN(price) AS min_price, airline, flight_info,
+               scanned_at AS updated_at
+        FROM rebuild_scans WHERE depart_date >= :today
+        GROUP BY depart_date, return_date
+    ) s
+    JOIN (
+        SELECT depart_date, return_date, MAX(scanned_at) AS checked_at
+        FROM rebuild_scans GROUP BY depart_date, return_date
+    ) c ON c.depart_date = s.depart_date AND c.return_date = s.return_date
+    LEFT JOIN weekly_lowest w
+        ON w.route_id = :rid AND w.depart_date = s.depart_date AND w.return_date = s.return_date
+    ORDER BY s.depart_date
+"""
+
+
+async def _table_ddl(db, table: str) -> tuple[str, list[str]]:
+    """(CREATE TABLE 문, CREATE INDEX 문 목록) — 마이그레이션으로 추가된 컬럼 포함."""
+    cursor = await db.execute("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    table_sql = (await cursor.fetchone())[0]
+    cursor = await db.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL", (table,)
+    )
+    return table_sql, [row[0] for row in await cursor.fetchall()]
+
+
+async def _create_shadows(db):
+    for table in DERIVED_TABLES:
+        table_sql, _ = await _table_ddl(db, table)
+        shadow = table + SHADOW_SUFFIX
+        await db.execute(f"DROP TABLE IF EXISTS {shadow}")
+        await db.execute(re.sub(rf'^CREATE TABLE\s+"?{table}"?', f"CREATE TABLE {shadow}", table_sql, count=1))
+    await db.commit()
+
+
+async def _drop_shadows(db):
+    for table in DERIVED_TABLES:
+        await db.execute(f"DROP TABLE IF EXISTS {table}{SHADOW_SUFFIX}")
+    await db.commit()
+
+
+async def _load_source(db, route_id: int, include_archive: bool) -> int:
+    """구간 1개의 원본 관측을 rebuild_scans에 채운다. 행 수를 반환."""
+    await db.execute("DELETE FROM rebuild_scans")
+    await db.execute("DELETE FROM rebuild_grid")
+    await db.execute("DELETE FROM rebuild_snapshots")
+    await db.execute(
+        "INSERT INTO rebuild_scans "
+        "SELECT route_id, depart_date, return_date, price, airline, flight_info, scanned_at, NULL "
+        "FROM scan_history WHERE route_id = ? AND price IS NOT NULL",
+        (route_id,),
+    )
+    if include_archive:
+        from archive import scan_archive
+
+        cols = ["route_id", "depart_date", "return_date", "price", "airline", "flight_info", "scanned_at"]
+        table = await asyncio.to_thread(scan_archive, "scan_history", [route_id], None, cols)
+        for batch in table.to_batches(ARCHIVE_BATCH_ROWS):
+            await db.executemany(
+                "INSERT INTO rebuild_scans VALUES (?, ?, ?, ?, ?, ?, ?, NULL)",
+                zip(*(batch.column(c).to_pylist() for c in cols)),
+            )
+        await db.execute("DELETE FROM rebuild_scans WHERE price IS NULL")
+    cursor = await db.execute("SELECT COUNT(*) FROM rebuild_scans")
+    return (await cursor.fetchone())[0]
+
+
+async def _copy_rows(db, table: str, cols: str, where: str, params: dict):
+    """기존 테이블 행을 섀도 테이블로 그대로 옮긴다 (id는 새로 부여, 시간순 유지)."""
+    order = "depart_date" if table == "weekly_lowest" else "snapshot_at, id"
+    await db.execute(
+        f"INSERT INTO {table}{SHADOW_SUFFIX} ({cols}) SELECT {cols} FROM {table} WHERE {where} ORDER BY {order}",
+        params,
+    )
+
+
+async def _rebuild_trends(db, route_id: int, today: str) -> int:
+    """rebuild_scans 관측을 주별 시간순으로 흘려 trend_*를 다시 계산한다 (주 1개 상태만 유지)."""
+    cursor = await db.execute(
+        "SELECT depart_date, return_date, price, scanned_at FROM rebuild_scans "
+        "WHERE depart_date >= ? ORDER BY depart_date, return_date, scanned_at",
+        (today,),
+    )
+    updates = []
+    key, state = None, None
+    async for dd, rd, price, scanned_at in cursor:
+        if (dd, rd) != key:
+            if key is not None:
+                updates.append((*(state[c] for c in TREND_COLUMNS), route_id, *key))
+            key, state = (dd, rd), None
+        state = update_trend(state, price, scanned_at)
+    if key is not None:
+        updates.append((*(state[c] for c in TREND_COLUMNS), route_id, *key))
+
+    trend_set = ", ".join(f"{c} = ?" for c in TREND_COLUMNS)
+    await db.executemany(
+        f"UPDATE weekly_lowest{SHADOW_SUFFIX} SET {trend_set} "
+        "WHERE route_id = ? AND depart_date = ? AND return_date = ?",
+        updates,
+    )
+    return len(updates)
+
+
+async def _rebuild_route(db, route_id: int, today: str, include_archive: bool) -> dict:
+    source = await _load_source(db, route_id, include_archive)
+    params = {"rid": route_id, "today": today}
+
+    if source == 0:
+        # 원본 관측이 없는 구간 — 기존 행 유지
+        await _copy_rows(db, "weekly_lowest", WEEKLY_LOWEST_COLS, "route_id = :rid", params)
+        await _copy_rows(db, "weekly_price_history", WEEKLY_SNAPSHOT_COLS, "route_id = :rid", params)
+        await _copy_rows(db, "price_history", PRICE_SNAPSHOT_COLS, "route_id = :rid", params)
+        await db.commit()
+        return {"source": 0, "cutoff": None, "trends": 0}
+
+    cursor = await db.execute("SELECT MIN(scanned_at) FROM rebuild_scans")
+    params["cutoff"] = (await cursor.fetchone())[0]
+
+    # 원본 관측보다 오래된 스냅샷은 그대로, 이후는 재구성
+    await _copy_rows(db, "weekly_price_history", WEEKLY_SNAPSHOT_COLS,
+                     "route_id = :rid AND snapshot_at < :cutoff", params)
+    await db.execute(GRID_SQL, params)
+    await db.execute(BUCKET_SQL)
+    await db.execute(FALLBACK_BUCKET_SQL)
+    await db.execute(SNAPSHOT_REBUILD_SQL)
+    await db.execute(WEEKLY_REBUILD_SQL, params)
+    await _copy_rows(db, "price_history", PRICE_SNAPSHOT_COLS,
+                     "route_id = :rid AND snapshot_at < :cutoff", params)
+    await db.execute(PRICE_REBUILD_SQL, params)
+
+    await db.execute(WEEKLY_LOWEST_REBUILD_SQL, params)
+    trends = await _rebuild_trends(db, route_id, today)
+    # 관측이 없는 기존 행(예: 보존 기간 내내 변경 없던 페이지)은 그대로
+    await _copy_rows(
+        db, "weekly_lowest", WEEKLY_LOWEST_COLS,
+        "route_id = :rid AND depart_date >= :today AND NOT EXISTS ("
+        "SELECT 1 FROM rebuild_scans s WHERE s.depart_date = weekly_lowest.depart_date "
+        "AND s.return_date = weekly_lowest.return_date)",
+        params,
+    )
+    await db.commit()
+    return {"source": source, "cutoff": params["cutoff"], "trends": trends}
+
+
+async def compare(db) -> dict:
+    """기존 / 섀도 테이블 행 수와 weekly_lowest 최저가 차이."""
+    result = {}
+    for table in DERIVED_TABLES:
+        counts = []
+        for name in (table, table + SHADOW_SUFFIX):
+            cursor = await db.execute(f"SELECT COUNT(*) FROM {name}")
+            counts.append((await cursor.fetchone())[0])
+        result[table] = tuple(counts)
+    cursor = await db.execute(
+        f"SELECT COUNT(*) FROM weekly_lowest w JOIN weekly_lowest{SHADOW_SUFFIX} s "
+        "ON s.route_id = w.route_id AND s.depart_date = w.depart_date AND s.return_date = w.return_date "
+        "WHERE s.min_price != w.min_price"
+    )
+    result["price_changed"] = (await cursor.fetchone())[0]
+    cursor = await db.execute(
+        f"SELECT COUNT(*) FROM weekly_lowest{SHADOW_SUFFIX} s WHERE NOT EXISTS ("
+        "SELECT 1 FROM weekly_lowest w WHERE s.route_id = w.route_id "
+        "AND s.depart_date = w.depart_date AND s.return_date = w.return_date)"
+    )
+    result["restored"] = (await cursor.fetchone())[0]
+    return result
+
+
+async def _swap(db):
+    """섀도 테이블을 한 트랜잭션으로 교체한다 (DDL도 트랜잭션 안에서 원자적)."""
+    indexes = []
+    for table in DERIVED_TABLES:
+        indexes.extend((await _table_ddl(db, table))[1])
+    await db.execute("BEGIN IMMEDIATE")
+    try:
+        for table in DERIVED_TABLES:
+            await db.execute(f"DROP TABLE {table}")
+            await db.execute(f"ALTER TABLE {table}{SHADOW_SUFFIX} RENAME TO {table}")
+        for sql in indexes:
+            await db.execute(sql)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+
+async def _check_not_running(db):
+    since = (datetime.now(KST) - timedelta(hours=RUNNING_GUARD_HOURS)).isoformat()
+    cursor = await db.execute(
+        "SELECT id, mode, started_at FROM scan_runs WHERE status = 'running' AND started_at >= ?", (since,)
+    )
+    running = await cursor.fetchone()
+    if running is not None:
+        raise RuntimeError(
+            f"실행 중인 스캔이 있음 (run_id={running['id']}, {running['mode']}, {running['started_at']}) — "
+            "끝난 뒤 다시 실행하거나 --force"
+        )
+
+
+async def rebuild(dry_run: bool = False, include_archive: bool = False, force: bool = False) -> dict:
+    """파생 테이블을 재구성한다. dry_run이면 비교 결과만 반환하고 섀도 테이블을 지운다."""
+    await init_db()
+    start = time.perf_counter()
+    today = datetime.now(KST).date().isoformat()
+
+    db = await get_db()
+    try:
+        if not force:
+            await _check_not_running(db)
+        await db.executescript(SOURCE_SQL)
+        await _create_shadows(db)
+        try:
+            cursor = await db.execute("SELECT id FROM routes ORDER BY id")
+            route_ids = [row[0] for row in await cursor.fetchall()]
+            # routes에 없는 route_id의 행도 보존
+            for table in DERIVED_TABLES:
+                cursor = await db.execute(f"SELECT DISTINCT route_id FROM {table}")
+                route_ids += [row[0] for row in await cursor.fetchall() if row[0] not in route_ids]
+
+            for route_id in route_ids:
+                stats = await _rebuild_route(db, route_id, today, include_archive)
+                logger.info(f"route_id={route_id}: 관측 {stats['source']}건"
+                            + (f" (≥ {stats['cutoff'][:16]}), 추세 {stats['trends']}개 주" if stats["source"] else
+                               " — 기존 행 유지"))
+
+            result = await compare(db)
+            if dry_run:
+                await _drop_shadows(db)
+            else:
+                await _swap(db)
+        except Exception:
+            await _drop_shadows(db)
+            raise
+    finally:
+        await db.close()
+
+    result["seconds"] = round(time.perf_counter() - start, 2)
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
+    parser = argparse.ArgumentParser(description="scan_history로 파생 테이블 재구성")
+    parser.add_argument("--dry-run", action="store_true", help="교체하지 않고 비교 결과만 출력")
+    parser.add_argument("--archive", action="store_true", help="Parquet 아카이브의 scan_history도 원본에 포함")
+    parser.add_argument("--force", action="store_true", help="실행 중인 스캔이 있어도 진행")
+    args = parser.parse_args()
+
+    result = asyncio.run(rebuild(dry_run=args.dry_run, include_archive=args.archive, force=args.force))
+    for table in DERIVED_TABLES:
+        before, after = result[table]
+        print(f"{table}: {before:,} → {after:,}행")
+    print(f"weekly_lowest 최저가 변경 {result['price_changed']}개, 복구 {result['restored']}개 "
+          f"({result['seconds']}s{', dry-run — 교체 안 함' if args.dry_run else ''})")
@@ -0,0 +1,117 @@
+"""항공권 가격 트래커 - 스캔 결과 기록 (scan_history / weekly_lowest / alert_outbox)
+
+파이프라인 writer(pipeline.py)가 페이지 로드 결과를 대상별로 나눠 기록할 때 쓰는 함수들:
+
+- record_scan_result: 대상 1개 결과 기록 (결과 없음 → weekly_lowest 삭제, 최저가 갱신 → 알림 outbox 적재)
+- parse_for_targets: 페이지 텍스트 1개를 대상별 시간 조건으로 파싱
+- parse_key / touch_unchanged: 변경 없는 페이지 생략 (pagestore.page_state의 파싱 조건, checked_at만 갱신)
+"""
+
+import logging
+from datetime import datetime
+
+import pytz
+
+from db import insert_scan, update_weekly_lowest, touch_weekly_lowest, enqueue_alert, mark_target_checked
+from naverparse import PARSER_VERSION, parse_naver_flights
+from planner import ScanTarget
+
+logger = logging.getLogger(__name__)
+
+KST = pytz.timezone("Asia/Seoul")
+
+
+async def record_scan_result(db, target: ScanTarget, result: dict | None, price_stats=None,
+                             commit: bool = True):
+    """대상 1개의 스캔 결과를 scan_history / weekly_lowest / alert_outbox에 기록한다.
+
+    result가 None이면 항공편 소멸로 보고 기존 weekly_lowest 행을 삭제한다.
+    최저가 갱신 알림은 alert_outbox에 적재만 한다 (전송은 alerts.AlertDispatcher가 구간별로 묶어서).
+    price_stats(pricestats.PriceStats)를 주면 통계적으로 의미 있는 하락만 적재한다.
+    commit=False면 커밋은 호출자가 한다 (여러 결과를 한 트랜잭션으로 묶는 파이프라인 writer).
+    """
+    route_id = target.route_id
+    dd_fmt = f"{target.depart_date[:4]}-{target.depart_date[4:6]}-{target.depart_date[6:]}"
+    rd_fmt = f"{target.return_date[:4]}-{target.return_date[4:6]}-{target.return_date[6:]}"
+    now = datetime.now(KST).isoformat()
+    # 결과 없음도 확인 시각은 남긴다 — weekly_lowest 행이 지워져도 스캔 예산에서 "미확인"으로 보지 않도록
+    await mark_target_checked(db, route_id, dd_fmt, rd_fmt, now)
+
+    if result is None:
+        logger.warning(f"결과 없음: {target.origin}→{target.destination} {dd_fmt}")
+        # 기존 weekly_lowest 데이터가 있으면 삭제 (크롤러가 데이터 관리 담당)
+        existing = await db.execute(
+            "SELECT id FROM weekly_lowest WHERE route_id=? AND depart_date=? AND return_date=?",
+            (route_id, dd_fmt, rd_fmt)
+        )
+        if await existing.fetchone():
+            await db.execute(
+                "DELETE FROM weekly_lowest WHERE route_id=? AND depart_date=? AND return_date=?",
+                (route_id, dd_fmt, rd_fmt)
+            )
+            logger.info(f"weekly_lowest 삭제: {target.origin}→{target.destination} {dd_fmt} (항공편 소멸)")
+        if commit:
+            await db.commit()
+        return
+
+    # scan_history 저장
+    await insert_scan(
+        db, route_id, dd_fmt, rd_fmt,
+        result["min_price"], result["airline"],
+        result["flight_info"], now,
+    )
+
+    # weekly_lowest 갱신
+    price_change = await update_weekly_lowest(
+        db, route_id, dd_fmt, rd_fmt,
+        result["min_price"], result["airline"], result["flight_info"],
+        result["kal_price"], result["kal_flight_info"], now,
+    )
+
+    # 최저가 갱신 시 알림 outbox 적재 (기존 대비 갱신된 경우만) — weekly_lowest와 같은 트랜잭션
+    if price_change is not None:
+        old_price, new_price = price_change
+        notify, reason = old_price is not None, None
+        if notify and price_stats is not None:
+            decision = price_stats.evaluate(route_id, dd_fmt, old_price, new_price)
+            notify, reason = decision.significant, decision.reason
+            if not notify:
+                logger.info(f"알림 생략 (유의하지 않은 하락): {target.origin}→{target.destination} "
+                            f"{dd_fmt} {old_price:,}원 → {new_price:,}원")
+        if notify:
+            await enqueue_alert(
+                db, route_id, dd_fmt, rd_fmt, old_price, new_price,
+                result["airline"], result["flight_info"], now, reason=reason,
+            )
+
+    if commit:
+        await db.commit()
+
+
+def parse_key(targets: list[ScanTarget]) -> str:
+    """페이지 파싱 결과를 결정하는 조건 (파서 버전 + 대상별 시간 조건)."""
+    conds = sorted(f"{t.route_id}:{t.depart_time_from}:{t.return_time_from}" for t in targets)
+    return f"v{PARSER_VERSION}|" + ",".join(conds)
+
+
+async def touch_unchanged(db, targets: list[ScanTarget], expected: int, checked_at: str) -> bool:
+    """변경 없는 페이지 — 대상 행의 checked_at(+ target_checks)만 갱신. 직전 결과 수만큼 행이 남아 있지 않으면 False."""
+    touched = 0
+    for t in targets:
+        dd = f"{t.depart_date[:4]}-{t.depart_date[4:6]}-{t.depart_date[6:]}"
+        rd = f"{t.return_date[:4]}-{t.return_date[4:6]}-{t.return_date[6:]}"
+        touched += await touch_weekly_lowest(db, t.route_id, dd, rd, checked_at)
+        await mark_target_checked(db, t.route_id, dd, rd, checked_at)
+    return touched >= expected
+
+
+def parse_for_targets(text: str, targets: list[ScanTarget]) -> list[dict | None]:
+    """페이지 텍스트 1개를 대상별 시간 조건으로 파싱한다 (같은 조건은 1번만 파싱)."""
+    cache: dict[tuple, dict | None] = {}
+    results = []
+    for t in targets:
+        key = (t.origin, t.destination, t.depart_time_from, t.return_time_from)
+        if key not in cache:
+            cache[key] = parse_naver_flights(text, *key)
+        results.append(cache[key])
+    return results
@@ -3,492 +3,65 @@
 import argparse
 import asyncio
 import random
-import re
-import subprocess
-import urllib.request
-import urllib.error
-import json as _json
-import ssl as _ssl
 import logging
 from datetime import datetime, timedelta
 
-import pytz
-from playwright.async_api import async_playwright
-
 from config import (
-    ROUTES, TRIP_PATTERNS, SCAN_WEEKS, SPECIAL_DATES, SPECIAL_ROUTES, ALL_ROUTES,
-    NAVER_FLIGHT_URL, REQUEST_DELAY_MIN, REQUEST_DELAY_MAX, MAX_RETRIES,
-    DISCORD_CHANNEL_ID, DEPART_TIME_FROM, RETURN_TIME_FROM, HEADLESS,
+    ALL_ROUTES, REQUEST_DELAY_MIN, REQUEST_DELAY_MAX,
+    DISCORD_CHANNEL_ID, DEPART_TIME_FROM, RETURN_TIME_FROM, HEADLESS, EXPORT_DIR,
+    PUBLISH_BACKEND, PROFILE_DIR, SCAN_FETCHERS, SCAN_STALE_HOURS,
 )
-from db import (init_db, get_db, insert_scan, update_weekly_lowest,
-                insert_price_snapshot, insert_weekly_price_snapshot)
+from db import init_db, get_db, insert_price_snapshot, insert_weekly_price_snapshot, get_last_checked
+from metrics import RunRecorder, stage_boundary
+from naverfetch import KST, BrowserCrashError, build_url, scrape_flights
+from planner import ScanPlan, build_scan_plan
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s [%(levelname)s] %(message)s",
-)
+# import 시점에는 상수만 준비한다. Playwright / pyarrow / aiohttp 등 무거운 모듈과 Discord 토큰은
+# 실제로 쓰는 함수 안에서 불러온다 (briefing.py, 파서만 쓰는 도구가 비용을 치르지 않도록).
 logger = logging.getLogger(__name__)
 
-KST = pytz.timezone("Asia/Seoul")
-
-DESTINATION_LABELS = {r["destination"]: r["label"] for r in ALL_ROUTES}
-
-
-def generate_scan_dates() -> list[tuple[str, str]]:
-    """금요일 출발 → 일요일 귀국, 12주치 날짜 쌍을 생성한다."""
-    today = datetime.now(KST).date()
-    dates = []
 
-    for pattern in TRIP_PATTERNS:
-        depart_wd = pattern["depart_weekday"]
-        return_wd = pattern["return_weekday"]
-        trip_length = (return_wd - depart_wd) % 7
+async def execute_scan_plan(source, plan: ScanPlan, on_route_done=None,
+                            recorder: RunRecorder | None = None, price_stats=None) -> dict:
+    """스캔 계획을 실행한다. 페이지를 1번 로드해 묶인 대상 모두에 결과를 기록한다.
 
-        # 가장 가까운 출발 요일 찾기
-        days_ahead = (depart_wd - today.weekday()) % 7
-        if days_ahead == 0 and today.weekday() == depart_wd:
-            # 오늘이 출발 요일이면 포함
-            next_depart = today
-        else:
-            next_depart = today + timedelta(days=days_ahead)
-
-        # 이미 지난 날짜면 다음 주로
-        if next_depart < today:
-            next_depart += timedelta(days=7)
-
-        for week in range(SCAN_WEEKS):
-            depart = next_depart + timedelta(weeks=week)
-            ret = depart + timedelta(days=trip_length)
-            dates.append((depart.strftime("%Y%m%d"), ret.strftime("%Y%m%d")))
-
-    # 특별 일정 추가 (과거 날짜 제외, 중복 제외)
-    existing = set(dates)
-    for dep, ret in SPECIAL_DATES:
-        from datetime import date
-        dep_date = date(int(dep[:4]), int(dep[4:6]), int(dep[6:]))
-        if dep_date >= today and (dep, ret) not in existing:
-            dates.append((dep, ret))
-
-    return dates
-
-
-def build_url(origin: str, destination: str, depart_date: str, return_date: str,
-              adults: int = 1,
-              naver_origin: str | None = None, naver_dest: str | None = None) -> str:
-    """네이버 항공 검색 URL 생성.
-    naver_origin/naver_dest: URL에서 사용할 코드 (예: 'ICN:airport', 'HKT:city').
-    지정하지 않으면 origin/destination 그대로 사용.
+    source: 운임 공급자(providers.FareProvider / HedgedFetcher) 또는 Playwright 페이지, 또는 그 목록
+    (목록이면 fetcher마다 동시에 로드). 실행은 pipeline.ScanPipeline — fetch / 파싱 / DB 기록 / 구간 완료 처리가
+    단계별 태스크로 겹쳐 돌아 페이지가 DB·알림 작업을 기다리지 않는다.
+    on_route_done(route_id): 해당 구간의 마지막 페이지 결과가 커밋되면 await (스냅샷/export/알림 트리거).
+    recorder를 주면 URL별 단계 소요 시간(goto / wait / evaluate / archive / parse / db / sleep)을 기록한다.
+    price_stats: 실행 시작 시 1회 계산한 가격 통계 (알림 유의성 판정, scanrecord.record_scan_result로 전달).
+    페이지 텍스트는 pagestore로 보관하고, 직전 실행과 내용 / 파싱 조건이 같으면
+    파싱과 scan_history / weekly_lowest 기록을 생략한다 (weekly_lowest.checked_at만 갱신).
+    반환: 계획 대비 실행 통계 dict.
     """
-    o = naver_origin or origin
-    d = naver_dest or destination
-    url = NAVER_FLIGHT_URL.format(
-        origin=o,
-        destination=d,
-        depart_date=depart_date,
-        return_date=return_date,
-    )
-    if adults != 1:
-        url = url.replace("adult=1", f"adult={adults}")
-    return url
-
+    from pipeline import ScanPipeline
+    from providers import as_provider
 
-def load_discord_bot_token() -> str:
-    """openclaw config get은 민감값을 redacted 할 수 있어 설정 파일에서 직접 읽는다."""
-    try:
-        with open("/Users/yeon/.openclaw/openclaw.json", "r", encoding="utf-8") as f:
-            cfg = _json.load(f)
-        token = cfg["channels"]["discord"]["token"].strip()
-        if not token:
-            raise ValueError("Discord token is empty")
-        return token
-    except Exception as e:
-        raise RuntimeError(f"Discord token 로드 실패: {e}")
-
-
-DISCORD_BOT_TOKEN = load_discord_bot_token()
-
-
-def send_discord(message: str):
-    """Discord REST API로 메시지를 전송한다."""
-    url = f"https://discord.com/api/v10/channels/{DISCORD_CHANNEL_ID}/messages"
-    payload = _json.dumps({"content": message}).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=payload,
-        headers={
-            "Authorization": f"Bot {DISCORD_BOT_TOKEN}",
-            "Content-Type": "application/json",
-            "User-Agent": "mc-mini-flight-tracker/1.0",
-        },
-        method="POST",
-    )
-    ssl_ctx = _ssl.create_default_context()
-    ssl_ctx.check_hostname = False
-    ssl_ctx.verify_mode = _ssl.CERT_NONE
-    try:
-        with urllib.request.urlopen(req, timeout=30, context=ssl_ctx) as resp:
-            if resp.status in (200, 201):
-                logger.info("Discord 알림 전송 완료")
-            else:
-                logger.error(f"Discord 전송 실패: HTTP {resp.status}")
-    except urllib.error.HTTPError as e:
-        logger.error(f"Discord 전송 실패: HTTP {e.code} {e.read().decode()}")
-    except Exception as e:
-        logger.error(f"Discord 전송 실패: {e}")
-
-
-def format_price_alert(destination: str, depart_date: str, return_date: str,
-                       old_price, new_price: int, airline: str, flight_info: str,
-                       overall_min: int | None = None,
-                       overall_min_date: str | None = None) -> str:
-    """최저가 갱신 즉시 알림 메시지를 생성한다."""
-    label = DESTINATION_LABELS.get(destination, destination)
-    dd = datetime.strptime(depart_date, "%Y-%m-%d")
-    rd = datetime.strptime(return_date, "%Y-%m-%d")
-    weekdays_kr = ["월", "화", "수", "목", "금", "토", "일"]
-    dd_str = f"{dd.month:02d}/{dd.day:02d}({weekdays_kr[dd.weekday()]})"
-    rd_str = f"{rd.month:02d}/{rd.day:02d}({weekdays_kr[rd.weekday()]})"
-
-    lines = [f"🚨 최저가 갱신! 인천 → {label}"]
-    lines.append(f"📅 {dd_str} → {rd_str}")
-
-    if old_price is not None:
-        diff_pct = (new_price - old_price) / old_price * 100
-        lines.append(f"이전: {old_price:,}원 → 현재: {new_price:,}원 ({diff_pct:+.1f}%)")
-    else:
-        lines.append(f"현재: {new_price:,}원")
+    sources = source if isinstance(source, list) else [source]
+    pipeline = ScanPipeline([as_provider(s) for s in sources], plan, on_route_done=on_route_done,
+                            recorder=recorder, price_stats=price_stats)
+    return await pipeline.run()
 
-    lines.append(f"항공사: {airline}")
 
-    # flight_info에서 가는 편/오는 편 파싱
-    if " / " in flight_info:
-        out_leg, ret_leg = flight_info.split(" / ", 1)
-        lines.append(f"↗ 가는편: {out_leg.strip()}")
-        lines.append(f"↙ 오는편: {ret_leg.strip()}")
-    else:
-        lines.append(flight_info)
-
-    # 전체 최저가 표시
-    if overall_min is not None:
-        if overall_min_date:
-            omd = datetime.strptime(overall_min_date, "%Y-%m-%d")
-            omd_str = f"{omd.month:02d}/{omd.day:02d}({weekdays_kr[omd.weekday()]})"
-            lines.append(f"📊 구간 전체 최저가: {overall_min:,}원 ({omd_str} 출발)")
-        else:
-            lines.append(f"📊 구간 전체 최저가: {overall_min:,}원")
-
-    return "\n".join(lines)
-
-
-def parse_naver_flights(text: str, origin: str, destination: str,
-                        depart_time_from: int, return_time_from: int) -> dict | None:
-    """main 요소의 innerText를 줄 단위로 파싱하여 항공편 정보를 추출한다.
-
-    항공사명 → (이벤트혜택?) → HH:MMICN → HH:MMDEST → 직항, ... 패턴을 찾되
-    가는 편/오는 편 항공사가 다른 조합(혼합 예약)도 처리한다.
+async def cleanup_past_dates():
+    """오늘 이전 날짜의 weekly_lowest 행을 삭제하고, 30일 이상 된 scan_history를 정리한다.
+    원본 페이지 아카이브도 보존 기간 / 용량 한도에 맞춰 정리한다.
 
-    Returns:
-        {
-            "min_price": int,
-            "airline": str,
-            "flight_info": str,
-            "kal_price": int | None,
-            "kal_flight_info": str | None,
-        }
+    삭제 전 archive.py로 Parquet 아카이브에 옮긴다. 아카이브 실패 시 삭제를 건너뛴다(데이터 보존).
     """
-    # 항공사명으로 잘못 인식하면 안 되는 메타 라인
-    META_KEYWORDS = {"이벤트혜택", "공동운항", "동일가", "특가확인", "알림받기"}
-
-    def is_meta(s: str) -> bool:
-        return any(kw in s for kw in META_KEYWORDS) or s.strip() in {"할인", " 할인"}
-
-    def is_airline_name(s: str) -> bool:
-        if is_meta(s):
-            return False
-        if re.search(r"\d", s):
-            return False
-        if not re.match(r"^[가-힣a-zA-Z\s·,]+$", s):
-            return False
-        return 2 <= len(s) <= 30
-
-    lines = [l.strip() for l in text.split("\n") if l.strip()]
-
-    depart_out_pat = re.compile(rf"\d{{2}}:\d{{2}}{re.escape(origin)}")
-    depart_ret_pat = re.compile(rf"\d{{2}}:\d{{2}}{re.escape(destination)}")
-
-    results = []
-    i = 0
-    while i < len(lines):
-        # 가는 편 출발 패턴: HH:MMICN
-        if not depart_out_pat.match(lines[i]):
-            i += 1
-            continue
-
-        # lines[i]   = HH:MMICN (가는 편 출발)
-        # lines[i+1] = HH:MMDEST (가는 편 도착)
-        # lines[i+2] = "직항, ..." or "경유..."
-        if i + 2 >= len(lines):
-            i += 1
-            continue
-
-        depart_hour = int(lines[i][:2])
-        # +1일 오버나이트 경우 i+2에 +1일 줄이 끼어들 수 있으므로 i+2~i+4 범위 확인
-        is_out_direct = any(
-            "직항" in lines[i + k] and "경유" not in lines[i + k]
-            for k in range(2, 5) if i + k < len(lines)
-        )
-
-        if not is_out_direct:
-            i += 1
-            continue
-
-        # 가는 편 직항 확인. 오는 편 출발 HH:MMDEST 탐색 (다음 15줄 내)
-        # 오는 편이 +1일 오버나이트인 경우 +1일 줄이 j+2에 끼어드므로 j+2~j+4 범위 확인
-        ret_start = None
-        for j in range(i + 3, min(i + 18, len(lines))):
-            if depart_ret_pat.match(lines[j]):
-                is_ret_direct = any(
-                    "직항" in lines[j + k] and "경유" not in lines[j + k]
-                    for k in range(2, 5) if j + k < len(lines)
-                )
-                if is_ret_direct:
-                    ret_start = j
-                    break
-
-        if ret_start is None:
-            i += 1
-            continue
-
-        return_hour = int(lines[ret_start][:2])
-
-        # 시간 조건 체크
-        if depart_hour < depart_time_from or return_hour < return_time_from:
-            i += 1
-            continue
-
-        # 항공사: lines[i] 이전을 역방향으로 탐색 (메타 라인 건너뜀)
-        airline = "기타"
-        for k in range(i - 1, max(i - 6, -1), -1):
-            if is_airline_name(lines[k]):
-                airline = lines[k]
-                break
-
-        # 동일 항공사 왕복 필터: 가는 편 도착(i+1)과 오는 편 출발(ret_start) 사이에
-        # 다른 항공사명이 있으면 혼합 조합 → 스킵
-        is_mixed = False
-        for k in range(i + 3, ret_start):
-            if is_airline_name(lines[k]) and lines[k] != airline:
-                is_mixed = True
-                break
-        if is_mixed:
-            i += 1
-            continue
-
-        # 가격 찾기: 오는 편 직항 줄 이후 15줄 내에서 "왕복 XXX원" 패턴
-        price = None
-        for j in range(ret_start + 3, min(ret_start + 18, len(lines))):
-            m = re.search(r"왕복\s*([\d,]+)원", lines[j])
-            if m:
-                price = int(m.group(1).replace(",", ""))
-                break
-
-        if not price:
-            i += 1
-            continue
-
-        flight_info = (
-            f"{lines[i][:5]} {origin}→{destination} {lines[i+1][:5]} / "
-            f"{lines[ret_start][:5]} {destination}→{origin} {lines[ret_start+1][:5]}"
-        )
-        results.append({
-            "airline": airline,
-            "price": price,
-            "flight_info": flight_info,
-        })
-
-        i = ret_start + 3  # 다음 항목으로
-
-    if not results:
-        return None
-
-    # 특정 항공사+편 검색 모드 (pax3 체크용)
-    # target_airline이 있으면 해당 항공사 결과만 반환
-    # (함수 시그니처 변경 없이 클로저로 처리 — 아래 check_pax3_prices에서 직접 파싱 호출)
-
-    # 최저가 찾기
-    best = min(results, key=lambda x: x["price"])
-
-    # KAL 찾기 (왕복 모두 대한항공인 조합 — 항공사명에 "대한항공" 포함)
-    kal = next((r for r in results if "대한항공" in r["airline"]), None)
-
-    return {
-        "min_price": best["price"],
-        "airline": best["airline"],
-        "flight_info": best["flight_info"],
-        "kal_price": kal["price"] if kal else None,
-        "kal_flight_info": kal["flight_info"] if kal else None,
-        "_all_results": results,  # pax3 체크용 전체 결과
-    }
-
-
-class BrowserCrashError(Exception):
-    """Playwright 브라우저가 비정상 종료된 경우 발생 — 데이터 삭제 방지용."""
-    pass
-
-
-async def scrape_flights(page, url: str, origin: str, destination: str,
-                         depart_time_from: int, return_time_from: int) -> dict | None:
-    """네이버 항공권 페이지에서 항공편 정보를 크롤링한다."""
-    try:
-        await page.goto(url, wait_until="domcontentloaded", timeout=60000)
-        await page.wait_for_timeout(8000)
-
-        text = await page.evaluate(
-            '() => { const m = document.querySelector("main"); return m ? m.innerText : ""; }'
-        )
-
-        if not text or len(text) < 100:
-            logger.warning(f"텍스트 추출 실패 또는 내용 부족: {url}")
-            return None
-
-        return parse_naver_flights(text, origin, destination, depart_time_from, return_time_from)
+    from archive import archive_rows
 
-    except Exception as e:
-        err_str = str(e)
-        # 브라우저 크래시 감지 — 이 경우 데이터를 삭제하면 안 됨
-        if any(kw in err_str for kw in [
-            "Target page, context or browser has been closed",
-            "Browser has been closed",
-            "browser has been disconnected",
-            "Connection closed",
-        ]):
-            raise BrowserCrashError(err_str)
-        logger.error(f"크롤링 오류 ({url}): {e}")
-        return None
-
-
-async def scan_route(page, route_id: int, origin: str, destination: str,
-                     dates: list[tuple[str, str]],
-                     naver_origin: str | None = None, naver_dest: str | None = None):
-    """한 구간의 전체 날짜를 스캔한다."""
-    db = await get_db()
-    try:
-        route_cursor = await db.execute(
-            "SELECT depart_time_from, return_time_from FROM routes WHERE id = ?",
-            (route_id,),
-        )
-        route_row = await route_cursor.fetchone()
-        depart_time_from = route_row[0] if isinstance(route_row, tuple) else route_row["depart_time_from"]
-        return_time_from = route_row[1] if isinstance(route_row, tuple) else route_row["return_time_from"]
-
-        for depart_date, return_date in dates:
-            url = build_url(origin, destination, depart_date, return_date,
-                            naver_origin=naver_origin, naver_dest=naver_dest)
-            dd_fmt = f"{depart_date[:4]}-{depart_date[4:6]}-{depart_date[6:]}"
-            rd_fmt = f"{return_date[:4]}-{return_date[4:6]}-{return_date[6:]}"
-            logger.info(f"스캔: {origin}→{destination} {dd_fmt} ~ {rd_fmt}")
-
-            result = None
-            browser_crashed = False
-            for attempt in range(MAX_RETRIES + 1):
-                try:
-                    result = await scrape_flights(
-                        page, url, origin, destination,
-                        depart_time_from, return_time_from,
-                    )
-                except BrowserCrashError as e:
-                    logger.error(f"브라우저 크래시 감지 ({origin}→{destination} {dd_fmt}): {e}")
-                    browser_crashed = True
-                    break
-                if result is not None:
-                    break
-                if attempt < MAX_RETRIES:
-                    logger.info(f"재시도 ({attempt + 1}/{MAX_RETRIES})")
-                    await asyncio.sleep(2)
-
-            if browser_crashed:
-                # 브라우저 크래시 시 데이터 삭제하지 않고 스킵
-                logger.warning(f"브라우저 크래시로 스캔 스킵 (데이터 보존): {origin}→{destination} {dd_fmt}")
-                await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
-                continue
-
-            if result is None:
-                logger.warning(f"결과 없음: {origin}→{destination} {dd_fmt}")
-                # 기존 weekly_lowest 데이터가 있으면 삭제 (크롤러가 데이터 관리 담당)
-                existing = await db.execute(
-                    "SELECT id FROM weekly_lowest WHERE route_id=? AND depart_date=? AND return_date=?",
-                    (route_id, dd_fmt, rd_fmt)
-                )
-                if await existing.fetchone():
-                    await db.execute(
-                        "DELETE FROM weekly_lowest WHERE route_id=? AND depart_date=? AND return_date=?",
-                        (route_id, dd_fmt, rd_fmt)
-                    )
-                    await db.commit()
-                    logger.info(f"weekly_lowest 삭제: {origin}→{destination} {dd_fmt} (항공편 소멸)")
-                await asyncio.sleep(random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX))
-                continue
-
-            now = datetime.now(KST).isoformat()
-
-            # scan_history 저장
-            await insert_scan(
-                db, route_id, dd_fmt, rd_fmt,
-                result["min_price"], result["airline"],
-                result["flight_info"], now,
-            )
-
-            # weekly_lowest 갱신
-            price_change = await update_weekly_lowest(
-                db, route_id, dd_fmt, rd_fmt,
-                result["min_price"], result["airline"], result["flight_info"],
-                result["kal_price"], result["kal_flight_info"], now,
-            )
-
-            await db.commit()
-
-            # 최저가 갱신 시 즉시 알림
-            if price_change is not None:
-                old_price, new_price = price_change
-                if old_price is not None:  # 기존 대비 갱신된 경우만 알림
-                    # 해당 구간 전체 최저가 조회
-                    overall_row = await db.execute(
-                        "SELECT MIN(min_price) as p, depart_date FROM weekly_lowest WHERE route_id=?",
-                        (route_id,)
-                    )
-                    overall = await overall_row.fetchone()
-                    overall_min = overall["p"] if overall else None
-                    overall_min_date = overall["depart_date"] if overall else None
-
-                    alert_msg = format_price_alert(
-                        destination, dd_fmt, rd_fmt,
-                        old_price, new_price,
-                        result["airline"], result["flight_info"],
-                        overall_min=overall_min,
-                        overall_min_date=overall_min_date,
-                    )
-                    send_discord(alert_msg)
-
-            # 랜덤 딜레이
-            delay = random.uniform(REQUEST_DELAY_MIN, REQUEST_DELAY_MAX)
-            await asyncio.sleep(delay)
-
-    finally:
-        await db.close()
-
-
-async def cleanup_past_dates():
-    """오늘 이전 날짜의 weekly_lowest 행을 삭제하고, 30일 이상 된 scan_history를 정리한다."""
     db = await get_db()
     today_str = datetime.now(KST).date().isoformat()  # "YYYY-MM-DD"
     cutoff_str = (datetime.now(KST).date() - timedelta(days=30)).isoformat()
     try:
-        # weekly_lowest 과거 날짜 삭제
-        cursor = await db.execute(
-            "SELECT COUNT(*) FROM weekly_lowest WHERE depart_date < ?",
-            (today_str,)
-        )
-        count = (await cursor.fetchone())[0]
+        # weekly_lowest 과거 날짜 아카이브 후 삭제
+        try:
+            count = await archive_rows(db, "weekly_lowest", "depart_date < ?", (today_str,))
+        except Exception as e:
+            logger.error(f"weekly_lowest 아카이브 실패 (삭제 생략): {e}")
+            count = 0
         if count > 0:
             await db.execute(
                 "DELETE FROM weekly_lowest WHERE depart_date < ?",
@@ -498,12 +71,12 @@ async def cleanup_past_dates():
         else:
             logger.info("삭제할 weekly_lowest 과거 날짜 없음")
 
-        # scan_history 30일 이상 된 데이터 삭제
-        cursor2 = await db.execute(
-            "SELECT COUNT(*) FROM scan_history WHERE scanned_at < ?",
-            (cutoff_str,)
-        )
-        count2 = (await cursor2.fetchone())[0]
+        # scan_history 30일 이상 된 데이터 아카이브 후 삭제
+        try:
+            count2 = await archive_rows(db, "scan_history", "scanned_at < ?", (cutoff_str,))
+        except Exception as e:
+            logger.error(f"scan_history 아카이브 실패 (삭제 생략): {e}")
+            count2 = 0
         if count2 > 0:
             await db.execute(
                 "DELETE FROM scan_history WHERE scanned_at < ?",
@@ -511,13 +84,65 @@ async def cleanup_past_dates():
             )
             logger.info(f"scan_history 30일+ 데이터 {count2}건 삭제 (< {cutoff_str})")
 
+        # 실행 계측 URL별 행은 30일만 보관 (scan_runs 요약은 유지)
+        cursor = await db.execute("DELETE FROM scan_metrics WHERE started_at < ?", (cutoff_str,))
+        if cursor.rowcount > 0:
+            logger.info(f"scan_metrics 30일+ 데이터 {cursor.rowcount}건 삭제")
+        # 지난 출발일의 대상 확인 시각 (스캔 예산 순위용)
+        await db.execute("DELETE FROM target_checks WHERE depart_date < ?", (today_str,))
+        # 편도 조합 검증 기록도 30일
+        cursor = await db.execute("DELETE FROM leg_checks WHERE checked_at < ?", (cutoff_str,))
+        if cursor.rowcount > 0:
+            logger.info(f"leg_checks 30일+ 데이터 {cursor.rowcount}건 삭제")
+
+        # 원본 페이지 아카이브 보존 기간 / 용량 한도 정리
+        try:
+            from pagestore import PageStore, prune_page_archive
+
+            removed, freed = await prune_page_archive(db, PageStore())
+            if removed:
+                logger.info(f"페이지 아카이브 {removed}개 삭제 ({freed / 1048576:.1f}MB)")
+        except Exception as e:
+            logger.error(f"페이지 아카이브 정리 실패: {e}")
+
         await db.commit()
     finally:
         await db.close()
 
 
-async def check_pax3_prices(page):
+async def load_price_stats():
+    """weekly_price_history 기반 가격 통계를 만든다. 실패하면 None (모든 하락을 알림 — 기존 동작)."""
+    try:
+        from pricestats import PriceStats
+
+        db = await get_db()
+        try:
+            stats = await PriceStats.load(db)
+        finally:
+            await db.close()
+        logger.info(f"가격 통계: 시계열 {len(stats.series)}개 / 관측 {stats.size}개")
+        return stats
+    except Exception as e:
+        logger.error(f"가격 통계 계산 실패 (알림 필터 생략): {e}")
+        return None
+
+
+async def load_last_checked() -> dict:
+    """스캔 계획용 대상별 마지막 확인 시각. 실패하면 빈 dict (출발일순 예산 선택 — 기존 동작)."""
+    try:
+        db = await get_db()
+        try:
+            return await get_last_checked(db)
+        finally:
+            await db.close()
+    except Exception as e:
+        logger.error(f"마지막 확인 시각 조회 실패 (출발일순 예산 선택): {e}")
+        return {}
+
+
+async def check_pax3_prices(source):
     """구간별 전체 최저가 편(동일 항공사)을 adult=3으로 재검색해 pax3_price를 갱신한다.
+    source: 운임 공급자 또는 Playwright 페이지 (scrape_flights와 같음).
 
     - adult=3 결과에서 1인 최저가와 동일한 항공사 편을 찾아 가격 비교
     - 해당 항공사 편이 없으면 pax3_price = -1 (3석 없음 표시)
@@ -551,7 +176,7 @@ async def check_pax3_prices(page):
                 f"(타겟: {target_airline}, adult=3)"
             )
             try:
-                result = await scrape_flights(page, url, origin, destination,
+                result = await scrape_flights(source, url, origin, destination,
                                              depart_time_from, return_time_from)
             except BrowserCrashError as e:
                 logger.error(f"3인 체크 브라우저 크래시: {origin}→{destination} — {e}")
@@ -591,6 +216,24 @@ async def check_pax3_prices(page):
 
 
 async def main(special_only: bool = False, headless: bool | None = None):
+    await init_db()
+    recorder = RunRecorder("tracker")
+    await recorder.begin()
+    status = "error"
+    try:
+        await run_scan(special_only, headless, recorder)
+        status = "ok"
+    finally:
+        await recorder.finish(status)
+
+
+async def run_scan(special_only: bool, headless: bool | None, recorder: RunRecorder):
+    from playwright.async_api import async_playwright
+    from alerts import AlertDispatcher
+    from discord_client import DiscordClient, load_discord_bot_token
+    from export import ProgressiveExporter
+    from browser import BrowserSession
+
     if headless is None:
         headless = HEADLESS
     mode = "headless" if headless else "headed"
@@ -600,82 +243,124 @@ async def main(special_only: bool = False, headless: bool | None = None):
         + f" [{mode}]"
     )
 
-    await init_db()
-    await cleanup_past_dates()
-    dates = generate_scan_dates()
-    logger.info(f"스캔 날짜 {len(dates)}개 생성됨")
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=headless,
-            args=["--no-sandbox", "--disable-blink-features=AutomationControlled"]
-        )
-        context = await browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/131.0.0.0 Safari/537.36"
-            ),
-            viewport={"width": 1280, "height": 800},
-            locale="ko-KR",
-        )
-        await context.add_init_script(
-            "Object.defineProperty(navigator, 'webdriver', {get: () => undefined})"
-        )
-        page = await context.new_page()
-
-        # 일반 구간 — 패턴 기반 날짜
-        if not special_only:
-            for i, route in enumerate(ROUTES, start=1):
-                logger.info(f"구간 스캔 시작: {route['origin']}→{route['destination']} ({route['label']})")
-                await scan_route(page, i, route["origin"], route["destination"], dates)
-                logger.info(f"구간 스캔 완료: {route['label']}")
-
-        # 특별 구간 — 구간별 고정 날짜
-        offset = len(ROUTES)
-        for j, route in enumerate(SPECIAL_ROUTES, start=1):
-            route_id = offset + j
-            route_dates = route.get("dates", [])
-            if not route_dates:
-                continue
-            naver_origin = route.get("naver_origin")
-            naver_dest = route.get("naver_dest")
-            logger.info(f"특별 구간 스캔: {route['origin']}→{route['destination']} ({route['label']}, {len(route_dates)}개 날짜)")
-            await scan_route(page, route_id, route["origin"], route["destination"], route_dates,
-                             naver_origin=naver_origin, naver_dest=naver_dest)
-            logger.info(f"특별 구간 스캔 완료: {route['label']}")
-
-        # 구간별 최저가 주 3인 가격 확인
+    with recorder.stage("cleanup"):
+        await cleanup_past_dates()
+    with recorder.stage("stats"):
+        price_stats = await load_price_stats()
+        last_checked = await load_last_checked()
+    now = datetime.now(KST)
+    plan = build_scan_plan(now.date(), special_only=special_only, last_checked=last_checked,
+                           stale_before=(now - timedelta(hours=SCAN_STALE_HOURS)).isoformat())
+    recorder.plan = {
+        "targets": plan.target_count, "unique": plan.unique_count,
+        "selected": len(plan.fetches), "skipped": len(plan.skipped),
+    }
+    logger.info(plan.summary())
+    if plan.skipped:
+        first = min(f.depart_date for f in plan.skipped)
+        logger.info(f"예산 초과로 다음 실행으로 미룸: {len(plan.skipped)}개 (출발일 {first}~)")
+
+    # 최저가 갱신 알림은 outbox → 백그라운드 디스패처가 구간별 다이제스트로 전송
+    discord = DiscordClient(load_discord_bot_token(), DISCORD_CHANNEL_ID)
+    dispatcher = AlertDispatcher(discord)
+    dispatcher.start()
+
+    # 구간 스캔이 끝날 때마다 스냅샷 기록 + 백그라운드 export/배포 트리거
+    exporter = ProgressiveExporter(export_and_push)
+    exporter.start()
+    snapshotted: set[int] = set()
+
+    async def route_done(route_id: int):
+        logger.info(f"구간 스캔 완료: {ALL_ROUTES[route_id - 1]['label']}")
         try:
-            await check_pax3_prices(page)
+            with recorder.stage("snapshot"):
+                await record_snapshots([route_id])
+            snapshotted.add(route_id)
         except Exception as e:
-            logger.error(f"3인 가격 체크 실패: {e}")
-
-        await browser.close()
+            logger.error(f"스냅샷 기록 실패 (route_id={route_id}): {e}")
+        exporter.trigger([route_id])
+        dispatcher.route_done(route_id)
 
-    # 스냅샷 기록 — 실패해도 export는 계속
+    # 스캔 / 3인 체크 / 스냅샷 중 예외가 나도 백그라운드 작업은 반드시 마무리한다
+    # (대기 중인 export, outbox 알림 전송, aiohttp 세션, 브라우저) — 예외는 닫은 뒤 main으로 전파
     try:
-        await record_snapshots()
-    except Exception as e:
-        logger.error(f"스냅샷 기록 실패 (export는 계속 진행): {e}")
+        async with async_playwright() as p:
+            # 페이지 / 컨텍스트 / 브라우저를 메모리와 로드 횟수에 따라 선제 교체 (browser.py)
+            session = BrowserSession(p, headless)
+            try:
+                await session.start()
+                # 공급자마다 페이지 1개 — 2개 이상이면 느린 로드에 헤지 요청. SCAN_FETCHERS개가 동시에 로드
+                fetchers = [await session.open_fetcher() for _ in range(SCAN_FETCHERS)]
+
+                stats = await execute_scan_plan(fetchers, plan, on_route_done=route_done, recorder=recorder,
+                                                price_stats=price_stats)
+                logger.info(
+                    f"스캔 실행: 계획 {stats['selected']}개 중 {stats['executed']}개 완료 "
+                    f"(페이지 로드 {stats['page_loads']}회, 변경 없음 {stats['unchanged']}, "
+                    f"결과 없음 {stats['no_result']}, 크래시 {stats['crashed']}, "
+                    f"헤지 {stats['hedged']}회 중 {stats['hedge_wins']}회 승, DB 배치 {stats['write_batches']}회) — "
+                    f"대상 {stats['targets']}개 / 고유 {stats['unique']}개"
+                    + (f", 편도 조합 {stats['composed']}개 / 검증 {stats['leg_checks']}개" if stats["composed"] else "")
+                )
+                stage_boundary("scan")
 
-    # data.json 내보내기 + GitHub push — 실패해도 스캔 결과는 DB에 보존됨
-    try:
-        await export_and_push()
-    except Exception as e:
-        logger.error(f"export_and_push 실패: {e}")
+                # 구간별 최저가 주 3인 가격 확인
+                try:
+                    with recorder.stage("pax3"):
+                        await check_pax3_prices(fetchers[0])
+                except Exception as e:
+                    logger.error(f"3인 가격 체크 실패: {e}")
+                exporter.trigger()   # weeks(pax3_price)만 바뀜 — 히스토리 샤드는 다시 만들지 않음
+                stage_boundary("pax3")
+            finally:
+                await session.close()
+
+        # 이번 실행에서 스캔하지 않은 구간(--special-only 등)도 스냅샷 기록 — 실패해도 export는 계속
+        remaining = [rid for rid in range(1, len(ALL_ROUTES) + 1) if rid not in snapshotted]
+        if remaining:
+            try:
+                with recorder.stage("snapshot"):
+                    await record_snapshots(remaining)
+            except Exception as e:
+                logger.error(f"스냅샷 기록 실패 (export는 계속 진행): {e}")
+            exporter.trigger(remaining)
+        stage_boundary("snapshots")
+    finally:
+        try:
+            # 대기 중인 export/배포 마무리 — 트리거가 남아 있을 때만 실행. 실패해도 스캔 결과는 DB에 보존됨
+            with recorder.stage("export_wait"):
+                await exporter.close()
+            logger.info(f"백그라운드 export {exporter.runs}회 실행")
+            recorder.add_stage("export", exporter.seconds)
+            stage_boundary("export")
+        finally:
+            try:
+                await dispatcher.close()
+                logger.info(f"최저가 알림 {dispatcher.sent}개 메시지 전송")
+                recorder.add_stage("discord", dispatcher.send_seconds)
+            finally:
+                await discord.close()
 
     logger.info("항공권 가격 트래커 완료")
 
 
-async def record_snapshots():
-    """전체 weekly_lowest 기준으로 price_history / weekly_price_history 스냅샷을 기록한다."""
+async def record_snapshots(route_ids: list[int] | None = None):
+    """weekly_lowest 기준으로 price_history / weekly_price_history 스냅샷을 기록한다.
+
+    route_ids를 주면 해당 구간만 기록한다 (구간 스캔 직후 호출용). None이면 전체.
+    """
     db = await get_db()
     now_str = datetime.now(KST).isoformat()
     try:
+        where = ""
+        params: tuple = ()
+        if route_ids is not None:
+            where = f"WHERE route_id IN ({','.join('?' * len(route_ids))}) "
+            params = tuple(route_ids)
         rows = await db.execute(
             "SELECT route_id, depart_date, return_date, min_price, airline, flight_info "
-            "FROM weekly_lowest ORDER BY route_id, min_price"
+            f"FROM weekly_lowest {where}ORDER BY route_id, min_price",
+            params,
         )
         rows = await rows.fetchall()
 
@@ -701,134 +386,29 @@ async def record_snapshots():
         await db.close()
 
 
-async def export_and_push():
-    """DB → data.json 내보내기 후 GitHub에 push한다.
+async def export_and_push(history_routes: set[int] | None = None):
+    """DB → data/ 샤드 내보내기 후 publisher로 배포한다.
+    history_routes: 히스토리 샤드를 다시 만들 구간 (None이면 전체, export.export_data 참고).
 
     방어 설계:
-    - 메인 쿼리(weekly_lowest) 실패 → 예외 전파 (data.json 미작성)
-    - 히스토리 쿼리 실패 → 경고 로그만, 빈 히스토리로 data.json 정상 작성
-    - data.json 작성은 DB 연결 종료 후 항상 실행 (finally 외부)
-    - git push 실패 → 로그만 (파일은 이미 저장됨)
+    - export 실패 → 예외 전파 (기존 샤드/매니페스트는 그대로)
+    - 배포 실패 → 로그만 (파일은 이미 저장됨, 다음 실행에서 재시도)
     """
-    import pathlib
-    HISTORY_LIMIT = 200
-
-    data = {"updated_at": datetime.now(KST).isoformat(), "routes": []}
-    route_map = {}
-
-    db = await get_db()
-    try:
-        # ── 1. 메인 데이터: weekly_lowest (실패 시 예외 전파)
-        route_labels = {r["destination"]: r["label"] for r in ALL_ROUTES}
-        rows = await db.execute("""
-            SELECT r.origin, r.destination,
-                   w.depart_date, w.return_date,
-                   w.min_price, w.airline, w.flight_info,
-                   w.kal_price, w.kal_flight_info,
-                   w.pax3_price, w.updated_at
-            FROM weekly_lowest w
-            JOIN routes r ON w.route_id = r.id
-            ORDER BY r.id, w.depart_date
-        """)
-        async for row in rows:
-            key = f"{row['origin']}-{row['destination']}"
-            if key not in route_map:
-                route_map[key] = {
-                    "origin": row["origin"],
-                    "destination": row["destination"],
-                    "label": route_labels.get(row["destination"], row["destination"]),
-                    "weeks": [],
-                    "overall_history": [],
-                    "weekly_history": {},
-                }
-            route_map[key]["weeks"].append({
-                "depart_date": row["depart_date"],
-                "return_date": row["return_date"],
-                "min_price": row["min_price"],
-                "airline": row["airline"],
-                "flight_info": row["flight_info"],
-                "kal_price": row["kal_price"],
-                "kal_flight_info": row["kal_flight_info"],
-                "pax3_price": row["pax3_price"],
-                "updated_at": row["updated_at"],
-            })
-        data["routes"] = list(route_map.values())
-
-        # ── 2. 히스토리 데이터: 실패해도 메인 데이터는 보존
-        rid_to_key = {
-            i + 1: f"{r['origin']}-{r['destination']}"
-            for i, r in enumerate(ALL_ROUTES)
-        }
-        try:
-            ph_rows = await db.execute(
-                "SELECT route_id, snapshot_at, overall_min_price, airline, depart_date "
-                "FROM price_history ORDER BY route_id, snapshot_at DESC"
-            )
-            ph_by_route: dict = {}
-            for row in await ph_rows.fetchall():
-                key = rid_to_key.get(row["route_id"])
-                if key and key in route_map:
-                    ph_by_route.setdefault(key, []).append({
-                        "snapshot_at": row["snapshot_at"],
-                        "price": row["overall_min_price"],
-                        "airline": row["airline"],
-                        "depart_date": row["depart_date"],
-                    })
-            for key, entries in ph_by_route.items():
-                route_map[key]["overall_history"] = list(reversed(entries[:HISTORY_LIMIT]))
-
-            wph_rows = await db.execute(
-                "SELECT route_id, depart_date, snapshot_at, min_price, airline "
-                "FROM weekly_price_history ORDER BY route_id, depart_date, snapshot_at DESC"
-            )
-            wph_by_key: dict = {}
-            for row in await wph_rows.fetchall():
-                key = rid_to_key.get(row["route_id"])
-                if key and key in route_map:
-                    dd = row["depart_date"]
-                    wph_by_key.setdefault(key, {}).setdefault(dd, []).append({
-                        "snapshot_at": row["snapshot_at"],
-                        "price": row["min_price"],
-                        "airline": row["airline"],
-                    })
-            for key, dd_map in wph_by_key.items():
-                wh = route_map[key]["weekly_history"]
-                for dd, entries in dd_map.items():
-                    wh[dd] = list(reversed(entries[:HISTORY_LIMIT]))
-
-        except Exception as e:
-            logger.warning(f"히스토리 쿼리 실패 (빈 히스토리로 진행): {e}")
-
-    finally:
-        await db.close()
-
-    repo_dir = pathlib.Path(__file__).parent
-    data_path = repo_dir / "data.json"
-    with open(data_path, "w", encoding="utf-8") as f:
-        _json.dump(data, f, ensure_ascii=False, indent=2)
-    logger.info(f"data.json 저장 완료 ({len(data['routes'])}개 구간)")
+    from export import export_data
+    from publish import get_publisher
 
+    await export_data(history_routes=history_routes)
     try:
-        subprocess.run(["git", "-C", str(repo_dir), "add", "data.json"], check=True)
-        result = subprocess.run(
-            ["git", "-C", str(repo_dir), "diff", "--cached", "--quiet"],
-            capture_output=True
-        )
-        if result.returncode != 0:  # 변경사항 있을 때만 커밋
-            now_str = datetime.now(KST).strftime("%Y-%m-%d %H:%M KST")
-            subprocess.run(
-                ["git", "-C", str(repo_dir), "commit", "-m", f"data: {now_str} 가격 업데이트"],
-                check=True
-            )
-            subprocess.run(["git", "-C", str(repo_dir), "push"], check=True)
-            logger.info("GitHub push 완료")
-        else:
-            logger.info("변경사항 없음, push 생략")
-    except subprocess.CalledProcessError as e:
-        logger.error(f"GitHub push 실패: {e}")
+        await asyncio.to_thread(get_publisher().publish, EXPORT_DIR)
+    except Exception as e:
+        logger.error(f"배포 실패 ({PUBLISH_BACKEND}): {e}")
 
 
 if __name__ == "__main__":
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+    )
     parser = argparse.ArgumentParser(description="항공권 가격 트래커")
     parser.add_argument(
         "--special-only", action="store_true",
@@ -843,6 +423,10 @@ if __name__ == "__main__":
         "--headed", action="store_true",
         help="브라우저를 headed 모드로 실행 (config.HEADLESS보다 우선)"
     )
+    parser.add_argument(
+        "--profile", nargs="?", const=PROFILE_DIR, default=None, metavar="DIR",
+        help=f"CPU 프로파일 / 단계별 tracemalloc / 브라우저 RSS를 DIR에 기록 (기본: {PROFILE_DIR})"
+    )
 
     args = parser.parse_args()
     headless_override = None
@@ -851,4 +435,10 @@ if __name__ == "__main__":
     elif args.headed:
         headless_override = False
 
-    asyncio.run(main(special_only=args.special_only, headless=headless_override))
+    if args.profile:
+        from profiling import RunProfiler
+
+        with RunProfiler("tracker", args.profile):
+            asyncio.run(main(special_only=args.special_only, headless=headless_override))
+    else:
+        asyncio.run(main(special_only=args.special_only, headless=headless_override))
@@ -0,0 +1,102 @@
+"""항공권 가격 트래커 - 주별 가격 추세 (온라인 EWMA)
+
+weekly_lowest 행마다 추세 상태를 두고, 스캔 결과(관측 최저가) 1건마다 O(1)로 갱신한다.
+히스토리를 다시 읽지 않으므로 이력이 쌓여도 스캔당 비용은 일정하다.
+
+- trend_level: 관측 가격의 지수평활 (Holt 선형 평활)
+- trend_slope: 하루당 가격 변화 (원/일)
+- trend_var: 1스텝 예측 오차 제곱의 지수평활 (sd = √var)
+- trend_n / trend_last_price / trend_updated_at / trend_changed_at(관측가가 마지막으로 바뀐 시각)
+
+스캔 간격이 불규칙하므로 평활 계수는 경과 일수에서 반감기로 구한다
+(매시 스캔이든 하루 1회든 같은 기간이면 같은 가중치).
+"""
+
+import math
+from datetime import datetime, date
+
+from config import (
+    TREND_LEVEL_HALFLIFE_DAYS, TREND_SLOPE_HALFLIFE_DAYS,
+    TREND_MIN_OBS, TREND_HINT_WEEKLY_PCT, TREND_BUY_DAYS,
+)
+
+TREND_COLUMNS = (
+    "trend_level", "trend_slope", "trend_var", "trend_n",
+    "trend_last_price", "trend_updated_at", "trend_changed_at",
+)
+
+HINT_LABELS = {
+    "buy": "📈 상승 추세 — 지금 구매",
+    "wait": "📉 하락 추세 — 대기",
+    "hold": "➖ 보합",
+}
+
+
+def _weight(dt_days: float, halflife_days: float) -> float:
+    """경과 dt_days 동안 새 관측에 줄 가중치 (반감기 기준)."""
+    return 1.0 - 0.5 ** (dt_days / halflife_days)
+
+
+def update_trend(state, price: int, observed_at: str) -> dict:
+    """추세 상태(state: TREND_COLUMNS를 가진 행/dict 또는 None)에 관측 1건을 반영한 새 상태."""
+    if state is None or not state["trend_n"]:
+        return {
+            "trend_level": float(price), "trend_slope": 0.0, "trend_var": 0.0, "trend_n": 1,
+            "trend_last_price": price, "trend_updated_at": observed_at, "trend_changed_at": observed_at,
+        }
+
+    # 시각은 모두 KST — tracker(타임존 포함)와 briefing(타임존 없음) 표기 차이를 피해 앞 19자로 비교
+    dt = (datetime.fromisoformat(observed_at[:19])
+          - datetime.fromisoformat(state["trend_updated_at"][:19])).total_seconds() / 86400
+    dt = max(dt, 0.0)
+    level, slope, var = state["trend_level"], state["trend_slope"], state["trend_var"]
+
+    predicted = level + slope * dt
+    err = price - predicted
+    a = _weight(dt, TREND_LEVEL_HALFLIFE_DAYS)
+    new_level = predicted + a * err
+    if dt > 0:
+        b = _weight(dt, TREND_SLOPE_HALFLIFE_DAYS)
+        slope = (1 - b) * slope + b * (new_level - level) / dt
+    var = (1 - a) * var + a * err * err
+
+    return {
+        "trend_level": new_level, "trend_slope": slope, "trend_var": var,
+        "trend_n": state["trend_n"] + 1, "trend_last_price": price,
+        "trend_updated_at": observed_at,
+        "trend_changed_at": observed_at if price != state["trend_last_price"] else state["trend_changed_at"],
+    }
+
+
+def trend_hint(row, today: date) -> str | None:
+    """buy / wait / hold. 관측이 TREND_MIN_OBS개 미만이면 None.
+
+    - 주당 변화가 통상가의 ±TREND_HINT_WEEKLY_PCT% 이상이면 상승(buy) / 하락(wait)
+    - 출발 TREND_BUY_DAYS일 이내는 하락 추세가 아니면 buy (더 기다릴 여유 없음)
+    """
+    if not row["trend_n"] or row["trend_n"] < TREND_MIN_OBS:
+        return None
+    weekly = row["trend_slope"] * 7
+    threshold = row["trend_level"] * TREND_HINT_WEEKLY_PCT / 100
+    days_left = (date.fromisoformat(row["depart_date"]) - today).days
+    if weekly >= threshold:
+        return "buy"
+    if weekly <= -threshold:
+        return "wait" if days_left > TREND_BUY_DAYS else "hold"
+    return "buy" if days_left <= TREND_BUY_DAYS else "hold"
+
+
+def trend_summary(row, today: date) -> dict | None:
+    """export용 추세 요약 (관측이 없으면 None).
+
+    가격이 그대로면 샤드 내용(해시)도 그대로이도록 관측 수는 빼고 값은 거칠게 반올림한다.
+    """
+    if not row["trend_n"]:
+        return None
+    return {
+        "level": round(row["trend_level"], -2),
+        "slope_per_day": round(row["trend_slope"], -1),
+        "sd": round(math.sqrt(row["trend_var"] or 0.0), -2),
+        "changed_at": row["trend_changed_at"],
+        "hint": trend_hint(row, today),
+    }